@@ -0,0 +1,9 @@
+# config.py
+"""
+Environment loading. The .env file is read once, on first import; modules
+that read settings from os.environ import this module first.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
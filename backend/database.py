@@ -1,19 +1,59 @@
 # database.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
+import config  # noqa: F401  (loads .env)
+from utils.db_pool import DB_PGBOUNCER, engine_options, instrument_pool
 import os
 
-# Load environment variables from .env file
-load_dotenv()
-
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if not DATABASE_URL:
     raise ValueError("❌ DATABASE_URL not found. Check your .env file.")
 
-# SQLAlchemy setup
-engine = create_engine(DATABASE_URL)
+# SQLAlchemy setup (pool settings: see utils/db_pool.py)
+engine = create_engine(DATABASE_URL, **engine_options())
+instrument_pool(engine, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+# Async engine (asyncpg) for the read endpoints: dashboard, progress,
+# streak and weight history, and the food/exercise entry and profile reads.
+# Derived from DATABASE_URL unless ASYNC_DATABASE_URL is set. Prepared
+# statements are cached per connection, so repeated queries skip parsing
+# and planning (disabled behind PgBouncer). Writes, sync, import/export,
+# analytics (CPU-bound NumPy, which would block the event loop) and food
+# search (upstream HTTP calls) stay on the sync engine.
+PREPARED_STATEMENT_CACHE_SIZE = 0 if DB_PGBOUNCER else int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500"))
+
+# libpq query parameters asyncpg knows under another name
+_ASYNCPG_RENAMED_PARAMS = {"sslmode": "ssl"}
+# libpq-only query parameters asyncpg rejects; set ASYNC_DATABASE_URL to configure the async engine separately
+_LIBPQ_ONLY_PARAMS = {
+    "connect_timeout", "sslrootcert", "sslcert", "sslkey", "sslcrl", "sslpassword", "gssencmode",
+    "application_name", "options", "client_encoding",
+    "keepalives", "keepalives_idle", "keepalives_interval", "keepalives_count",
+}
+
+
+def asyncpg_url(url) -> URL:
+    """
+    asyncpg form of a psycopg2 database URL: sslmode becomes ssl, options
+    asyncpg doesn't accept are dropped, and the statement cache size is set.
+    """
+    url = make_url(url)
+    if url.drivername != "postgresql+asyncpg":
+        query = {
+            _ASYNCPG_RENAMED_PARAMS.get(name, name): value
+            for name, value in url.query.items() if name not in _LIBPQ_ONLY_PARAMS
+        }
+        url = url.set(drivername="postgresql+asyncpg", query=query)
+    return url.update_query_dict({"prepared_statement_cache_size": str(PREPARED_STATEMENT_CACHE_SIZE)})
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL
+async_engine = create_async_engine(asyncpg_url(ASYNC_DATABASE_URL), **engine_options(is_async=True))
+instrument_pool(async_engine, "primary_async")
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
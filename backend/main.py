@@ -2,13 +2,31 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.exc import OperationalError
-from database import Base, engine
-import models
+from sqlalchemy.exc import DBAPIError, OperationalError
+from database import engine, async_engine
+import services.change_log  # Registers the change-log flush listener for /sync
+import services.maintenance  # Registers the maintenance jobs with the scheduler
+from utils.password_pool import shutdown_password_pool
+from utils.schema_version import check_schema_version
+from services.maintenance import create_entry_partitions
+from utils.metrics import MetricsMiddleware
+from utils.query_stats import QueryStatsMiddleware
+from utils.log import configure_logging, shutdown_logging, get_logger, log_fields, RequestIdMiddleware
+from utils.profiling import PROFILING, ProfilingMiddleware
+from utils.memory import MEMORY_TRACE_FRAMES, MemorySamplingMiddleware, start_tracing
+from utils.scheduler import start_scheduler, stop_scheduler
 import sys
 
 # Import routers
-from routers import auth_router, users_router, food_router, exercise_router, dashboard_router
+from routers import auth_router, users_router, food_router, exercise_router, dashboard_router, sync_router, health_router, metrics_router, admin_router
+
+# --- Logging (queued; written to stdout by a background thread) ---
+configure_logging()
+logger = get_logger("main")
+
+# --- Allocation tracing from startup (otherwise started via /admin/memory/tracing) ---
+if MEMORY_TRACE_FRAMES:
+    start_tracing(MEMORY_TRACE_FRAMES)
 
 # --- Initialize the FastAPI app ---
 app = FastAPI(
@@ -26,16 +44,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Link", "X-DB-Queries", "X-DB-Time-Ms", "X-Request-ID", "X-Profile-Id"],
 )
 
-# --- Database Initialization ---
-try:
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database connected successfully and tables verified.")
-except OperationalError as e:
-    print("❌ Database connection failed. Check your .env file or PostgreSQL server.")
-    print(e)
-    sys.exit(1)
+# --- Request Metrics (scraped at /metrics) ---
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(MemorySamplingMiddleware)
+
+# --- Opt-in request profiling (see utils/profiling.py; not installed when off) ---
+if PROFILING:
+    app.add_middleware(ProfilingMiddleware)
+
+# --- Request IDs (outermost, so every log line of a request carries one) ---
+app.add_middleware(RequestIdMiddleware)
 
 # --- Include Routers ---
 app.include_router(auth_router)
@@ -43,6 +65,10 @@ app.include_router(users_router)
 app.include_router(food_router)
 app.include_router(exercise_router)
 app.include_router(dashboard_router)
+app.include_router(sync_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 # --- Root Route ---
 @app.get("/")
@@ -63,25 +89,35 @@ def root():
         ]
     }
 
-# --- Health Check Endpoint ---
-@app.get("/health")
-def health_check():
-    """
-    Verifies that the backend and database are online.
-    """
-    try:
-        engine.connect()
-        return {"status": "ok", "database": "connected"}
-    except Exception as e:
-        return {"status": "error", "database": "disconnected", "detail": str(e)}
-
 # --- Lifecycle Events ---
 @app.on_event("startup")
 async def startup_event():
-    print("🚀 FitTrack+ API starting up...")
-    print("📚 API Documentation available at: /docs")
-    print("🔍 Food Aggregation Layer: Active (Nutritionix + USDA)")
+    logger.info("FitTrack+ API starting up")
+    # Tables are created by migrations (`alembic upgrade head`), not here
+    try:
+        revision, _ = check_schema_version(engine)
+        logger.info("Database connected", extra=log_fields(schema_revision=revision))
+    except OperationalError:
+        logger.critical("Database connection failed. Check your .env file or PostgreSQL server.", exc_info=True)
+        shutdown_logging()
+        sys.exit(1)
+    # Keep the next months' entry partitions ready (no-op when they exist)
+    try:
+        created = create_entry_partitions()
+    except DBAPIError:
+        # Most likely the lock timeout; the scheduled partitions job retries
+        logger.warning("Could not create entry partitions on startup", exc_info=True)
+    else:
+        if created:
+            logger.info("Created entry partitions", extra=log_fields(partitions=created))
+    # Periodic maintenance (services/maintenance.py); leader-only jobs run on one worker
+    start_scheduler()
+    logger.info("API documentation available at /docs")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    print("🛑 FitTrack+ API shutting down...")
+    logger.info("FitTrack+ API shutting down")
+    await stop_scheduler()
+    shutdown_password_pool()
+    await async_engine.dispose()
+    shutdown_logging()
@@ -0,0 +1,171 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 04:06:06.514739
+
+Schema as it was created by Base.metadata.create_all. Databases that
+were set up that way already have these tables: run `alembic stamp 0001`
+once, then `alembic upgrade head`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('food_master',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('external_id', sa.String(), nullable=True),
+    sa.Column('food_name', sa.String(), nullable=False),
+    sa.Column('brand_name', sa.String(), nullable=True),
+    sa.Column('serving_qty', sa.Float(), nullable=True),
+    sa.Column('serving_unit', sa.String(), nullable=True),
+    sa.Column('serving_weight_g', sa.Float(), nullable=True),
+    sa.Column('calories', sa.Float(), nullable=False),
+    sa.Column('protein_g', sa.Float(), nullable=True),
+    sa.Column('carbs_g', sa.Float(), nullable=True),
+    sa.Column('fat_g', sa.Float(), nullable=True),
+    sa.Column('fiber_g', sa.Float(), nullable=True),
+    sa.Column('sugar_g', sa.Float(), nullable=True),
+    sa.Column('sodium_mg', sa.Float(), nullable=True),
+    sa.Column('barcode', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_food_search', 'food_master', ['food_name', 'brand_name'], unique=False)
+    op.create_index(op.f('ix_food_master_barcode'), 'food_master', ['barcode'], unique=False)
+    op.create_index(op.f('ix_food_master_external_id'), 'food_master', ['external_id'], unique=False)
+    op.create_index(op.f('ix_food_master_food_name'), 'food_master', ['food_name'], unique=False)
+    op.create_index(op.f('ix_food_master_id'), 'food_master', ['id'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('first_name', sa.String(), nullable=True),
+    sa.Column('last_name', sa.String(), nullable=True),
+    sa.Column('gender', sa.String(), nullable=True),
+    sa.Column('date_of_birth', sa.Date(), nullable=True),
+    sa.Column('height_cm', sa.Float(), nullable=True),
+    sa.Column('current_weight_kg', sa.Float(), nullable=True),
+    sa.Column('goal_weight_kg', sa.Float(), nullable=True),
+    sa.Column('activity_level', sa.String(), nullable=True),
+    sa.Column('goal_type', sa.String(), nullable=True),
+    sa.Column('target_calories', sa.Integer(), nullable=True),
+    sa.Column('target_protein_g', sa.Float(), nullable=True),
+    sa.Column('target_carbs_g', sa.Float(), nullable=True),
+    sa.Column('target_fat_g', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('exercise_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_name', sa.String(), nullable=False),
+    sa.Column('duration_minutes', sa.Float(), nullable=False),
+    sa.Column('calories_burned', sa.Float(), nullable=True),
+    sa.Column('entry_date', sa.Date(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_user_exercise_date', 'exercise_entries', ['user_id', 'entry_date'], unique=False)
+    op.create_index(op.f('ix_exercise_entries_entry_date'), 'exercise_entries', ['entry_date'], unique=False)
+    op.create_index(op.f('ix_exercise_entries_id'), 'exercise_entries', ['id'], unique=False)
+    op.create_index(op.f('ix_exercise_entries_user_id'), 'exercise_entries', ['user_id'], unique=False)
+    op.create_table('food_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('food_name', sa.String(), nullable=False),
+    sa.Column('brand_name', sa.String(), nullable=True),
+    sa.Column('calories', sa.Float(), nullable=False),
+    sa.Column('protein_g', sa.Float(), nullable=True),
+    sa.Column('carbs_g', sa.Float(), nullable=True),
+    sa.Column('fat_g', sa.Float(), nullable=True),
+    sa.Column('quantity', sa.Float(), nullable=True),
+    sa.Column('unit', sa.String(), nullable=True),
+    sa.Column('meal_type', sa.String(), nullable=True),
+    sa.Column('entry_date', sa.Date(), nullable=False),
+    sa.Column('food_master_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['food_master_id'], ['food_master.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_user_date', 'food_entries', ['user_id', 'entry_date'], unique=False)
+    op.create_index(op.f('ix_food_entries_entry_date'), 'food_entries', ['entry_date'], unique=False)
+    op.create_index(op.f('ix_food_entries_id'), 'food_entries', ['id'], unique=False)
+    op.create_index(op.f('ix_food_entries_user_id'), 'food_entries', ['user_id'], unique=False)
+    op.create_table('streaks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('current_streak', sa.Integer(), nullable=True),
+    sa.Column('longest_streak', sa.Integer(), nullable=True),
+    sa.Column('last_logged_date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_streaks_id'), 'streaks', ['id'], unique=False)
+    op.create_index(op.f('ix_streaks_user_id'), 'streaks', ['user_id'], unique=True)
+    op.create_table('weight_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('weight_kg', sa.Float(), nullable=False),
+    sa.Column('log_date', sa.Date(), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_user_weight_date', 'weight_logs', ['user_id', 'log_date'], unique=False)
+    op.create_index(op.f('ix_weight_logs_id'), 'weight_logs', ['id'], unique=False)
+    op.create_index(op.f('ix_weight_logs_log_date'), 'weight_logs', ['log_date'], unique=False)
+    op.create_index(op.f('ix_weight_logs_user_id'), 'weight_logs', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_weight_logs_user_id'), table_name='weight_logs')
+    op.drop_index(op.f('ix_weight_logs_log_date'), table_name='weight_logs')
+    op.drop_index(op.f('ix_weight_logs_id'), table_name='weight_logs')
+    op.drop_index('idx_user_weight_date', table_name='weight_logs')
+    op.drop_table('weight_logs')
+    op.drop_index(op.f('ix_streaks_user_id'), table_name='streaks')
+    op.drop_index(op.f('ix_streaks_id'), table_name='streaks')
+    op.drop_table('streaks')
+    op.drop_index(op.f('ix_food_entries_user_id'), table_name='food_entries')
+    op.drop_index(op.f('ix_food_entries_id'), table_name='food_entries')
+    op.drop_index(op.f('ix_food_entries_entry_date'), table_name='food_entries')
+    op.drop_index('idx_user_date', table_name='food_entries')
+    op.drop_table('food_entries')
+    op.drop_index(op.f('ix_exercise_entries_user_id'), table_name='exercise_entries')
+    op.drop_index(op.f('ix_exercise_entries_id'), table_name='exercise_entries')
+    op.drop_index(op.f('ix_exercise_entries_entry_date'), table_name='exercise_entries')
+    op.drop_index('idx_user_exercise_date', table_name='exercise_entries')
+    op.drop_table('exercise_entries')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_food_master_id'), table_name='food_master')
+    op.drop_index(op.f('ix_food_master_food_name'), table_name='food_master')
+    op.drop_index(op.f('ix_food_master_external_id'), table_name='food_master')
+    op.drop_index(op.f('ix_food_master_barcode'), table_name='food_master')
+    op.drop_index('idx_food_search', table_name='food_master')
+    op.drop_table('food_master')
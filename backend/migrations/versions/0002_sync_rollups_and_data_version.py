@@ -0,0 +1,108 @@
+"""sync rollups and data version
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 04:06:21.146874
+
+Databases created with create_all before migrations existed may already
+have some of these tables and users.data_version, so each step is skipped
+when its table or column is already there.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table('change_log'):
+        op.create_table('change_log',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_change_log_user_id', 'change_log', ['user_id', 'id'], unique=False)
+    if not _has_table('monthly_rollups'):
+        op.create_table('monthly_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('calories_consumed', sa.Float(), nullable=False),
+        sa.Column('calories_burned', sa.Float(), nullable=False),
+        sa.Column('protein_g', sa.Float(), nullable=False),
+        sa.Column('carbs_g', sa.Float(), nullable=False),
+        sa.Column('fat_g', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_monthly_rollup_user_period', 'monthly_rollups', ['user_id', 'period_start'], unique=True)
+        op.create_index(op.f('ix_monthly_rollups_id'), 'monthly_rollups', ['id'], unique=False)
+    if not _has_table('sync_mutations'):
+        op.create_table('sync_mutations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_sync_mutation_user_key', 'sync_mutations', ['user_id', 'idempotency_key'], unique=True)
+        op.create_index(op.f('ix_sync_mutations_id'), 'sync_mutations', ['id'], unique=False)
+    if not _has_table('weekly_rollups'):
+        op.create_table('weekly_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('calories_consumed', sa.Float(), nullable=False),
+        sa.Column('calories_burned', sa.Float(), nullable=False),
+        sa.Column('protein_g', sa.Float(), nullable=False),
+        sa.Column('carbs_g', sa.Float(), nullable=False),
+        sa.Column('fat_g', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_weekly_rollup_user_period', 'weekly_rollups', ['user_id', 'period_start'], unique=True)
+        op.create_index(op.f('ix_weekly_rollups_id'), 'weekly_rollups', ['id'], unique=False)
+    if not _has_column('users', 'data_version'):
+        op.add_column('users', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'data_version')
+    op.drop_index(op.f('ix_weekly_rollups_id'), table_name='weekly_rollups')
+    op.drop_index('idx_weekly_rollup_user_period', table_name='weekly_rollups')
+    op.drop_table('weekly_rollups')
+    op.drop_index(op.f('ix_sync_mutations_id'), table_name='sync_mutations')
+    op.drop_index('idx_sync_mutation_user_key', table_name='sync_mutations')
+    op.drop_table('sync_mutations')
+    op.drop_index(op.f('ix_monthly_rollups_id'), table_name='monthly_rollups')
+    op.drop_index('idx_monthly_rollup_user_period', table_name='monthly_rollups')
+    op.drop_table('monthly_rollups')
+    op.drop_index('idx_change_log_user_id', table_name='change_log')
+    op.drop_table('change_log')
@@ -0,0 +1,138 @@
+"""partition entry tables by month
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 05:12:40.318205
+
+Rebuilds food_entries and exercise_entries as tables range-partitioned by
+entry_date: one partition per month that has entries, the current month
+and the next three, and a default partition. Rows are copied into the new
+table, so this takes an exclusive lock for the duration of the copy; run
+it in a maintenance window. Later months are created by
+services.partitions (on startup and `python -m services.partitions ensure`).
+
+The primary key becomes (id, entry_date); ids keep their sequence.
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _food_columns():
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('food_entries_id_seq'::regclass)"), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('food_name', sa.String(), nullable=False),
+        sa.Column('brand_name', sa.String(), nullable=True),
+        sa.Column('calories', sa.Float(), nullable=False),
+        sa.Column('protein_g', sa.Float(), nullable=True),
+        sa.Column('carbs_g', sa.Float(), nullable=True),
+        sa.Column('fat_g', sa.Float(), nullable=True),
+        sa.Column('quantity', sa.Float(), nullable=True),
+        sa.Column('unit', sa.String(), nullable=True),
+        sa.Column('meal_type', sa.String(), nullable=True),
+        sa.Column('entry_date', sa.Date(), nullable=False),
+        sa.Column('food_master_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['food_master_id'], ['food_master.id'], name='food_entries_food_master_id_fkey'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE', name='food_entries_user_id_fkey'),
+    ]
+
+
+def _exercise_columns():
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('exercise_entries_id_seq'::regclass)"), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('exercise_name', sa.String(), nullable=False),
+        sa.Column('duration_minutes', sa.Float(), nullable=False),
+        sa.Column('calories_burned', sa.Float(), nullable=True),
+        sa.Column('entry_date', sa.Date(), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE', name='exercise_entries_user_id_fkey'),
+    ]
+
+
+# table -> (columns, composite user/date index)
+TABLES = {
+    'food_entries': (_food_columns, 'idx_user_date'),
+    'exercise_entries': (_exercise_columns, 'idx_user_exercise_date'),
+}
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _swap_in(table: str, new_table: str) -> None:
+    """Replace table with new_table, keeping the id sequence."""
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.drop_table(table)
+    op.rename_table(new_table, table)
+    op.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {new_table}_pkey TO {table}_pkey")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    current = date.today().replace(day=1)
+
+    for table, (columns, user_date_index) in TABLES.items():
+        new_table = f'{table}_partitioned'
+        column_list = ', '.join(column.name for column in columns() if isinstance(column, sa.Column))
+
+        op.create_table(new_table,
+            *columns(),
+            sa.PrimaryKeyConstraint('id', 'entry_date', name=f'{new_table}_pkey'),
+            postgresql_partition_by='RANGE (entry_date)'
+        )
+        months = {_add_months(current, offset) for offset in range(MONTHS_AHEAD + 1)}
+        months.update(op.get_bind().execute(
+            sa.text(f"SELECT DISTINCT date_trunc('month', entry_date)::date FROM {table}")
+        ).scalars())
+        for month in sorted(months):
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {new_table} "
+                f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+            )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {new_table} DEFAULT")
+
+        op.execute(f"INSERT INTO {new_table} ({column_list}) SELECT {column_list} FROM {table}")
+        _swap_in(table, new_table)
+
+        # Indexes are created on the parent and cascade to every partition
+        op.create_index(user_date_index, table, ['user_id', 'entry_date'], unique=False)
+        op.create_index(op.f(f'ix_{table}_entry_date'), table, ['entry_date'], unique=False)
+        op.create_index(op.f(f'ix_{table}_user_id'), table, ['user_id'], unique=False)
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    """Downgrade schema. Partitions detached by `archive` are not restored."""
+    for table, (columns, user_date_index) in TABLES.items():
+        new_table = f'{table}_plain'
+        column_list = ', '.join(column.name for column in columns() if isinstance(column, sa.Column))
+
+        op.create_table(new_table,
+            *columns(),
+            sa.PrimaryKeyConstraint('id', name=f'{new_table}_pkey')
+        )
+        op.execute(f"INSERT INTO {new_table} ({column_list}) SELECT {column_list} FROM {table}")
+        _swap_in(table, new_table)
+
+        op.create_index(user_date_index, table, ['user_id', 'entry_date'], unique=False)
+        op.create_index(op.f(f'ix_{table}_entry_date'), table, ['entry_date'], unique=False)
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
+        op.create_index(op.f(f'ix_{table}_user_id'), table, ['user_id'], unique=False)
@@ -0,0 +1,50 @@
+"""per-user change sequence for sync tokens
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 06:02:11.804512
+
+change_log ids are assigned at insert time, so a transaction that commits
+after a later one leaves a lower id behind a token a client already has.
+Each user now gets a counter (users.change_seq) that writers increment
+under the user's row lock, so change_log.seq is assigned in commit order
+per user. Existing rows are numbered in id order.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('change_log', sa.Column('seq', sa.BigInteger(), nullable=True))
+    op.execute("""
+        UPDATE change_log SET seq = numbered.seq
+        FROM (SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY id) AS seq FROM change_log) AS numbered
+        WHERE change_log.id = numbered.id
+    """)
+    op.execute("""
+        UPDATE users SET change_seq = latest.seq
+        FROM (SELECT user_id, max(seq) AS seq FROM change_log GROUP BY user_id) AS latest
+        WHERE users.id = latest.user_id
+    """)
+    op.alter_column('change_log', 'seq', nullable=False)
+    op.drop_index('idx_change_log_user_id', table_name='change_log')
+    op.create_index('idx_change_log_user_seq', 'change_log', ['user_id', 'seq'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_change_log_user_seq', table_name='change_log')
+    op.create_index('idx_change_log_user_id', 'change_log', ['user_id', 'id'], unique=False)
+    op.drop_column('change_log', 'seq')
+    op.drop_column('users', 'change_seq')
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Date, Text, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Date, Text, Index, JSON
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -28,6 +28,11 @@ class User(Base):
     target_carbs_g = Column(Float, default=200)
     target_fat_g = Column(Float, default=65)
     
+    # Bumped on every write to the user's data; used to derive ETags
+    data_version = Column(Integer, default=0, server_default="0", nullable=False)
+    # Last change_log.seq assigned to this user (see services.change_log)
+    change_seq = Column(BigInteger, default=0, server_default="0", nullable=False)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -77,11 +82,12 @@ class FoodMaster(Base):
     )
 
 
-# Food tracking table
+# Food tracking table, range-partitioned by month of entry_date (see services.partitions).
+# entry_date is part of the primary key so lookups by key touch one partition.
 class FoodEntry(Base):
     __tablename__ = "food_entries"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     food_name = Column(String, nullable=False)
@@ -99,7 +105,7 @@ class FoodEntry(Base):
     
     # Meal categorization
     meal_type = Column(String, nullable=True)  # breakfast, lunch, dinner, snack
-    entry_date = Column(Date, nullable=False, index=True)
+    entry_date = Column(Date, primary_key=True, index=True)
     
     # Reference to food master (if applicable)
     food_master_id = Column(Integer, ForeignKey("food_master.id"), nullable=True)
@@ -111,21 +117,22 @@ class FoodEntry(Base):
     
     __table_args__ = (
         Index('idx_user_date', 'user_id', 'entry_date'),
+        {"postgresql_partition_by": "RANGE (entry_date)"},
     )
 
 
-# Exercise tracking table
+# Exercise tracking table, partitioned like food_entries
 class ExerciseEntry(Base):
     __tablename__ = "exercise_entries"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     exercise_name = Column(String, nullable=False)
     duration_minutes = Column(Float, nullable=False)
     calories_burned = Column(Float, default=0)
     
-    entry_date = Column(Date, nullable=False, index=True)
+    entry_date = Column(Date, primary_key=True, index=True)
     notes = Column(Text, nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -135,6 +142,7 @@ class ExerciseEntry(Base):
     
     __table_args__ = (
         Index('idx_user_exercise_date', 'user_id', 'entry_date'),
+        {"postgresql_partition_by": "RANGE (entry_date)"},
     )
 
 
@@ -175,3 +183,84 @@ class WeightLog(Base):
     __table_args__ = (
         Index('idx_user_weight_date', 'user_id', 'log_date'),
     )
+
+
+# Pre-aggregated nutrition totals for long-range progress charts.
+# Rows are maintained incrementally by services.rollups on every entry write.
+class WeeklyRollup(Base):
+    __tablename__ = "weekly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    period_start = Column(Date, nullable=False)  # Monday of the week
+    
+    calories_consumed = Column(Float, default=0, nullable=False)
+    calories_burned = Column(Float, default=0, nullable=False)
+    protein_g = Column(Float, default=0, nullable=False)
+    carbs_g = Column(Float, default=0, nullable=False)
+    fat_g = Column(Float, default=0, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_weekly_rollup_user_period', 'user_id', 'period_start', unique=True),
+    )
+
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    period_start = Column(Date, nullable=False)  # First day of the month
+    
+    calories_consumed = Column(Float, default=0, nullable=False)
+    calories_burned = Column(Float, default=0, nullable=False)
+    protein_g = Column(Float, default=0, nullable=False)
+    carbs_g = Column(Float, default=0, nullable=False)
+    fat_g = Column(Float, default=0, nullable=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_monthly_rollup_user_period', 'user_id', 'period_start', unique=True),
+    )
+
+
+# Per-user change feed for delta sync (offline-first mobile clients).
+# Rows are appended automatically by services.change_log on every flush.
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(BigInteger, nullable=False)  # Per-user, in commit order; the sync token
+    
+    entity_type = Column(String, nullable=False)  # food, exercise, weight
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)  # upsert, delete
+    
+    changed_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_change_log_user_seq', 'user_id', 'seq', unique=True),
+    )
+
+
+# Results of client mutations submitted through /sync, keyed by the
+# client's idempotency key so retried batches are never applied twice.
+class SyncMutation(Base):
+    __tablename__ = "sync_mutations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    idempotency_key = Column(String, nullable=False)
+    
+    status_code = Column(Integer, nullable=True)
+    result = Column(JSON, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_sync_mutation_user_key', 'user_id', 'idempotency_key', unique=True),
+    )
@@ -0,0 +1,3 @@
+"""
+Performance checks that run outside the API process (python -m perf.<tool>).
+"""
@@ -0,0 +1,509 @@
+"""
+Synthetic Dataset Generator
+Fills a database with production-like data for benchmarks and load tests:
+users, food_master, food and exercise entries, weight logs and streaks
+(rollups are rebuilt from the entries). The distributions are shaped like
+real usage rather than uniform noise:
+
+- food popularity follows a power law over the catalog (Zipf, --zipf),
+  and about one entry in eight is a custom food with no food_master_id
+- user activity is long-tailed (Pareto, --heavy-tail): most users log a
+  few items on some days, a few heavy users log many items nearly daily
+- users join throughout the covered period and some stop logging; fewer
+  days are logged on weekends
+- entries follow breakfast/lunch/dinner/snack patterns, and exercise and
+  weigh-ins happen on a share of days, with weight drifting toward the goal
+
+    python -m perf.dataset --users 5000 --days 365             # ~3M food entries
+    python -m perf.dataset --users 50 --days 90 --fixtures fixtures/ --no-load
+
+Rows are bulk-loaded with COPY by --workers processes, each taking a slice
+of the users. The data depends only on --seed and the sizes, not on the
+number of workers, so --fixtures writes the same rows as CSV files (one
+per table, with users and foods numbered from 1).
+
+Every generated user's password is SYNTHETIC_PASSWORD and emails are
+<email-prefix>-<n>@example.com, so load tests can log in as any of them.
+Generated entries are not added to the sync change log. Run it against a
+scratch database.
+"""
+
+import argparse
+import csv
+import io
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SYNTHETIC_PASSWORD = "benchmark-password"
+# bcrypt hash of SYNTHETIC_PASSWORD, fixed so fixtures are reproducible
+SYNTHETIC_PASSWORD_HASH = "$2b$12$Z5R1i8JIvhY4tCrjJ1.AWehjlGElVaGcG/81ieSBLJIzORQKCm/nW"
+EMAIL_DOMAIN = "example.com"
+
+# Users per worker task, and rows buffered per table before each COPY
+SLICE_SIZE = 50
+COPY_BATCH_ROWS = 20000
+
+USER_COLUMNS = (
+    "id", "email", "hashed_password", "first_name", "last_name", "gender", "date_of_birth",
+    "height_cm", "current_weight_kg", "goal_weight_kg", "activity_level", "goal_type",
+    "target_calories", "target_protein_g", "target_carbs_g", "target_fat_g", "created_at", "updated_at",
+)
+FOOD_MASTER_COLUMNS = (
+    "id", "source", "external_id", "food_name", "brand_name", "serving_qty", "serving_unit",
+    "serving_weight_g", "calories", "protein_g", "carbs_g", "fat_g", "fiber_g", "sugar_g",
+    "sodium_mg", "barcode", "created_at", "updated_at",
+)
+FOOD_ENTRY_COLUMNS = (
+    "user_id", "food_name", "brand_name", "calories", "protein_g", "carbs_g", "fat_g",
+    "quantity", "unit", "meal_type", "entry_date", "food_master_id", "created_at",
+)
+EXERCISE_ENTRY_COLUMNS = ("user_id", "exercise_name", "duration_minutes", "calories_burned", "entry_date", "notes", "created_at")
+WEIGHT_LOG_COLUMNS = ("user_id", "weight_kg", "log_date", "notes", "created_at")
+STREAK_COLUMNS = ("user_id", "current_streak", "longest_streak", "last_logged_date", "created_at", "updated_at")
+
+# Tables written per user, with their columns and the positions holding ids to remap
+PER_USER_TABLES = {
+    "food_entries": (FOOD_ENTRY_COLUMNS, {0: "users", 11: "food_master"}),
+    "exercise_entries": (EXERCISE_ENTRY_COLUMNS, {0: "users"}),
+    "weight_logs": (WEIGHT_LOG_COLUMNS, {0: "users"}),
+    "streaks": (STREAK_COLUMNS, {0: "users"}),
+}
+
+# name, serving unit, serving grams, calories, protein, carbs, fat, fiber, sugar, sodium
+BASE_FOODS = (
+    ("Greek Yogurt", "cup", 170, 150, 15, 8, 4, 0, 6, 60),
+    ("Rolled Oats", "cup", 80, 300, 10, 54, 5, 8, 1, 5),
+    ("Banana", "medium", 118, 105, 1.3, 27, 0.4, 3.1, 14, 1),
+    ("Apple", "medium", 182, 95, 0.5, 25, 0.3, 4.4, 19, 2),
+    ("Scrambled Eggs", "serving", 120, 200, 14, 2, 15, 0, 1, 340),
+    ("Whole Wheat Toast", "slice", 32, 80, 4, 14, 1, 2, 1.5, 140),
+    ("Peanut Butter", "tbsp", 16, 95, 4, 3, 8, 1, 1.5, 70),
+    ("Chicken Breast", "serving", 140, 230, 43, 0, 5, 0, 0, 100),
+    ("Brown Rice", "cup", 195, 215, 5, 45, 1.8, 3.5, 0.7, 10),
+    ("White Rice", "cup", 158, 205, 4.3, 45, 0.4, 0.6, 0, 2),
+    ("Salmon Fillet", "fillet", 150, 310, 34, 0, 18, 0, 0, 90),
+    ("Broccoli", "cup", 91, 30, 2.5, 6, 0.3, 2.4, 1.5, 30),
+    ("Mixed Salad", "bowl", 150, 120, 3, 10, 8, 3, 4, 180),
+    ("Pasta Bolognese", "plate", 350, 620, 30, 70, 22, 5, 9, 780),
+    ("Cheese Pizza", "slice", 107, 285, 12, 36, 10, 2.5, 3.8, 640),
+    ("Beef Burrito", "burrito", 250, 490, 24, 55, 19, 6, 3, 1100),
+    ("Turkey Sandwich", "sandwich", 220, 380, 26, 42, 11, 4, 6, 1050),
+    ("Protein Bar", "bar", 60, 210, 20, 22, 7, 3, 6, 180),
+    ("Protein Shake", "bottle", 330, 160, 30, 5, 3, 1, 2, 250),
+    ("Almonds", "oz", 28, 165, 6, 6, 14, 3.5, 1.2, 0),
+    ("Dark Chocolate", "square", 10, 55, 0.8, 4.5, 4, 1, 2.4, 2),
+    ("Potato Chips", "bag", 28, 150, 2, 15, 10, 1, 0.5, 170),
+    ("Cola", "can", 355, 140, 0, 39, 0, 0, 39, 45),
+    ("Orange Juice", "cup", 248, 110, 2, 26, 0.5, 0.5, 21, 2),
+    ("Latte", "grande", 473, 190, 13, 19, 7, 0, 17, 170),
+    ("Black Coffee", "cup", 240, 2, 0.3, 0, 0, 0, 0, 5),
+    ("Cheddar Cheese", "slice", 28, 115, 7, 0.4, 9.5, 0, 0.1, 180),
+    ("Hummus", "tbsp", 30, 70, 2, 4, 5, 1.2, 0.2, 115),
+    ("Tofu Stir Fry", "plate", 300, 350, 20, 25, 18, 5, 8, 900),
+    ("Lentil Soup", "bowl", 250, 230, 14, 35, 3, 12, 4, 600),
+    ("Avocado Toast", "slice", 120, 260, 6, 24, 16, 7, 2, 330),
+    ("Blueberries", "cup", 148, 85, 1.1, 21, 0.5, 3.6, 15, 1),
+    ("Granola", "cup", 60, 270, 6, 40, 10, 4, 12, 20),
+    ("Cottage Cheese", "cup", 226, 205, 28, 8, 9, 0, 6, 820),
+    ("Ice Cream", "cup", 132, 275, 4.6, 31, 15, 1, 28, 105),
+    ("Steak", "serving", 180, 430, 46, 0, 27, 0, 0, 110),
+    ("Sushi Roll", "roll", 200, 350, 12, 55, 8, 3, 8, 700),
+    ("Chicken Caesar Wrap", "wrap", 230, 520, 30, 40, 26, 3, 3, 1200),
+    ("Ramen", "bowl", 450, 550, 20, 70, 20, 3, 4, 1800),
+    ("French Fries", "medium", 117, 365, 4, 48, 17, 4.4, 0.3, 250),
+)
+VARIANTS = ("", "", "", "Organic", "Light", "Classic", "Homestyle", "Family Recipe", "Spicy", "Reduced Sodium")
+BRANDS = (None, None, "Harvest Lane", "Blue Peak", "Sunfield", "Northern Farms", "Daily Pantry", "Green Valley", "Morning Mill")
+FOOD_SOURCES = ("usda", "usda", "openfoodfacts", "openfoodfacts", "openfoodfacts", "custom")
+
+# meal type, chance it is logged on a logging day, hour, average items
+MEALS = (("breakfast", 0.75, 8, 1.6), ("lunch", 0.85, 13, 2.0), ("dinner", 0.9, 19, 2.4), ("snack", 0.6, 16, 1.3))
+QUANTITIES = (0.5, 1.0, 1.0, 1.0, 1.0, 1.5, 2.0)
+CUSTOM_FOOD_SHARE = 0.12
+
+# exercise, kcal per minute for a 75 kg person
+EXERCISES = (
+    ("Walking", 4.5), ("Running", 11.0), ("Cycling", 8.0), ("Strength Training", 6.0),
+    ("Yoga", 3.0), ("Swimming", 9.0), ("HIIT", 12.0), ("Rowing", 8.5), ("Hiking", 7.0),
+)
+FIRST_NAMES = ("Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn", "Drew", "Robin")
+LAST_NAMES = ("Smith", "Garcia", "Chen", "Patel", "Okafor", "Novak", "Silva", "Kim", "Larsen", "Haddad", "Rossi", "Nguyen")
+
+
+class DatasetSpec:
+    """Sizes and shape parameters of a dataset; the same spec always yields the same rows."""
+
+    def __init__(self, users: int, days: int, foods: int, seed: int, zipf: float, heavy_tail: float,
+                 email_prefix: str, end: Optional[date] = None):
+        self.users = users
+        self.days = days
+        self.foods = foods
+        self.seed = seed
+        self.zipf = zipf
+        self.heavy_tail = heavy_tail
+        self.email_prefix = email_prefix
+        self.end = end or date.today()
+        self.start = self.end - timedelta(days=days - 1)
+
+
+def generate_foods(spec: DatasetSpec) -> List[tuple]:
+    """food_master rows (FOOD_MASTER_COLUMNS), numbered from 1."""
+    rng = random.Random(f"{spec.seed}:foods")
+    created_at = datetime.combine(spec.start, datetime.min.time())
+    foods = []
+    for food_no in range(1, spec.foods + 1):
+        name, unit, grams, *nutrients = rng.choice(BASE_FOODS)
+        scale = rng.uniform(0.8, 1.2)
+        calories, protein, carbs, fat, fiber, sugar, sodium = (round(value * scale, 1) for value in nutrients)
+        source = rng.choice(FOOD_SOURCES)
+        foods.append((
+            food_no, source, None if source == "custom" else f"synthetic-{food_no}",
+            f"{rng.choice(VARIANTS)} {name}".strip(), rng.choice(BRANDS), 1.0, unit, round(grams * scale, 1),
+            calories, protein, carbs, fat, fiber, sugar, sodium,
+            f"{rng.randrange(10 ** 12):012d}" if source == "openfoodfacts" else None, created_at, created_at,
+        ))
+    return foods
+
+
+class _FoodSampler:
+    """Draws food_master numbers with Zipf popularity; the popular foods are spread over the catalog."""
+
+    def __init__(self, spec: DatasetSpec):
+        rng = random.Random(f"{spec.seed}:popularity")
+        self.by_rank = list(range(1, spec.foods + 1))
+        rng.shuffle(self.by_rank)
+        total, cumulative = 0.0, []
+        for rank in range(1, spec.foods + 1):
+            total += 1.0 / rank ** spec.zipf
+            cumulative.append(total)
+        self.cumulative = cumulative
+
+    def sample(self, rng: random.Random, count: int) -> List[int]:
+        return rng.choices(self.by_rank, cum_weights=self.cumulative, k=count)
+
+
+def user_profile(spec: DatasetSpec, user_no: int) -> Dict:
+    """Profile and behaviour of one synthetic user (deterministic per user number)."""
+    rng = random.Random(f"{spec.seed}:user:{user_no}")
+    activity = min(rng.paretovariate(spec.heavy_tail), 8.0)  # 1 for most users, up to 8 for the heaviest
+    joined = spec.start + timedelta(days=int(spec.days * rng.random() ** 1.5))
+    churned = rng.random() < 0.3
+    active_until = joined + timedelta(days=int(rng.expovariate(1 / 90))) if churned else spec.end
+
+    gender = rng.choice(("male", "female"))
+    weight = min(max(rng.gauss(86 if gender == "male" else 72, 14), 48), 160)
+    goal_type = rng.choices(("lose", "maintain", "gain"), weights=(0.6, 0.25, 0.15))[0]
+    goal_weight = {"lose": weight * rng.uniform(0.8, 0.95), "maintain": weight, "gain": weight * rng.uniform(1.03, 1.1)}[goal_type]
+    target_calories = int(round(rng.gauss(2300 if gender == "male" else 1900, 250) / 50) * 50)
+
+    return {
+        "user_no": user_no,
+        "rng_seed": f"{spec.seed}:entries:{user_no}",
+        "activity": activity,
+        "log_chance": min(0.3 + 0.1 * activity, 0.97),
+        "joined": joined,
+        "active_until": min(active_until, spec.end),
+        "gender": gender,
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "date_of_birth": date(rng.randint(1955, 2005), rng.randint(1, 12), rng.randint(1, 28)),
+        "height_cm": round(rng.gauss(178 if gender == "male" else 165, 7), 1),
+        "start_weight": round(weight, 1),
+        "goal_weight": round(goal_weight, 1),
+        "goal_type": goal_type,
+        "activity_level": rng.choice(("sedentary", "light", "moderate", "active", "very_active")),
+        "target_calories": target_calories,
+    }
+
+
+def weight_path(profile: Dict) -> List[float]:
+    """The user's weight on each active day, drifting toward the goal weight."""
+    rng = random.Random(f"{profile['rng_seed']}:weight")
+    weight, goal = profile["start_weight"], profile["goal_weight"]
+    path = []
+    for _ in range((profile["active_until"] - profile["joined"]).days + 1):
+        weight += max(min((goal - weight) * 0.01, 0.08), -0.08) + rng.gauss(0, 0.15)
+        path.append(round(weight, 1))
+    return path
+
+
+def user_row(spec: DatasetSpec, profile: Dict, hashed_password: str) -> tuple:
+    """users row (USER_COLUMNS) for a profile."""
+    target = profile["target_calories"]
+    weights = weight_path(profile)
+    created_at = datetime.combine(profile["joined"], datetime.min.time()) + timedelta(hours=9)
+    return (
+        profile["user_no"], f"{spec.email_prefix}-{profile['user_no']}@{EMAIL_DOMAIN}", hashed_password,
+        profile["first_name"], profile["last_name"], profile["gender"], profile["date_of_birth"],
+        profile["height_cm"], weights[-1] if weights else profile["start_weight"], profile["goal_weight"],
+        profile["activity_level"], profile["goal_type"],
+        target, round(target * 0.3 / 4, 1), round(target * 0.4 / 4, 1), round(target * 0.3 / 9, 1),
+        created_at, created_at,
+    )
+
+
+def user_activity(spec: DatasetSpec, profile: Dict, foods: Sequence[tuple], sampler: _FoodSampler) -> Dict[str, List[tuple]]:
+    """One user's rows for the per-user tables (PER_USER_TABLES)."""
+    rng = random.Random(profile["rng_seed"])
+    user_no, activity = profile["user_no"], profile["activity"]
+    rows = {table: [] for table in PER_USER_TABLES}
+    food_entries, exercise_entries, weight_logs = rows["food_entries"], rows["exercise_entries"], rows["weight_logs"]
+
+    exercise_chance = min(0.12 + 0.06 * activity, 0.8)
+    weigh_chance = min(0.15 + 0.08 * activity, 0.9)
+    logged_days = []
+
+    day = profile["joined"]
+    for weight in weight_path(profile):
+        log_chance = profile["log_chance"] * (0.8 if day.weekday() >= 5 else 1.0)
+        if rng.random() < log_chance:
+            logged_days.append(day)
+            for meal_type, chance, hour, items in MEALS:
+                if rng.random() >= chance:
+                    continue
+                count = max(1, min(round(rng.gauss(items * (0.7 + 0.3 * math.sqrt(activity)), 0.8)), 8))
+                for food_no in sampler.sample(rng, count):
+                    created_at = datetime.combine(day, datetime.min.time()) + timedelta(
+                        hours=hour + rng.gauss(0, 1), minutes=rng.randrange(60)
+                    )
+                    quantity = rng.choice(QUANTITIES)
+                    food = foods[food_no - 1]
+                    if rng.random() < CUSTOM_FOOD_SHARE:
+                        food_name, brand_name, master = f"Homemade {food[3]}", None, None
+                    else:
+                        food_name, brand_name, master = food[3], food[4], food_no
+                    food_entries.append((
+                        user_no, food_name, brand_name, round(food[8] * quantity, 1), round(food[9] * quantity, 1),
+                        round(food[10] * quantity, 1), round(food[11] * quantity, 1), quantity, food[6],
+                        meal_type, day, master, created_at,
+                    ))
+
+        if rng.random() < exercise_chance:
+            name, kcal_per_minute = rng.choice(EXERCISES)
+            minutes = max(10, min(round(rng.gauss(40, 15)), 150))
+            exercise_entries.append((
+                user_no, name, minutes, round(minutes * kcal_per_minute * weight / 75, 1), day, None,
+                datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.choice((7, 12, 18))),
+            ))
+
+        if rng.random() < weigh_chance:
+            weight_logs.append((
+                user_no, weight, day, None,
+                datetime.combine(day, datetime.min.time()) + timedelta(hours=7, minutes=rng.randrange(60)),
+            ))
+
+        day += timedelta(days=1)
+
+    rows["streaks"].append((user_no, *_streak(logged_days, spec.end), datetime.combine(profile["joined"], datetime.min.time()),
+                            datetime.combine(spec.end, datetime.min.time())))
+    return rows
+
+
+def _streak(logged_days: List[date], today: date) -> Tuple[int, int, Optional[date]]:
+    """(current, longest, last logged day), as services.streaks.recompute_streak computes them."""
+    if not logged_days:
+        return 0, 0, None
+    longest = run = 1
+    for previous, day in zip(logged_days, logged_days[1:]):
+        run = run + 1 if (day - previous).days == 1 else 1
+        longest = max(longest, run)
+    current = run if (today - logged_days[-1]).days <= 1 else 0
+    return current, longest, logged_days[-1]
+
+
+# --- Output ---
+
+def _remap(rows: List[tuple], id_columns: Dict[int, str], id_maps: Dict[str, Sequence[int]]) -> List[tuple]:
+    """Replace generated user/food numbers with the database ids reserved for them."""
+    remapped = []
+    for row in rows:
+        row = list(row)
+        for position, table in id_columns.items():
+            if row[position] is not None:
+                row[position] = id_maps[table][row[position] - 1]
+        remapped.append(row)
+    return remapped
+
+
+def _copy_rows(raw_connection, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+    # csv writes None as an unquoted empty field, which COPY reads as NULL
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _write_fixture(path: str, columns: Sequence[str], rows: List[tuple], header: bool) -> None:
+    with open(path, "a", newline="", encoding="utf-8") as fixture:
+        writer = csv.writer(fixture)
+        if header:
+            writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def _reserve_ids(connection, table: str, count: int) -> List[int]:
+    """Take count ids from the table's id sequence."""
+    from sqlalchemy import text
+
+    return list(connection.execute(
+        text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+        {"table": table, "count": count}
+    ).scalars())
+
+
+# --- Workers ---
+
+def _init_worker() -> None:
+    # Connections inherited from the parent process must not be reused
+    from database import engine
+
+    engine.dispose(close=False)
+
+
+def _generate_slice(task: Dict) -> Dict[str, int]:
+    """
+    Generate the per-user rows for a slice of users, COPY them (and/or
+    write fixture parts), then rebuild the users' rollups.
+    """
+    spec, user_nos, id_maps, fixtures_part = task["spec"], task["user_nos"], task["id_maps"], task["fixtures_part"]
+    foods, sampler = generate_foods(spec), _FoodSampler(spec)
+    counts = {table: 0 for table in PER_USER_TABLES}
+    buffered = {table: [] for table in PER_USER_TABLES}
+
+    db = None
+    if id_maps is not None:
+        from database import SessionLocal
+
+        db = SessionLocal()
+
+    def flush(final: bool = False):
+        for table, rows in buffered.items():
+            if not rows or (not final and len(rows) < COPY_BATCH_ROWS):
+                continue
+            columns, id_columns = PER_USER_TABLES[table]
+            if db is not None:
+                _copy_rows(db.connection().connection, table, columns, _remap(rows, id_columns, id_maps))
+            if fixtures_part is not None:
+                _write_fixture(f"{fixtures_part}.{table}.csv", columns, rows, header=False)
+            counts[table] += len(rows)
+            buffered[table] = []
+
+    try:
+        for user_no in user_nos:
+            rows = user_activity(spec, user_profile(spec, user_no), foods, sampler)
+            for table, table_rows in rows.items():
+                buffered[table].extend(table_rows)
+            flush()
+        flush(final=True)
+
+        if db is not None:
+            from services.rollups import rebuild_rollups
+
+            for user_no in user_nos:
+                rebuild_rollups(db, id_maps["users"][user_no - 1])
+            db.commit()
+    finally:
+        if db is not None:
+            db.close()
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark dataset.")
+    parser.add_argument("--users", type=int, default=1000, help="users to create (default 1000)")
+    parser.add_argument("--days", type=int, default=365, help="days of history, ending today (default 365)")
+    parser.add_argument("--foods", type=int, default=5000, help="food_master rows (default 5000)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default 1)")
+    parser.add_argument("--zipf", type=float, default=1.1, help="food popularity exponent (default 1.1)")
+    parser.add_argument("--heavy-tail", type=float, default=1.6,
+                        help="Pareto shape of user activity; lower means heavier heavy users (default 1.6)")
+    parser.add_argument("--email-prefix", default="bench", help="user emails are <prefix>-<n>@example.com")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="parallel generator/COPY processes")
+    parser.add_argument("--fixtures", metavar="DIR", help="also write the rows as CSV fixture files to DIR")
+    parser.add_argument("--no-load", action="store_true", help="do not touch the database (use with --fixtures)")
+    args = parser.parse_args(argv)
+
+    if args.no_load and not args.fixtures:
+        parser.error("--no-load needs --fixtures")
+
+    spec = DatasetSpec(args.users, args.days, args.foods, args.seed, args.zipf, args.heavy_tail, args.email_prefix)
+    started = time.perf_counter()
+
+    foods = generate_foods(spec)
+    users = [user_row(spec, user_profile(spec, user_no), SYNTHETIC_PASSWORD_HASH) for user_no in range(1, spec.users + 1)]
+
+    if args.fixtures:
+        shutil.rmtree(args.fixtures, ignore_errors=True)
+        os.makedirs(args.fixtures)
+        _write_fixture(os.path.join(args.fixtures, "users.csv"), USER_COLUMNS, users, header=True)
+        _write_fixture(os.path.join(args.fixtures, "food_master.csv"), FOOD_MASTER_COLUMNS, foods, header=True)
+
+    id_maps = None
+    if not args.no_load:
+        from database import engine
+        from services.partitions import ensure_partitions
+
+        with engine.begin() as connection:
+            ensure_partitions(connection, first_month=spec.start)
+            id_maps = {
+                "users": _reserve_ids(connection, "users", spec.users),
+                "food_master": _reserve_ids(connection, "food_master", spec.foods),
+            }
+            raw_connection = connection.connection
+            _copy_rows(raw_connection, "users", USER_COLUMNS, _remap(users, {0: "users"}, id_maps))
+            _copy_rows(raw_connection, "food_master", FOOD_MASTER_COLUMNS, _remap(foods, {0: "food_master"}, id_maps))
+        engine.dispose()
+        print(f"Loaded {spec.users} users and {spec.foods} foods")
+
+    tasks = []
+    for index, first in enumerate(range(1, spec.users + 1, SLICE_SIZE)):
+        tasks.append({
+            "spec": spec,
+            "user_nos": list(range(first, min(first + SLICE_SIZE, spec.users + 1))),
+            "id_maps": id_maps,
+            "fixtures_part": os.path.join(args.fixtures, f"part-{index:05d}") if args.fixtures else None,
+        })
+
+    totals = {table: 0 for table in PER_USER_TABLES}
+    with multiprocessing.Pool(max(1, args.workers), initializer=None if args.no_load else _init_worker) as pool:
+        for done, counts in enumerate(pool.imap_unordered(_generate_slice, tasks), start=1):
+            for table, count in counts.items():
+                totals[table] += count
+            print(f"  {min(done * SLICE_SIZE, spec.users)}/{spec.users} users, "
+                  f"{totals['food_entries']} food entries", end="\r", flush=True)
+    print()
+
+    if args.fixtures:
+        _merge_fixture_parts(args.fixtures, [task["fixtures_part"] for task in tasks])
+
+    elapsed = time.perf_counter() - started
+    rows = sum(totals.values())
+    print(", ".join(f"{table}: {count}" for table, count in totals.items()))
+    print(f"Generated {rows} rows in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s)"
+          + ("" if args.no_load else "; rollups rebuilt") + (f"; fixtures in {args.fixtures}" if args.fixtures else ""))
+    return 0
+
+
+def _merge_fixture_parts(directory: str, parts: List[str]) -> None:
+    """Concatenate the workers' part files into one CSV per table, in user order."""
+    for table, (columns, _) in PER_USER_TABLES.items():
+        with open(os.path.join(directory, f"{table}.csv"), "w", newline="", encoding="utf-8") as merged:
+            csv.writer(merged).writerow(columns)
+            for part in parts:
+                path = f"{part}.{table}.csv"
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as part_file:
+                        shutil.copyfileobj(part_file, merged)
+                    os.remove(path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Import-Time Budget
+Cold start time is dominated by importing the application, so it is
+measured and held to a budget. Imports `main` in fresh interpreters with
+`python -X importtime`, reports the slowest modules and exits non-zero
+when the median import time is over budget:
+
+    python -m perf.import_budget                 # budget from IMPORT_BUDGET_MS (default 1500)
+    python -m perf.import_budget --budget-ms 800 --runs 7
+
+Run it from backend/ before a release. Heavy,
+rarely used dependencies (NumPy analytics, the food API clients, passlib)
+are imported lazily; a module that shows up at the top of the report is
+usually one that started importing them eagerly again.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+# Top-level packages that belong to the application (reported separately)
+APP_PACKAGES = ("main", "config", "database", "models", "routers", "schemas", "services", "utils")
+
+
+def measure(module: str) -> Dict[str, float]:
+    """
+    Cumulative import time in milliseconds per module, from one fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = max(timings.get(name.strip(), 0.0), int(cumulative) / 1000)
+    return timings
+
+
+def slowest(timings: Dict[str, float], limit: int = 10) -> Tuple[List, List]:
+    """Slowest application modules and slowest third-party top-level packages."""
+    app, third_party = [], []
+    for name, ms in timings.items():
+        if name.split(".")[0] in APP_PACKAGES:
+            app.append((name, ms))
+        elif "." not in name:
+            third_party.append((name, ms))
+    app.sort(key=lambda item: item[1], reverse=True)
+    third_party.sort(key=lambda item: item[1], reverse=True)
+    return app[:limit], third_party[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the application's import time against a budget.")
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS, help="maximum median import time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(max(1, args.runs))]
+    totals = [timings.get(args.module, 0.0) for timings in runs]
+    median = statistics.median(totals)
+
+    # Report the run closest to the median
+    app, third_party = slowest(sorted(runs, key=lambda timings: timings.get(args.module, 0.0))[len(runs) // 2])
+    print("Slowest application modules (cumulative ms):")
+    for name, ms in app:
+        print(f"  {ms:8.1f}  {name}")
+    print("Slowest third-party packages (cumulative ms):")
+    for name, ms in third_party:
+        print(f"  {ms:8.1f}  {name}")
+
+    print(f"import {args.module}: median {median:.1f} ms over {len(totals)} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}), budget {args.budget_ms:.0f} ms")
+    if median > args.budget_ms:
+        print("❌ Import time is over budget.")
+        return 1
+    print("✅ Import time is within budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
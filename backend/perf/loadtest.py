@@ -0,0 +1,367 @@
+"""
+Load Test Harness
+Drives the API with virtual users following scripted sessions, reports
+throughput and p50/p95/p99 latency per endpoint, and checks them against
+the SLOs below, to find how many concurrent users one worker serves and
+to catch capacity regressions before a deploy.
+
+Sessions (weighted): log a meal (open the dashboard, search as you type,
+log the pick, check the summary), a quick check (summary and streak), and
+browsing history (entry pages, long-range progress, analytics). Each
+virtual user logs in first. Think times are scaled by --think-scale
+(0 for back-to-back requests).
+
+Needs a database with users from perf.dataset (the same --email-prefix);
+logging meals adds food entries, so use a benchmark database:
+
+    python -m perf.dataset --users 1000 --days 365
+    python -m perf.loadtest --users 10,25,50 --duration 60
+
+By default a single-worker uvicorn is started on a free port, with Open
+Food Facts replaced by a local stand-in answering after
+--upstream-latency-ms (USDA and Nutritionix are mocked in-process
+already). Use --url to test a server that is already running instead.
+
+Every step must meet the SLOs (and an error rate of at most
+MAX_ERROR_RATE); the exit status is non-zero otherwise. --slo-file takes a
+JSON object overriding thresholds: {"GET /food/search": {"p95_ms": 250}}.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from perf.dataset import EMAIL_DOMAIN, SYNTHETIC_PASSWORD
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# endpoint -> latency thresholds in milliseconds
+SLOS: Dict[str, Dict[str, float]] = {
+    "POST /auth/login": {"p95_ms": 1000, "p99_ms": 2000},  # bcrypt
+    "GET /food/search": {"p95_ms": 400, "p99_ms": 1000},
+    "POST /food/entries": {"p95_ms": 200, "p99_ms": 500},
+    "GET /food/entries": {"p95_ms": 150, "p99_ms": 400},
+    "GET /dashboard/bundle": {"p95_ms": 300, "p99_ms": 700},
+    "GET /dashboard/summary": {"p95_ms": 100, "p99_ms": 250},
+    "GET /dashboard/streak": {"p95_ms": 100, "p99_ms": 250},
+    "GET /dashboard/progress/calories": {"p95_ms": 200, "p99_ms": 500},
+    "GET /dashboard/analytics": {"p95_ms": 500, "p99_ms": 1200},
+}
+MAX_ERROR_RATE = 0.01
+
+SEARCH_TERMS = ("chicken", "yogurt", "banana", "oatmeal", "salmon", "pizza", "protein", "almonds", "rice", "latte")
+MEAL_TYPES = ("breakfast", "lunch", "dinner", "snack")
+
+
+class Recorder:
+    """Latency samples and errors per endpoint, shared by the virtual users."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.recording = False
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples, self.errors = {}, {}
+
+
+class VirtualUser:
+    """One simulated client: its own HTTP session, token and random stream."""
+
+    def __init__(self, base_url: str, email: str, password: str, recorder: Recorder,
+                 stop: threading.Event, think_scale: float, seed: int):
+        self.base_url = base_url
+        self.email = email
+        self.password = password
+        self.recorder = recorder
+        self.stop = stop
+        self.think_scale = think_scale
+        self.rng = random.Random(seed)
+        self.http = requests.Session()
+
+    def request(self, method: str, path: str, endpoint: Optional[str] = None, **kwargs) -> Optional[requests.Response]:
+        endpoint = endpoint or f"{method} {path}"
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=30, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.recorder.record(endpoint, time.perf_counter() - started, ok)
+        return response if ok else None
+
+    def think(self, seconds: float) -> None:
+        if self.think_scale > 0:
+            self.stop.wait(seconds * self.think_scale * self.rng.uniform(0.5, 1.5))
+
+    def login(self) -> bool:
+        response = self.request("POST", "/auth/login", json={"email": self.email, "password": self.password})
+        if response is None:
+            return False
+        self.http.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        return True
+
+    def run(self) -> None:
+        while not self.login():
+            if self.stop.wait(1.0):
+                return
+        scenarios, weights = zip(*SCENARIOS)
+        while not self.stop.is_set():
+            self.rng.choices(scenarios, weights=weights)[0](self)
+            self.think(3.0)
+
+
+# --- Sessions ---
+
+def log_meal(vu: VirtualUser) -> None:
+    vu.request("GET", "/dashboard/bundle")
+    vu.think(2.0)
+
+    term = vu.rng.choice(SEARCH_TERMS)
+    results = []
+    for length in range(2, min(len(term), 6) + 1):  # search as you type
+        response = vu.request("GET", "/food/search", params={"q": term[:length], "limit": 10})
+        results = response.json()["results"] if response is not None else results
+        vu.think(0.25)
+    vu.think(1.5)
+
+    pick = vu.rng.choice(results) if results else {"food_name": term.title(), "calories": 200.0}
+    vu.request("POST", "/food/entries", json={
+        "food_name": pick["food_name"],
+        "brand_name": pick.get("brand_name"),
+        "calories": pick["calories"],
+        "protein_g": pick.get("protein_g", 0),
+        "carbs_g": pick.get("carbs_g", 0),
+        "fat_g": pick.get("fat_g", 0),
+        "meal_type": vu.rng.choice(MEAL_TYPES),
+        "entry_date": time.strftime("%Y-%m-%d"),
+        "food_master_id": pick.get("id"),
+    })
+    vu.think(1.0)
+    vu.request("GET", "/dashboard/summary")
+
+
+def quick_check(vu: VirtualUser) -> None:
+    vu.request("GET", "/dashboard/summary")
+    vu.think(1.0)
+    vu.request("GET", "/dashboard/streak")
+
+
+def browse_history(vu: VirtualUser) -> None:
+    response = vu.request("GET", "/food/entries", params={"limit": 50})
+    vu.think(2.0)
+    if response is not None and response.headers.get("X-Next-Cursor"):
+        vu.request("GET", "/food/entries", params={"limit": 50, "cursor": response.headers["X-Next-Cursor"]})
+        vu.think(2.0)
+    vu.request("GET", "/dashboard/progress/calories", params={"days": vu.rng.choice((30, 90, 365))})
+    vu.think(2.0)
+    vu.request("GET", "/dashboard/analytics", params={"days": 90})
+
+
+SCENARIOS: List[Tuple[Callable[[VirtualUser], None], float]] = [
+    (log_meal, 0.5),
+    (quick_check, 0.3),
+    (browse_history, 0.2),
+]
+
+
+# --- Open Food Facts stand-in ---
+
+class _UpstreamHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        if url.path == "/cgi/search.pl":
+            query = parse_qs(url.query)
+            term = query.get("search_terms", ["food"])[0]
+            size = int(query.get("page_size", ["5"])[0])
+            body = {"products": [
+                {
+                    "code": f"{abs(hash((term, i))) % 10 ** 12:012d}",
+                    "product_name": f"{term.title()} Product {i}",
+                    "brands": "Stand-in Foods",
+                    "serving_quantity": 100,
+                    "nutriments": {"energy-kcal_100g": 120 + i * 15, "proteins_100g": 8, "carbohydrates_100g": 14,
+                                   "fat_100g": 4, "fiber_100g": 1, "sugars_100g": 3, "sodium_100g": 0.2},
+                }
+                for i in range(min(size, 5))
+            ]}
+        else:
+            body = {"status": 0}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_upstream_stand_in(latency_ms: float) -> ThreadingHTTPServer:
+    handler = type("UpstreamHandler", (_UpstreamHandler,), {"latency": latency_ms / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, name="upstream-stand-in", daemon=True).start()
+    return server
+
+
+def start_api(upstream_url: str) -> Tuple[subprocess.Popen, str]:
+    """Start one uvicorn worker on a free port and wait until it answers."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    env = {**os.environ, "OPENFOODFACTS_URL": upstream_url, "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING")}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", "1",
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        try:
+            requests.get(f"{base_url}/health/live", timeout=1)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("API server did not start within 60 s")
+
+
+# --- Reporting ---
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    index = max(0, min(len(sorted_samples) - 1, int(round(fraction * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[index]
+
+
+def report(recorder: Recorder, users: int, seconds: float, slos: Dict[str, Dict[str, float]]) -> bool:
+    """Print the step's results; returns whether every endpoint met its SLO."""
+    total = sum(len(samples) for samples in recorder.samples.values())
+    print(f"\n{users} users, {seconds:.0f} s: {total} requests ({total / seconds:.1f} req/s)")
+    if not total:
+        print("  ❌ No requests completed (can the users log in?)")
+        return False
+    print(f"  {'endpoint':34} {'count':>6} {'err%':>6} {'req/s':>7} {'p50':>7} {'p95':>7} {'p99':>7}  SLO p95/p99")
+
+    passed = True
+    for endpoint in sorted(recorder.samples):
+        samples = sorted(recorder.samples[endpoint])
+        errors = recorder.errors.get(endpoint, 0)
+        p50, p95, p99 = (percentile(samples, fraction) * 1000 for fraction in (0.5, 0.95, 0.99))
+        slo = slos.get(endpoint, {})
+        ok = (errors / len(samples) <= MAX_ERROR_RATE
+              and p95 <= slo.get("p95_ms", float("inf")) and p99 <= slo.get("p99_ms", float("inf")))
+        passed = passed and ok
+        target = f"{slo.get('p95_ms', '-')}/{slo.get('p99_ms', '-')}" if slo else "-"
+        print(f"  {endpoint:34} {len(samples):6} {errors / len(samples) * 100:6.1f} {len(samples) / seconds:7.1f} "
+              f"{p50:7.0f} {p95:7.0f} {p99:7.0f}  {target:11} {'✅' if ok else '❌'}")
+    return passed
+
+
+def run_step(base_url: str, users: int, args, recorder: Recorder) -> bool:
+    stop = threading.Event()
+    threads = []
+    for index in range(users):
+        vu = VirtualUser(
+            base_url, f"{args.email_prefix}-{index % args.dataset_users + 1}@{EMAIL_DOMAIN}", args.password,
+            recorder, stop, args.think_scale, seed=args.seed * 100003 + index
+        )
+        thread = threading.Thread(target=vu.run, name=f"vu-{index}", daemon=True)
+        thread.start()
+        threads.append(thread)
+        time.sleep(args.ramp_up / max(users, 1))
+
+    recorder.reset()
+    recorder.recording = False
+    time.sleep(args.warmup)
+    recorder.reset()
+    recorder.recording = True
+    started = time.monotonic()
+    time.sleep(args.duration)
+    recorder.recording = False
+    elapsed = time.monotonic() - started
+
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+    return report(recorder, users, elapsed, args.slos)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API against per-endpoint latency SLOs.")
+    parser.add_argument("--users", default="10", help="concurrent virtual users; a comma-separated list runs steps (default 10)")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds per step (default 60)")
+    parser.add_argument("--warmup", type=float, default=10, help="unmeasured seconds before each step (default 10)")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds over which users start (default 5)")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="multiplier for think times (0: none)")
+    parser.add_argument("--url", help="test this running server instead of starting one")
+    parser.add_argument("--upstream-latency-ms", type=float, default=150, help="Open Food Facts stand-in latency")
+    parser.add_argument("--email-prefix", default="bench", help="perf.dataset --email-prefix of the users")
+    parser.add_argument("--dataset-users", type=int, default=1000, help="how many dataset users to log in as")
+    parser.add_argument("--password", default=SYNTHETIC_PASSWORD, help="user password (default: perf.dataset's)")
+    parser.add_argument("--slo-file", help="JSON file overriding SLO thresholds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    args.slos = {endpoint: dict(slo) for endpoint, slo in SLOS.items()}
+    if args.slo_file:
+        with open(args.slo_file) as slo_file:
+            for endpoint, overrides in json.load(slo_file).items():
+                args.slos.setdefault(endpoint, {}).update(overrides)
+    steps = [int(users) for users in args.users.split(",")]
+
+    upstream, server = None, None
+    base_url = args.url
+    if base_url is None:
+        upstream = start_upstream_stand_in(args.upstream_latency_ms)
+        server, base_url = start_api(f"http://127.0.0.1:{upstream.server_address[1]}")
+        print(f"Started API at {base_url} (Open Food Facts stand-in: {args.upstream_latency_ms:.0f} ms)")
+
+    try:
+        results = [(users, run_step(base_url, users, args, Recorder())) for users in steps]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if upstream is not None:
+            upstream.shutdown()
+
+    within = [users for users, passed in results if passed]
+    print()
+    if all(passed for _, passed in results):
+        print(f"✅ All steps met the SLOs (up to {steps[-1]} users).")
+        return 0
+    print(f"❌ SLOs missed at {', '.join(str(users) for users, passed in results if not passed)} users"
+          + (f"; largest passing step: {max(within)} users." if within else "."))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,492 @@
+"""
+Micro-Benchmarks
+Times the CPU-bound hot paths of food search and the dashboard on fixed,
+in-memory fixtures: parsing Open Food Facts / USDA / Nutritionix payloads,
+the external-result dedup in FoodAggregator._search_external,
+_food_master_to_dict, the mock catalog scans, and the dashboard
+aggregation helpers (daily progress series, trend analytics):
+
+    python -m perf.microbench                    # run all, print medians
+    python -m perf.microbench -k parse           # only names containing "parse"
+    python -m perf.microbench --save             # store results as the baseline
+    python -m perf.microbench --compare          # compare against the baseline
+
+Each benchmark is timed for --rounds rounds (after calibrating how many
+calls fill a round) with the garbage collector off; rounds alternate
+between benchmarks so all of them see the same machine conditions. --compare runs the
+suite again and flags a benchmark as regressed when its round timings
+are slower than the baseline's by more than --threshold in the median
+AND the difference is significant (two-sided Mann-Whitney U test, p below
+--alpha). It exits non-zero if anything regressed.
+
+The baseline (perf/baselines/microbench.json) records the machine it was
+taken on; timings are only comparable on the same machine, so re-save it
+there before comparing an optimization against it.
+
+Database access is replaced by canned query results, so no database is
+needed and only the Python work after the query is measured.
+"""
+
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "microbench.json")
+
+# name -> setup function returning the zero-argument callable to time
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+SEED = 20240101
+
+
+def benchmark(name: str):
+    """Register a setup function; it builds fixtures and returns what to time."""
+    def register(setup: Callable[[], Callable[[], object]]):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# --- Fixtures ---
+
+def off_products(count: int = 50) -> List[dict]:
+    """Open Food Facts search products: complete, sparse, and malformed ones."""
+    rng = random.Random(SEED)
+    products = []
+    for i in range(count):
+        product = {
+            "code": f"{rng.randrange(10 ** 12):013d}",
+            "product_name": f"Product {i} {rng.choice(('Yogurt', 'Granola', 'Chicken Wrap', 'Oat Bar'))}",
+            "brands": rng.choice(("Acme", "Green Valley", None)),
+            "nutriments": {
+                "energy-kcal_100g": rng.uniform(40, 550),
+                "proteins_100g": rng.uniform(0, 30),
+                "carbohydrates_100g": rng.uniform(0, 80),
+                "fat_100g": rng.uniform(0, 35),
+                "fiber_100g": rng.uniform(0, 10),
+                "sugars_100g": rng.uniform(0, 40),
+                "sodium_100g": rng.uniform(0, 1.5),
+            },
+            "image_url": f"https://images.example.com/{i}.jpg",
+            "nutrition_grade_fr": rng.choice("abcde"),
+        }
+        if i % 3:
+            product["serving_quantity"] = rng.choice((30, 40, 125, 250))
+            product["serving_quantity_unit"] = rng.choice(("g", "ml", "piece"))
+        if i % 4 == 0:
+            product["categories"] = "Dairies,Fermented foods,Yogurts"
+        if i % 10 == 9:
+            product["serving_quantity"] = "one cup"  # unparseable, skipped
+        if i % 7 == 6:
+            del product["nutriments"]["sodium_100g"]
+        products.append(product)
+    return products
+
+
+USDA_NUTRIENTS = (
+    "Energy", "Protein", "Carbohydrate, by difference", "Total lipid (fat)", "Fiber, total dietary",
+    "Sugars, total including NLEA", "Sodium, Na", "Calcium, Ca", "Iron, Fe", "Potassium, K",
+    "Vitamin C, total ascorbic acid", "Vitamin A, IU", "Cholesterol", "Fatty acids, total saturated",
+    "Fatty acids, total trans", "Magnesium, Mg", "Zinc, Zn", "Vitamin D (D2 + D3)", "Water", "Caffeine",
+)
+
+
+def usda_response(count: int = 50) -> dict:
+    rng = random.Random(SEED + 1)
+    return {"foods": [
+        {
+            "fdcId": 170000 + i,
+            "description": f"Food {i}, raw",
+            "brandOwner": rng.choice((None, "Farm Co")),
+            "gtinUpc": f"{rng.randrange(10 ** 11):012d}" if i % 2 else None,
+            "foodNutrients": [
+                {"nutrientName": name, "unitName": "G", "value": round(rng.uniform(0, 100), 2)}
+                for name in USDA_NUTRIENTS
+            ],
+        }
+        for i in range(count)
+    ]}
+
+
+def nutritionix_response(count: int = 50) -> dict:
+    rng = random.Random(SEED + 2)
+    return {"foods": [
+        {
+            "food_name": f"food {i}", "brand_name": rng.choice((None, "Chain Diner")),
+            "serving_qty": 1, "serving_unit": "serving", "serving_weight_grams": rng.uniform(30, 400),
+            "nf_calories": rng.uniform(50, 900), "nf_protein": rng.uniform(0, 50),
+            "nf_total_carbohydrate": rng.uniform(0, 100), "nf_total_fat": rng.uniform(0, 50),
+            "nf_dietary_fiber": rng.uniform(0, 10), "nf_sugars": rng.uniform(0, 40),
+            "nf_sodium": rng.uniform(0, 2000), "upc": None,
+        }
+        for i in range(count)
+    ]}
+
+
+class _FixedSource:
+    """Stands in for an external food API client, returning fixed results."""
+
+    def __init__(self, results: List[dict]):
+        self.results = results
+
+    def search_food(self, query: str, limit: int = 10) -> List[dict]:
+        return self.results[:limit]
+
+
+class _CannedQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *criteria):
+        return self
+
+    def group_by(self, *columns):
+        return self
+
+    def order_by(self, *columns):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class _CannedSession:
+    """
+    Session whose queries return the given result sets, one per query()
+    call in order, starting over after the last (one set per query the
+    timed function makes).
+    """
+
+    def __init__(self, *results):
+        self.results = results
+        self.calls = 0
+
+    def query(self, *entities):
+        rows = self.results[self.calls % len(self.results)]
+        self.calls += 1
+        return _CannedQuery(rows)
+
+
+def _user():
+    from models import User
+    return User(id=1, target_calories=2200, target_protein_g=150.0, target_carbs_g=220.0,
+                target_fat_g=70.0, goal_weight_kg=78.0)
+
+
+def _logged_days(days: int, share: float, seed: int) -> List[date]:
+    rng = random.Random(seed)
+    today = date.today()
+    return [today - timedelta(days=offset) for offset in range(days) if rng.random() < share]
+
+
+CalorieRow = namedtuple("CalorieRow", "entry_date total_calories")
+BurnedRow = namedtuple("BurnedRow", "entry_date total_burned")
+MacroRow = namedtuple("MacroRow", "entry_date total_protein total_carbs total_fat")
+TotalRow = namedtuple("TotalRow", "entry_date total")
+WeightRow = namedtuple("WeightRow", "log_date weight_kg")
+
+
+# --- Benchmarks ---
+
+@benchmark("openfoodfacts._parse_single_product x50")
+def bench_off_parse():
+    from services.openfoodfacts_service import OpenFoodFactsService
+    service, products = OpenFoodFactsService(), off_products()
+    parse = service._parse_single_product
+    return lambda: [parse(product) for product in products]
+
+
+@benchmark("usda._parse_usda_response x50")
+def bench_usda_parse():
+    from services.usda_service import USDAService
+    service, data = USDAService(), usda_response()
+    return lambda: service._parse_usda_response(data)
+
+
+@benchmark("nutritionix._parse_nutritionix_response x50")
+def bench_nutritionix_parse():
+    from services.nutritionix_service import NutritionixService
+    service, data = NutritionixService(), nutritionix_response()
+    return lambda: service._parse_nutritionix_response(data)
+
+
+@benchmark("aggregator._search_external dedup 2x25")
+def bench_search_external():
+    from services.food_aggregator import FoodAggregator
+    from services.openfoodfacts_service import OpenFoodFactsService
+    from services.usda_service import USDAService
+    off = OpenFoodFactsService()._parse_openfoodfacts_response({"products": off_products(25)})
+    usda = USDAService()._parse_usda_response(usda_response(25))
+    # A third of USDA's results repeat Open Food Facts names (case differs)
+    for index in range(0, len(usda), 3):
+        usda[index] = dict(usda[index], food_name=off[index % len(off)]["food_name"].upper(),
+                           brand_name=off[index % len(off)]["brand_name"])
+    aggregator = FoodAggregator(db=None)
+    aggregator.openfoodfacts, aggregator.usda = _FixedSource(off), _FixedSource(usda)
+    return lambda: aggregator._search_external("benchmark", 50)
+
+
+@benchmark("aggregator._food_master_to_dict x100")
+def bench_food_master_to_dict():
+    from models import FoodMaster
+    from services.food_aggregator import FoodAggregator
+    from services.openfoodfacts_service import OpenFoodFactsService
+    parsed = OpenFoodFactsService()._parse_openfoodfacts_response({"products": off_products(100)})
+    foods = [
+        FoodMaster(id=index, **{key: value for key, value in food.items()
+                                if key not in ("image_url", "nutrition_grade", "categories")})
+        for index, food in enumerate(parsed)
+    ]
+    to_dict = FoodAggregator(db=None)._food_master_to_dict
+    return lambda: [to_dict(food) for food in foods]
+
+
+@benchmark("usda._get_mock_results hit")
+def bench_usda_mock_hit():
+    from services.usda_service import USDAService
+    service = USDAService()
+    return lambda: service._get_mock_results("chicken", 10)
+
+
+@benchmark("usda._get_mock_results miss")
+def bench_usda_mock_miss():
+    from services.usda_service import USDAService
+    service = USDAService()
+    return lambda: service._get_mock_results("dragonfruit smoothie", 10)
+
+
+@benchmark("nutritionix._get_mock_results hit")
+def bench_nutritionix_mock_hit():
+    from services.nutritionix_service import NutritionixService
+    service = NutritionixService()
+    return lambda: service._get_mock_results("chicken", 10)
+
+
+@benchmark("dashboard._build_calorie_progress 90d")
+def bench_calorie_progress():
+    from routers.dashboard import _build_calorie_progress
+    user = _user()
+    food = [CalorieRow(day, 1800.0 + day.day * 10) for day in _logged_days(90, 0.85, SEED + 3)]
+    burned = [BurnedRow(day, 250.0 + day.day) for day in _logged_days(90, 0.4, SEED + 4)]
+    session = _CannedSession(food, burned)
+    return lambda: _build_calorie_progress(user, 90, session)
+
+
+@benchmark("dashboard._build_macro_progress 90d")
+def bench_macro_progress():
+    from routers.dashboard import _build_macro_progress
+    user = _user()
+    macros = [MacroRow(day, 120.0, 210.5, 66.25) for day in _logged_days(90, 0.85, SEED + 5)]
+    session = _CannedSession(macros)
+    return lambda: _build_macro_progress(user, 90, session)
+
+
+@benchmark("trend_analytics.compute_trend_analytics 365d")
+def bench_trend_analytics():
+    from services.trend_analytics import compute_trend_analytics, WARMUP_DAYS
+    user = _user()
+    days = 365 + WARMUP_DAYS
+    intake = [TotalRow(day, 2000.0 + day.day * 7) for day in _logged_days(days, 0.8, SEED + 6)]
+    burned = [TotalRow(day, 300.0) for day in _logged_days(days, 0.4, SEED + 7)]
+    weights = sorted(
+        (WeightRow(day, 80.0 + (date.today() - day).days * 0.02) for day in _logged_days(days, 0.5, SEED + 8)),
+        key=lambda row: row.log_date
+    )
+    session = _CannedSession(intake, burned, weights)
+    return lambda: compute_trend_analytics(user, 365, session)
+
+
+@benchmark("trend_analytics._weight_trend 395d")
+def bench_weight_trend():
+    from services.trend_analytics import _weight_trend
+    rng = np.random.default_rng(SEED)
+    weights = 85 + np.cumsum(rng.normal(-0.02, 0.3, 395))
+    weights[rng.random(395) < 0.5] = np.nan
+    return lambda: _weight_trend(weights)
+
+
+@benchmark("trend_analytics._rolling_mean 395d")
+def bench_rolling_mean():
+    from services.trend_analytics import _rolling_mean
+    rng = np.random.default_rng(SEED + 1)
+    intake = rng.normal(2100, 300, 395)
+    logged = rng.random(395) < 0.8
+    return lambda: (_rolling_mean(intake, logged, 7), _rolling_mean(intake, logged, 30))
+
+
+# --- Timing ---
+
+def calibrate(func: Callable[[], object], min_round_seconds: float) -> int:
+    """Calls per round so that a round lasts at least min_round_seconds."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_seconds:
+            return loops
+        loops = loops * 10 if elapsed < min_round_seconds / 10 else int(loops * min_round_seconds / elapsed) + 1
+
+
+def time_round(func: Callable[[], object], loops: int) -> float:
+    """Per-call time in microseconds over one round, with the garbage collector off."""
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return (time.perf_counter() - started) / loops * 1_000_000
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def mann_whitney_p(a: Sequence[float], b: Sequence[float]) -> float:
+    """
+    Two-sided p-value of the Mann-Whitney U test (normal approximation with
+    tie and continuity correction; fine for the 10+ rounds per side used here).
+    """
+    n1, n2 = len(a), len(b)
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    ranks_a, tie_term, index = 0.0, 0.0, 0
+    while index < len(combined):
+        end = index
+        while end + 1 < len(combined) and combined[end + 1][0] == combined[index][0]:
+            end += 1
+        average_rank = (index + end) / 2 + 1
+        ranks_a += average_rank * sum(1 for _, side in combined[index:end + 1] if side == 0)
+        ties = end - index + 1
+        tie_term += ties ** 3 - ties
+        index = end + 1
+
+    n = n1 + n2
+    u = ranks_a - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "numpy": np.__version__}
+
+
+def run(names: List[str], rounds: int, min_round_seconds: float) -> Dict[str, List[float]]:
+    """
+    Round timings per benchmark. Rounds go round-robin over the benchmarks,
+    so each one's samples span the whole run and slow drifts of the machine
+    show up as spread rather than as a shift of one benchmark.
+    """
+    funcs = {name: BENCHMARKS[name]() for name in names}
+    loops = {name: calibrate(func, min_round_seconds) for name, func in funcs.items()}
+    results: Dict[str, List[float]] = {name: [] for name in names}
+    for _ in range(rounds):
+        for name, func in funcs.items():
+            results[name].append(time_round(func, loops[name]))
+    return results
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path: str, results: Dict[str, List[float]], existing: Optional[dict]) -> None:
+    """Write results into the baseline, keeping other benchmarks' entries when filtered."""
+    benchmarks = dict(existing["benchmarks"]) if existing and existing.get("machine") == machine() else {}
+    for name, samples in results.items():
+        benchmarks[name] = {"median_us": round(statistics.median(samples), 3),
+                            "samples_us": [round(sample, 3) for sample in samples]}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as baseline_file:
+        json.dump({"machine": machine(), "saved_at": datetime.now().isoformat(timespec="seconds"),
+                   "benchmarks": dict(sorted(benchmarks.items()))}, baseline_file, indent=1)
+        baseline_file.write("\n")
+
+
+def compare(results: Dict[str, List[float]], baseline: dict, threshold: float, alpha: float) -> Tuple[int, int]:
+    """Print the comparison; returns (regressions, improvements)."""
+    if baseline.get("machine") != machine():
+        print(f"⚠️  Baseline was taken on a different machine ({baseline.get('machine')}); differences may not mean much.\n")
+
+    regressions = improvements = 0
+    print(f"{'benchmark':48} {'baseline µs':>12} {'now µs':>10} {'change':>8} {'p':>7}")
+    for name, samples in results.items():
+        entry = baseline["benchmarks"].get(name)
+        now = statistics.median(samples)
+        if entry is None:
+            print(f"{name:48} {'-':>12} {now:10.2f}  (no baseline)")
+            continue
+        before = entry["median_us"]
+        change = now / before - 1
+        p_value = mann_whitney_p(samples, entry["samples_us"])
+        verdict = ""
+        if p_value < alpha and change > threshold:
+            verdict, regressions = "❌ slower", regressions + 1
+        elif p_value < alpha and change < -threshold:
+            verdict, improvements = "✅ faster", improvements + 1
+        print(f"{name:48} {before:12.2f} {now:10.2f} {change * 100:+7.1f}% {p_value:7.4f}  {verdict}")
+    return regressions, improvements
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the hot-path micro-benchmarks and compare them against a baseline.")
+    parser.add_argument("-k", dest="filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=20, help="timed rounds per benchmark (default 20)")
+    parser.add_argument("--min-round-ms", type=float, default=20, help="minimum duration of one round (default 20)")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="median change ignored below this (default 0.10)")
+    parser.add_argument("--alpha", type=float, default=0.01, help="significance level (default 0.01)")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.filter or args.filter in name]
+    if not names:
+        print(f"No benchmark matches {args.filter!r}")
+        return 1
+
+    baseline = load_baseline(args.baseline)
+    if args.compare and baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save first.")
+        return 1
+
+    results = run(names, max(2, args.rounds), args.min_round_ms / 1000)
+
+    status = 0
+    if args.compare:
+        regressions, improvements = compare(results, baseline, args.threshold, args.alpha)
+        print(f"\n{regressions} slower, {improvements} faster (threshold {args.threshold:.0%}, alpha {args.alpha})")
+        status = 1 if regressions else 0
+    else:
+        print(f"{'benchmark':48} {'median µs':>10} {'min µs':>10} {'stdev':>8}")
+        for name, samples in results.items():
+            print(f"{name:48} {statistics.median(samples):10.2f} {min(samples):10.2f} {statistics.stdev(samples):8.2f}")
+
+    if args.save:
+        save_baseline(args.baseline, results, baseline)
+        print(f"\nSaved baseline to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
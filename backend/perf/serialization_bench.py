@@ -0,0 +1,141 @@
+"""
+Response Serialization Benchmark
+Measures the CPU time spent turning endpoint results into response bodies,
+per request, on FastAPI's default path (response_model validation,
+jsonable dump, json.dumps) and on the fast path (utils/fast_json.py), and
+checks that both produce byte-identical JSON:
+
+    python -m perf.serialization_bench
+    python -m perf.serialization_bench --rows 500 --iterations 100
+
+Rows are built in memory, so no database is needed and the numbers only
+cover serialization. The default path is run through FastAPI's own
+serialize_response with each route's response field, as a request would.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from starlette.responses import Response
+
+
+def _route(router, path: str) -> APIRoute:
+    for route in router.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route
+    raise LookupError(path)
+
+
+def _food_entries(count: int) -> list:
+    from models import FoodEntry
+    today = date.today()
+    return [
+        FoodEntry(
+            id=i, user_id=1, food_name=f"Food {i}", brand_name=None if i % 3 else "Brand",
+            calories=120.5 + i, protein_g=10.0, carbs_g=15.25, fat_g=3.0, quantity=1.0, unit="serving",
+            meal_type="lunch", entry_date=today - timedelta(days=i // 4), food_master_id=None,
+            created_at=datetime(2025, 1, 1, 12, 0, 0, 123456)
+        )
+        for i in range(count)
+    ]
+
+
+def _weight_logs(count: int) -> list:
+    from models import WeightLog
+    today = date.today()
+    return [
+        WeightLog(id=i, user_id=1, weight_kg=80.0 - i * 0.05, log_date=today - timedelta(days=i),
+                  notes=None, created_at=datetime(2025, 1, 1, 7, 30))
+        for i in range(count)
+    ]
+
+
+def _calorie_progress(count: int) -> dict:
+    today = date.today()
+    return {
+        "data": [
+            {"date": str(today - timedelta(days=i)), "calories_consumed": 1800.0 + i, "calories_burned": 300.0,
+             "net_calories": 1500.0 + i, "target_calories": 2000}
+            for i in range(count)
+        ],
+        "resolution": "daily"
+    }
+
+
+def scenarios(rows: int) -> List[Tuple[str, Callable, Callable]]:
+    """(name, default path, fast path); each returns the response body."""
+    from routers.food import router as food_router, FOOD_ENTRY_JSON
+    from routers.dashboard import router as dashboard_router, WEIGHT_LOG_JSON
+    from utils.fast_json import fast_response
+
+    loop = asyncio.new_event_loop()
+
+    def default_path(route: APIRoute, content):
+        if route.response_field is None:
+            return JSONResponse(jsonable_encoder(content)).body
+        serialized = loop.run_until_complete(serialize_response(field=route.response_field, response_content=content))
+        return JSONResponse(serialized).body
+
+    def fast_path(content, serializer=None):
+        return fast_response(content, Response(), serializer).body
+
+    food_route = _route(food_router, "/food/entries")
+    weight_route = _route(dashboard_router, "/dashboard/weight")
+    progress_route = _route(dashboard_router, "/dashboard/progress/calories")
+    entries, weights, progress = _food_entries(rows), _weight_logs(rows), _calorie_progress(rows)
+
+    return [
+        (f"GET /food/entries ({rows} rows)",
+         lambda: default_path(food_route, entries), lambda: fast_path(entries, FOOD_ENTRY_JSON)),
+        (f"GET /dashboard/weight ({rows} rows)",
+         lambda: default_path(weight_route, weights), lambda: fast_path(weights, WEIGHT_LOG_JSON)),
+        (f"GET /dashboard/progress/calories ({rows} days)",
+         lambda: default_path(progress_route, progress), lambda: fast_path(progress)),
+    ]
+
+
+def cpu_per_call_us(func: Callable, iterations: int, repeats: int) -> float:
+    """Median CPU time per call, in microseconds."""
+    timings = []
+    for _ in range(repeats):
+        started = time.process_time()
+        for _ in range(iterations):
+            func()
+        timings.append((time.process_time() - started) / iterations * 1_000_000)
+    return statistics.median(timings)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare default and fast response serialization.")
+    parser.add_argument("--rows", type=int, default=100, help="rows per response (default 100)")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per timing (default 200)")
+    parser.add_argument("--repeats", type=int, default=5, help="timings to take the median of")
+    args = parser.parse_args(argv)
+
+    import utils.fast_json
+    utils.fast_json.FAST_JSON = True
+
+    mismatched = False
+    print(f"{'response':45} {'default µs':>11} {'fast µs':>9} {'speedup':>8}")
+    for name, default, fast in scenarios(args.rows):
+        if default() != fast():
+            print(f"❌ {name}: fast path output differs from the default path")
+            mismatched = True
+            continue
+        default_us = cpu_per_call_us(default, args.iterations, args.repeats)
+        fast_us = cpu_per_call_us(fast, args.iterations, args.repeats)
+        print(f"{name:45} {default_us:11.0f} {fast_us:9.0f} {default_us / fast_us:7.1f}x")
+
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,5 +4,9 @@ from .users import router as users_router
 from .food import router as food_router
 from .exercise import router as exercise_router
 from .dashboard import router as dashboard_router
+from .sync import router as sync_router
 
 
+from .health import router as health_router
+from .metrics import router as metrics_router
+from .admin import router as admin_router
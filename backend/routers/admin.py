@@ -0,0 +1,150 @@
+"""
+Admin Router
+Operator endpoints, authorized by the X-Admin-Token header (ADMIN_TOKEN)
+and left out of the API docs. Profiles come from utils/profiling.py,
+memory diagnostics from utils/memory.py, scheduled jobs from
+utils/scheduler.py.
+"""
+
+import gc
+import tracemalloc
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from utils import memory
+from utils.auth import require_admin
+from utils.fast_json import FastJSONResponse
+from utils.profiling import list_profiles, get_profile, collapsed_stacks
+from utils.scheduler import list_jobs, is_leader
+
+router = APIRouter(prefix="/admin", tags=["Admin"], include_in_schema=False, dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles", response_class=FastJSONResponse)
+def get_profiles():
+    """
+    Stored request profiles, newest first.
+    """
+    return {"profiles": list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$",
+                        description="speedscope JSON, or collapsed stacks for flamegraph.pl")
+):
+    """
+    One profile: open the speedscope JSON at https://www.speedscope.app, or
+    render the collapsed stacks with flamegraph.pl.
+    """
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+
+    if format == "collapsed":
+        return Response(content=collapsed_stacks(profile), media_type="text/plain; charset=utf-8")
+    return FastJSONResponse(profile, headers={
+        "Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'
+    })
+
+
+GROUP_BY_PATTERN = "^(" + "|".join(memory.GROUP_BY) + ")$"
+
+
+def _require_tracing() -> None:
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="tracemalloc is not tracing; POST /admin/memory/tracing first")
+
+
+def _stored_snapshot(snapshot_id: str):
+    snapshot = memory.get_snapshot(snapshot_id)
+    if snapshot is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found")
+    return snapshot
+
+
+@router.get("/memory", response_class=FastJSONResponse)
+def memory_status():
+    """
+    RSS, garbage collector state, tracemalloc status and stored snapshots.
+    """
+    return memory.status()
+
+
+@router.post("/memory/tracing", response_class=FastJSONResponse)
+def start_memory_tracing(frames: int = Query(10, ge=1, le=100, description="Frames stored per allocation")):
+    """
+    Start tracing allocations with tracemalloc.
+    """
+    memory.start_tracing(frames)
+    return memory.status()["tracemalloc"]
+
+
+@router.delete("/memory/tracing", status_code=status.HTTP_204_NO_CONTENT)
+def stop_memory_tracing():
+    """
+    Stop tracing and drop the stored snapshots.
+    """
+    memory.stop_tracing()
+
+
+@router.post("/memory/gc", response_class=FastJSONResponse)
+def collect_garbage():
+    """
+    Run a full collection, e.g. before a snapshot so garbage isn't counted as growth.
+    """
+    before = memory.memory_usage()["rss_bytes"]
+    collected = gc.collect()
+    return {"collected": collected, "rss_before_bytes": before, "rss_after_bytes": memory.memory_usage()["rss_bytes"]}
+
+
+@router.post("/memory/snapshots", response_class=FastJSONResponse)
+def take_memory_snapshot(
+    group_by: str = Query("module", pattern=GROUP_BY_PATTERN),
+    limit: int = Query(10, ge=1, le=200)
+):
+    """
+    Snapshot the traced allocations; returns its id and top allocation sites.
+    """
+    _require_tracing()
+    snapshot_id = memory.take_snapshot()
+    return {"id": snapshot_id, **memory.top_allocations(memory.get_snapshot(snapshot_id), group_by, limit)}
+
+
+@router.get("/memory/snapshots/{snapshot_id}", response_class=FastJSONResponse)
+def get_memory_snapshot(
+    snapshot_id: str,
+    group_by: str = Query("module", pattern=GROUP_BY_PATTERN),
+    limit: int = Query(25, ge=1, le=200)
+):
+    """
+    Top allocation sites of a stored snapshot.
+    """
+    return {"id": snapshot_id, **memory.top_allocations(_stored_snapshot(snapshot_id), group_by, limit)}
+
+
+@router.get("/memory/diff", response_class=FastJSONResponse)
+def diff_memory_snapshots(
+    base: str = Query(..., description="Id of the earlier snapshot"),
+    current: Optional[str] = Query(None, description="Id of the later snapshot (default: take one now)"),
+    group_by: str = Query("module", pattern=GROUP_BY_PATTERN),
+    limit: int = Query(25, ge=1, le=200)
+):
+    """
+    Allocation sites that grew or shrank the most between two snapshots.
+    """
+    base_snapshot = _stored_snapshot(base)
+    if current is None:
+        _require_tracing()
+        current = memory.take_snapshot()
+    return {"base": base, "current": current,
+            **memory.diff_allocations(base_snapshot, _stored_snapshot(current), group_by, limit)}
+
+
+@router.get("/jobs", response_class=FastJSONResponse)
+def get_jobs():
+    """
+    Scheduled maintenance jobs as seen by this worker; leader-only jobs
+    report their runs on the leader.
+    """
+    return {"leader": is_leader(), "jobs": list_jobs()}
@@ -1,20 +1,28 @@
 """
 Authentication Router
 Handles user registration and login with JWT tokens.
+
+Password hashing runs in a dedicated process pool (utils.password_pool);
+database work runs in the threadpool so the event loop is never blocked.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from schemas.user_schemas import UserRegister, UserLogin, Token, UserResponse
 from models import User, Streak
 from utils.auth import get_db
-from utils.security import get_password_hash, verify_password, create_access_token
+from utils.security import create_access_token
+from utils.profiling import ProfiledRoute
+from utils.password_pool import (
+    PasswordPoolSaturated, PASSWORD_POOL_RETRY_AFTER, hash_password_async, verify_password_async
+)
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=ProfiledRoute)
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """
     Register a new user account.
     
@@ -23,35 +31,20 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     - Returns the created user data
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(_find_user_by_email, user_data.email, db)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    new_user = User(
-        email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
-        first_name=user_data.first_name,
-        last_name=user_data.last_name
-    )
-    
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    # Initialize streak for the new user
-    streak = Streak(user_id=new_user.id, current_streak=0, longest_streak=0)
-    db.add(streak)
-    db.commit()
+    hashed_password = await _in_password_pool(hash_password_async(user_data.password))
     
-    return new_user
+    return await run_in_threadpool(_create_user, user_data, hashed_password, db)
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """
     Authenticate user and return JWT access token.
     
@@ -59,9 +52,9 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     - Returns JWT token for authenticated requests
     """
     # Find user by email
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await run_in_threadpool(_find_user_by_email, credentials.email, db)
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user or not await _in_password_pool(verify_password_async(credentials.password, user.hashed_password)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -74,3 +67,43 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+async def _in_password_pool(job):
+    """
+    Await a password pool job, turning saturation into 503 Service Unavailable.
+    """
+    try:
+        return await job
+    except PasswordPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is busy, please retry shortly",
+            headers={"Retry-After": str(PASSWORD_POOL_RETRY_AFTER)},
+        )
+
+
+def _find_user_by_email(email: str, db: Session):
+    return db.query(User).filter(User.email == email).first()
+
+
+def _create_user(user_data: UserRegister, hashed_password: str, db: Session) -> User:
+    """
+    Insert the user and their streak record.
+    """
+    new_user = User(
+        email=user_data.email,
+        hashed_password=hashed_password,
+        first_name=user_data.first_name,
+        last_name=user_data.last_name
+    )
+    
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    
+    # Initialize streak for the new user
+    streak = Streak(user_id=new_user.id, current_streak=0, longest_streak=0)
+    db.add(streak)
+    db.commit()
+    db.refresh(new_user)
+    
+    return new_user
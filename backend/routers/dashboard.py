@@ -3,24 +3,46 @@ Dashboard Router
 Provides daily summaries, progress data, streaks, and analytics.
 """
 
-from fastapi import APIRouter, Depends, Query
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 from datetime import date, datetime, timedelta
 from schemas.food_schemas import DailyNutritionSummary
 from schemas.streak_schemas import StreakResponse, WeightLogCreate, WeightLogResponse
+from schemas.analytics_schemas import TrendAnalyticsResponse
 from models import User, FoodEntry, ExerciseEntry, Streak, WeightLog
-from utils.auth import get_db, get_current_user
+from database import AsyncSessionLocal
+from utils.auth import get_db, get_async_db, get_read_db, get_async_read_db, get_current_user, get_current_principal, get_current_principal_async
+from utils.principal_cache import UserPrincipal
+from utils.etag import bump_data_version, check_not_modified, check_not_modified_async
+from services.rollups import DAILY_MAX_DAYS, ROLLUP_MODELS, pick_resolution, period_start, next_period_start
+from services.analytics import get_user_analytics, invalidate_user_analytics
+from utils.fast_json import RowSerializer, fast_response
+from utils.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"], route_class=ProfiledRoute)
+
+# Bundle sections run at most this many at a time, each holding one pooled connection
+BUNDLE_SECTION_CONCURRENCY = 2
+
+SUMMARY_JSON = RowSerializer(DailyNutritionSummary)
+STREAK_JSON = RowSerializer(StreakResponse)
+WEIGHT_LOG_JSON = RowSerializer(WeightLogResponse)
+
+# Read endpoints use async (asyncpg) sessions and run the shared query helpers
+# below through AsyncSession.run_sync, so they don't occupy threadpool slots.
 
 
 @router.get("/summary", response_model=DailyNutritionSummary)
-def get_daily_summary(
+async def get_daily_summary(
+    request: Request,
+    response: Response,
     summary_date: date = Query(default=None, description="Date for summary (defaults to today)"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get daily nutrition summary including:
@@ -30,12 +52,262 @@ def get_daily_summary(
     - Calories remaining (Target - Consumed + Burned)
     - Progress toward macro goals
     """
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
     if summary_date is None:
         summary_date = date.today()
     
+    summary = await db.run_sync(lambda session: _build_daily_summary(current_user, summary_date, session))
+    return fast_response(summary, response, SUMMARY_JSON)
+
+
+@router.get("/progress/calories")
+async def get_calorie_progress(
+    request: Request,
+    response: Response,
+    days: int = Query(default=7, ge=1, le=3650, description="Number of days to fetch"),
+    resolution: Optional[str] = Query(
+        default=None, pattern="^(daily|weekly|monthly)$",
+        description=f"Bucket size (picked from the range if omitted; daily only up to {DAILY_MAX_DAYS} days)"
+    ),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get calorie intake and burn data over time for progress charts.
+    Short ranges return one point per day; longer ranges are served from the
+    weekly/monthly rollups, with values given as per-day averages.
+    """
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
+    resolution = pick_resolution(days, resolution)
+    if resolution == "daily":
+        data = await db.run_sync(lambda session: _build_calorie_progress(current_user, days, session))
+    else:
+        data = await db.run_sync(lambda session: _build_rollup_calorie_progress(current_user, days, resolution, session))
+    
+    return fast_response({"data": data, "resolution": resolution}, response)
+
+
+@router.get("/progress/macros")
+async def get_macro_progress(
+    request: Request,
+    response: Response,
+    days: int = Query(default=7, ge=1, le=3650, description="Number of days to fetch"),
+    resolution: Optional[str] = Query(
+        default=None, pattern="^(daily|weekly|monthly)$",
+        description=f"Bucket size (picked from the range if omitted; daily only up to {DAILY_MAX_DAYS} days)"
+    ),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get macronutrient data over time for progress tracking.
+    Long ranges are bucketed the same way as calorie progress.
+    """
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
+    resolution = pick_resolution(days, resolution)
+    if resolution == "daily":
+        data = await db.run_sync(lambda session: _build_macro_progress(current_user, days, session))
+    else:
+        data = await db.run_sync(lambda session: _build_rollup_macro_progress(current_user, days, resolution, session))
+    
+    return fast_response({"data": data, "resolution": resolution}, response)
+
+
+@router.get("/streak", response_model=StreakResponse)
+async def get_user_streak(
+    request: Request,
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the user's current logging streak.
+    """
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
+    return await db.run_sync(lambda session: _get_or_create_streak(current_user.id, session))
+
+
+@router.post("/weight", response_model=WeightLogResponse)
+def log_weight(
+    weight_data: WeightLogCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Log a weight entry.
+    """
+    weight_log = WeightLog(
+        user_id=current_user.id,
+        weight_kg=weight_data.weight_kg,
+        log_date=weight_data.log_date,
+        notes=weight_data.notes
+    )
+    
+    db.add(weight_log)
+    
+    # Also update current weight in user profile if logging for today
+    if weight_data.log_date == date.today():
+        current_user.current_weight_kg = weight_data.weight_kg
+    
+    bump_data_version(db, current_user.id)
+    db.commit()
+    db.refresh(weight_log)
+    invalidate_user_analytics(current_user.id)
+    
+    return weight_log
+
+
+@router.delete("/weight/{log_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_weight_log(
+    log_id: int,
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Delete a weight log entry.
+    """
+    weight_log = db.query(WeightLog).filter(
+        WeightLog.id == log_id,
+        WeightLog.user_id == current_user.id
+    ).first()
+    
+    if not weight_log:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Weight log not found"
+        )
+    
+    db.delete(weight_log)
+    bump_data_version(db, current_user.id)
+    db.commit()
+    invalidate_user_analytics(current_user.id)
+    
+    return None
+
+
+@router.get("/weight", response_model=List[WeightLogResponse])
+async def get_weight_logs(
+    request: Request,
+    response: Response,
+    days: int = Query(default=30, ge=1, le=365, description="Number of days to fetch"),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get weight log history for progress tracking.
+    """
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
+    weight_logs = await db.run_sync(lambda session: _fetch_weight_logs(current_user.id, days, session))
+    return fast_response(weight_logs, response, WEIGHT_LOG_JSON)
+
+
+@router.get("/analytics", response_model=TrendAnalyticsResponse)
+def get_trend_analytics(
+    request: Request,
+    response: Response,
+    days: int = Query(default=90, ge=7, le=730, description="Number of days to analyze"),
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get trend analytics for progress tracking:
+    - Smoothed weight trend and weekly rate of change
+    - Rolling 7 and 30 day intake averages
+    - Estimated TDEE from energy balance
+    - Adherence to the calorie target
+    - Projected date for reaching the goal weight
+    """
+    not_modified = check_not_modified(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
+    return get_user_analytics(current_user, days, db, request.state.data_version)
+
+
+@router.get("/bundle")
+async def get_dashboard_bundle(
+    request: Request,
+    response: Response,
+    summary_date: date = Query(default=None, description="Date for summary (defaults to today)"),
+    progress_days: int = Query(default=7, ge=1, le=90, description="Days of calorie/macro progress"),
+    weight_days: int = Query(default=30, ge=1, le=365, description="Days of weight history"),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get everything the Dashboard page needs in a single round trip:
+    summary, streak, calorie progress, macro progress and weight history.
+    
+    The user is loaded once; the five sections then run concurrently,
+    up to BUNDLE_SECTION_CONCURRENCY at a time, each on its own async
+    database session.
+    """
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    # Release the ETag check's connection before the sections take theirs
+    await db.close()
+    
+    if summary_date is None:
+        summary_date = date.today()
+    
+    limit = asyncio.Semaphore(BUNDLE_SECTION_CONCURRENCY)
+    summary, streak, calories, macros, weights = await asyncio.gather(
+        _run_in_session(limit, _build_daily_summary, current_user, summary_date),
+        _run_in_session(limit, _get_or_create_streak, current_user.id, serializer=STREAK_JSON),
+        _run_in_session(limit, _build_calorie_progress, current_user, progress_days),
+        _run_in_session(limit, _build_macro_progress, current_user, progress_days),
+        _run_in_session(limit, _fetch_weight_logs, current_user.id, weight_days, serializer=WEIGHT_LOG_JSON),
+    )
+    
+    return fast_response({
+        "summary": SUMMARY_JSON.one(summary),
+        "streak": streak,
+        "calorie_progress": calories,
+        "macro_progress": macros,
+        "weight_logs": weights
+    }, response)
+
+
+async def _run_in_session(limit: asyncio.Semaphore, func, *args, serializer=None):
+    """
+    Run a dashboard query helper on its own async session, once `limit` admits it.
+    If a serializer is given, ORM results are converted before the session closes.
+    """
+    def task(db: Session):
+        result = func(*args, db)
+        if serializer is None:
+            return result
+        if isinstance(result, list):
+            return serializer.many(result)
+        return serializer.one(result)
+    
+    async with limit, AsyncSessionLocal() as session:
+        return await session.run_sync(task)
+
+
+def _build_daily_summary(user: User, summary_date: date, db: Session) -> dict:
+    """
+    Compute the daily nutrition summary for a user and date.
+    """
     # Get all food entries for the date
     food_entries = db.query(FoodEntry).filter(
-        FoodEntry.user_id == current_user.id,
+        FoodEntry.user_id == user.id,
         FoodEntry.entry_date == summary_date
     ).all()
     
@@ -47,7 +319,7 @@ def get_daily_summary(
     
     # Get exercise calories burned
     exercise_entries = db.query(ExerciseEntry).filter(
-        ExerciseEntry.user_id == current_user.id,
+        ExerciseEntry.user_id == user.id,
         ExerciseEntry.entry_date == summary_date
     ).all()
     
@@ -55,7 +327,7 @@ def get_daily_summary(
     
     # Calculate calories remaining
     # Formula: Target - Consumed + Burned
-    calories_remaining = current_user.target_calories - total_calories + calories_burned
+    calories_remaining = user.target_calories - total_calories + calories_burned
     
     return {
         "date": summary_date,
@@ -65,24 +337,18 @@ def get_daily_summary(
         "total_fat_g": total_fat,
         "calories_burned": calories_burned,
         "calories_remaining": calories_remaining,
-        "target_calories": current_user.target_calories,
-        "target_protein_g": current_user.target_protein_g,
-        "target_carbs_g": current_user.target_carbs_g,
-        "target_fat_g": current_user.target_fat_g,
+        "target_calories": user.target_calories,
+        "target_protein_g": user.target_protein_g,
+        "target_carbs_g": user.target_carbs_g,
+        "target_fat_g": user.target_fat_g,
         "food_entries_count": len(food_entries),
         "exercise_entries_count": len(exercise_entries)
     }
 
 
-@router.get("/progress/calories")
-def get_calorie_progress(
-    days: int = Query(default=7, ge=1, le=90, description="Number of days to fetch"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _build_calorie_progress(user: User, days: int, db: Session) -> List[dict]:
     """
-    Get calorie intake and burn data over time for progress charts.
-    Returns daily data for the specified number of days.
+    Build the daily calorie intake/burn series for the last `days` days.
     """
     end_date = date.today()
     start_date = end_date - timedelta(days=days - 1)
@@ -92,7 +358,7 @@ def get_calorie_progress(
         FoodEntry.entry_date,
         func.sum(FoodEntry.calories).label('total_calories')
     ).filter(
-        FoodEntry.user_id == current_user.id,
+        FoodEntry.user_id == user.id,
         FoodEntry.entry_date >= start_date,
         FoodEntry.entry_date <= end_date
     ).group_by(FoodEntry.entry_date).all()
@@ -102,7 +368,7 @@ def get_calorie_progress(
         ExerciseEntry.entry_date,
         func.sum(ExerciseEntry.calories_burned).label('total_burned')
     ).filter(
-        ExerciseEntry.user_id == current_user.id,
+        ExerciseEntry.user_id == user.id,
         ExerciseEntry.entry_date >= start_date,
         ExerciseEntry.entry_date <= end_date
     ).group_by(ExerciseEntry.entry_date).all()
@@ -125,21 +391,16 @@ def get_calorie_progress(
             "calories_consumed": consumed,
             "calories_burned": burned,
             "net_calories": net,
-            "target_calories": current_user.target_calories
+            "target_calories": user.target_calories
         })
         current_date += timedelta(days=1)
     
-    return {"data": progress_data}
+    return progress_data
 
 
-@router.get("/progress/macros")
-def get_macro_progress(
-    days: int = Query(default=7, ge=1, le=90, description="Number of days to fetch"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _build_macro_progress(user: User, days: int, db: Session) -> List[dict]:
     """
-    Get macronutrient data over time for progress tracking.
+    Build the daily macronutrient series for the last `days` days.
     """
     end_date = date.today()
     start_date = end_date - timedelta(days=days - 1)
@@ -151,7 +412,7 @@ def get_macro_progress(
         func.sum(FoodEntry.carbs_g).label('total_carbs'),
         func.sum(FoodEntry.fat_g).label('total_fat')
     ).filter(
-        FoodEntry.user_id == current_user.id,
+        FoodEntry.user_id == user.id,
         FoodEntry.entry_date >= start_date,
         FoodEntry.entry_date <= end_date
     ).group_by(FoodEntry.entry_date).all()
@@ -178,86 +439,116 @@ def get_macro_progress(
             "protein_g": macros["protein"],
             "carbs_g": macros["carbs"],
             "fat_g": macros["fat"],
-            "target_protein_g": current_user.target_protein_g,
-            "target_carbs_g": current_user.target_carbs_g,
-            "target_fat_g": current_user.target_fat_g
+            "target_protein_g": user.target_protein_g,
+            "target_carbs_g": user.target_carbs_g,
+            "target_fat_g": user.target_fat_g
         })
         current_date += timedelta(days=1)
     
-    return {"data": progress_data}
+    return progress_data
 
 
-@router.get("/streak", response_model=StreakResponse)
-def get_user_streak(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _fetch_rollup_buckets(user: User, days: int, resolution: str, db: Session):
     """
-    Get the user's current logging streak.
+    Load weekly/monthly rollup rows covering the last `days` days.
+    Returns (bucket_start, days_in_bucket, row or None) for every bucket,
+    including empty ones. The current bucket only counts days up to today.
     """
-    streak = db.query(Streak).filter(Streak.user_id == current_user.id).first()
+    model = ROLLUP_MODELS[resolution]
+    end_date = date.today()
+    first_bucket = period_start(resolution, end_date - timedelta(days=days - 1))
+    
+    rows = db.query(model).filter(
+        model.user_id == user.id,
+        model.period_start >= first_bucket,
+        model.period_start <= end_date
+    ).all()
+    rows_by_start = {row.period_start: row for row in rows}
+    
+    buckets = []
+    bucket_start = first_bucket
+    while bucket_start <= end_date:
+        bucket_end = min(next_period_start(resolution, bucket_start), end_date + timedelta(days=1))
+        buckets.append((bucket_start, (bucket_end - bucket_start).days, rows_by_start.get(bucket_start)))
+        bucket_start = next_period_start(resolution, bucket_start)
+    
+    return buckets
+
+
+def _build_rollup_calorie_progress(user: User, days: int, resolution: str, db: Session) -> List[dict]:
+    """
+    Build the calorie series from rollups, as per-day averages for each bucket.
+    """
+    progress_data = []
+    for bucket_start, bucket_days, row in _fetch_rollup_buckets(user, days, resolution, db):
+        consumed = row.calories_consumed / bucket_days if row else 0
+        burned = row.calories_burned / bucket_days if row else 0
+        
+        progress_data.append({
+            "date": str(bucket_start),
+            "calories_consumed": consumed,
+            "calories_burned": burned,
+            "net_calories": consumed - burned,
+            "target_calories": user.target_calories,
+            "days": bucket_days
+        })
+    
+    return progress_data
+
+
+def _build_rollup_macro_progress(user: User, days: int, resolution: str, db: Session) -> List[dict]:
+    """
+    Build the macro series from rollups, as per-day averages for each bucket.
+    """
+    progress_data = []
+    for bucket_start, bucket_days, row in _fetch_rollup_buckets(user, days, resolution, db):
+        progress_data.append({
+            "date": str(bucket_start),
+            "protein_g": row.protein_g / bucket_days if row else 0,
+            "carbs_g": row.carbs_g / bucket_days if row else 0,
+            "fat_g": row.fat_g / bucket_days if row else 0,
+            "target_protein_g": user.target_protein_g,
+            "target_carbs_g": user.target_carbs_g,
+            "target_fat_g": user.target_fat_g,
+            "days": bucket_days
+        })
+    
+    return progress_data
+
+
+def _get_or_create_streak(user_id: int, db: Session) -> Streak:
+    """
+    Load the user's streak, creating an empty one if it doesn't exist.
+    """
+    streak = db.query(Streak).filter(Streak.user_id == user_id).first()
     
     if not streak:
         # Create a new streak record if it doesn't exist
         streak = Streak(
-            user_id=current_user.id,
+            user_id=user_id,
             current_streak=0,
             longest_streak=0,
             last_logged_date=None
         )
         db.add(streak)
+        bump_data_version(db, user_id)
         db.commit()
         db.refresh(streak)
     
     return streak
 
 
-@router.post("/weight", response_model=WeightLogResponse)
-def log_weight(
-    weight_data: WeightLogCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Log a weight entry.
-    """
-    weight_log = WeightLog(
-        user_id=current_user.id,
-        weight_kg=weight_data.weight_kg,
-        log_date=weight_data.log_date,
-        notes=weight_data.notes
-    )
-    
-    db.add(weight_log)
-    
-    # Also update current weight in user profile if logging for today
-    if weight_data.log_date == date.today():
-        current_user.current_weight_kg = weight_data.weight_kg
-    
-    db.commit()
-    db.refresh(weight_log)
-    
-    return weight_log
-
-
-@router.get("/weight", response_model=List[WeightLogResponse])
-def get_weight_logs(
-    days: int = Query(default=30, ge=1, le=365, description="Number of days to fetch"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _fetch_weight_logs(user_id: int, days: int, db: Session) -> List[WeightLog]:
     """
-    Get weight log history for progress tracking.
+    Load weight logs for the last `days` days, oldest first.
     """
     end_date = date.today()
     start_date = end_date - timedelta(days=days - 1)
     
     weight_logs = db.query(WeightLog).filter(
-        WeightLog.user_id == current_user.id,
+        WeightLog.user_id == user_id,
         WeightLog.log_date >= start_date,
         WeightLog.log_date <= end_date
     ).order_by(WeightLog.log_date.asc()).all()
     
     return weight_logs
-
-
@@ -3,24 +3,34 @@ Exercise Router
 Handles exercise logging and CRUD operations.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select
 from typing import List
 from datetime import date
 from schemas.exercise_schemas import (
     ExerciseEntryCreate, ExerciseEntryUpdate, ExerciseEntryResponse
 )
-from models import User, ExerciseEntry
-from utils.auth import get_db, get_current_user
+from models import ExerciseEntry
+from utils.auth import get_db, get_async_db, get_async_read_db, get_current_principal, get_current_principal_async
+from utils.principal_cache import UserPrincipal
+from utils.etag import bump_data_version, check_not_modified_async
+from utils.pagination import paginate_entries, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.fast_json import RowSerializer, fast_response
+from utils.profiling import ProfiledRoute
+from services.rollups import record_exercise_entry
+from services.analytics import invalidate_user_analytics
 
-router = APIRouter(prefix="/exercise", tags=["Exercise"])
+router = APIRouter(prefix="/exercise", tags=["Exercise"], route_class=ProfiledRoute)
+
+EXERCISE_ENTRY_JSON = RowSerializer(ExerciseEntryResponse)
 
 
 @router.post("/entries", response_model=ExerciseEntryResponse, status_code=status.HTTP_201_CREATED)
 def create_exercise_entry(
     entry_data: ExerciseEntryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -36,46 +46,75 @@ def create_exercise_entry(
     )
     
     db.add(exercise_entry)
+    record_exercise_entry(db, exercise_entry)
+    bump_data_version(db, current_user.id)
     db.commit()
+    invalidate_user_analytics(current_user.id)
     db.refresh(exercise_entry)
     
     return exercise_entry
 
 
 @router.get("/entries", response_model=List[ExerciseEntryResponse])
-def get_exercise_entries(
+async def get_exercise_entries(
+    request: Request,
+    response: Response,
     entry_date: date = Query(None, description="Filter by date"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    start: date = Query(None, description="Earliest entry date (inclusive)"),
+    end: date = Query(None, description="Latest entry date (inclusive)"),
+    cursor: str = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Get exercise entries for the current user.
-    Optionally filter by date.
+    Get exercise entries for the current user, newest first.
+    Optionally filter by a single date or a start/end date range.
+    
+    Results are paginated; when more entries exist the next page's cursor
+    is returned in the X-Next-Cursor header (and as a Link rel="next").
     """
-    query = db.query(ExerciseEntry).filter(ExerciseEntry.user_id == current_user.id)
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
     
-    if entry_date:
-        query = query.filter(ExerciseEntry.entry_date == entry_date)
+    def fetch_page(session: Session) -> list:
+        query = session.query(ExerciseEntry).filter(ExerciseEntry.user_id == current_user.id)
+        if entry_date:
+            query = query.filter(ExerciseEntry.entry_date == entry_date)
+        if start:
+            query = query.filter(ExerciseEntry.entry_date >= start)
+        if end:
+            query = query.filter(ExerciseEntry.entry_date <= end)
+        return paginate_entries(query, ExerciseEntry, request, response, cursor, limit)
     
-    entries = query.order_by(ExerciseEntry.created_at.desc()).all()
-    return entries
+    rows = await db.run_sync(fetch_page)
+    return fast_response(rows, response, EXERCISE_ENTRY_JSON)
 
 
 @router.get("/entries/{entry_id}", response_model=ExerciseEntryResponse)
-def get_exercise_entry(
+async def get_exercise_entry(
+    request: Request,
+    response: Response,
     entry_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    entry_date: date = Query(None, description="The entry's date, if known (limits the lookup to that month's partition)"),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific exercise entry by ID.
     """
-    entry = db.query(ExerciseEntry).filter(
-        and_(
-            ExerciseEntry.id == entry_id,
-            ExerciseEntry.user_id == current_user.id
-        )
-    ).first()
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
+    query = select(ExerciseEntry).where(
+        ExerciseEntry.id == entry_id,
+        ExerciseEntry.user_id == current_user.id
+    )
+    if entry_date:
+        query = query.where(ExerciseEntry.entry_date == entry_date)
+    entry = (await db.execute(query.limit(1))).scalars().first()
     
     if not entry:
         raise HTTPException(
@@ -90,18 +129,22 @@ def get_exercise_entry(
 def update_exercise_entry(
     entry_id: int,
     entry_data: ExerciseEntryUpdate,
-    current_user: User = Depends(get_current_user),
+    entry_date: date = Query(None, description="The entry's date, if known (limits the lookup to that month's partition)"),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Update an exercise entry.
     """
-    entry = db.query(ExerciseEntry).filter(
+    query = db.query(ExerciseEntry).filter(
         and_(
             ExerciseEntry.id == entry_id,
             ExerciseEntry.user_id == current_user.id
         )
-    ).first()
+    )
+    if entry_date:
+        query = query.filter(ExerciseEntry.entry_date == entry_date)
+    entry = query.first()
     
     if not entry:
         raise HTTPException(
@@ -109,11 +152,15 @@ def update_exercise_entry(
             detail="Exercise entry not found"
         )
     
-    # Update only provided fields
+    # Update only provided fields, moving the entry's totals between rollups
+    record_exercise_entry(db, entry, sign=-1)
     for field, value in entry_data.dict(exclude_unset=True).items():
         setattr(entry, field, value)
+    record_exercise_entry(db, entry)
     
+    bump_data_version(db, current_user.id)
     db.commit()
+    invalidate_user_analytics(current_user.id)
     db.refresh(entry)
     
     return entry
@@ -122,18 +169,22 @@ def update_exercise_entry(
 @router.delete("/entries/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_exercise_entry(
     entry_id: int,
-    current_user: User = Depends(get_current_user),
+    entry_date: date = Query(None, description="The entry's date, if known (limits the lookup to that month's partition)"),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Delete an exercise entry.
     """
-    entry = db.query(ExerciseEntry).filter(
+    query = db.query(ExerciseEntry).filter(
         and_(
             ExerciseEntry.id == entry_id,
             ExerciseEntry.user_id == current_user.id
         )
-    ).first()
+    )
+    if entry_date:
+        query = query.filter(ExerciseEntry.entry_date == entry_date)
+    entry = query.first()
     
     if not entry:
         raise HTTPException(
@@ -141,8 +192,11 @@ def delete_exercise_entry(
             detail="Exercise entry not found"
         )
     
+    record_exercise_entry(db, entry, sign=-1)
     db.delete(entry)
+    bump_data_version(db, current_user.id)
     db.commit()
+    invalidate_user_analytics(current_user.id)
     
     return None
 
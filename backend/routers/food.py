@@ -3,27 +3,38 @@ Food Router
 Handles food search, logging, and CRUD operations.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select
 from typing import List
 from datetime import date, datetime
 from schemas.food_schemas import (
     FoodSearchResponse, FoodSearchResult, FoodEntryCreate, 
     FoodEntryUpdate, FoodEntryResponse
 )
-from models import User, FoodEntry, Streak
-from utils.auth import get_db, get_current_user
-from services.food_aggregator import FoodAggregator
+from models import FoodEntry, Streak
+from utils.auth import get_db, get_async_db, get_async_read_db, get_catalog_read_db, get_current_principal, get_current_principal_async
+from utils.principal_cache import UserPrincipal
+from utils.etag import bump_data_version, check_not_modified_async
+from utils.pagination import paginate_entries, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.fast_json import FastJSONResponse, RowSerializer, fast_response
+from utils.profiling import ProfiledRoute
+from services.rollups import record_food_entry
+from services.analytics import invalidate_user_analytics
 
-router = APIRouter(prefix="/food", tags=["Food"])
+router = APIRouter(prefix="/food", tags=["Food"], route_class=ProfiledRoute)
 
+FOOD_ENTRY_JSON = RowSerializer(FoodEntryResponse)
 
-@router.get("/search", response_model=FoodSearchResponse)
+
+# Results partly come from external APIs, so they are still validated
+@router.get("/search", response_model=FoodSearchResponse, response_class=FastJSONResponse)
 def search_food(
     q: str = Query(..., min_length=2, description="Search query"),
     limit: int = Query(20, ge=1, le=50, description="Maximum results"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_catalog_read_db)
 ):
     """
     Search for food items across all sources (internal DB + external APIs).
@@ -33,7 +44,7 @@ def search_food(
     2. Query external APIs (Nutritionix, USDA) if needed
     3. Cache and normalize results
     """
-    aggregator = FoodAggregator(db)
+    aggregator = _food_aggregator(db, read_db)
     results = aggregator.search_food(q, limit)
     
     return {
@@ -45,12 +56,13 @@ def search_food(
 @router.get("/barcode/{barcode}")
 def search_by_barcode(
     barcode: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_catalog_read_db)
 ):
     """
     Search for a food item by barcode/UPC.
     """
-    aggregator = FoodAggregator(db)
+    aggregator = _food_aggregator(db, read_db)
     result = aggregator.search_by_barcode(barcode)
     
     if not result:
@@ -65,7 +77,7 @@ def search_by_barcode(
 @router.post("/entries", response_model=FoodEntryResponse, status_code=status.HTTP_201_CREATED)
 def create_food_entry(
     entry_data: FoodEntryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -90,7 +102,10 @@ def create_food_entry(
     )
     
     db.add(food_entry)
+    record_food_entry(db, food_entry)
+    bump_data_version(db, current_user.id)
     db.commit()
+    invalidate_user_analytics(current_user.id)
     db.refresh(food_entry)
     
     # Update streak if logging for today
@@ -100,39 +115,65 @@ def create_food_entry(
 
 
 @router.get("/entries", response_model=List[FoodEntryResponse])
-def get_food_entries(
+async def get_food_entries(
+    request: Request,
+    response: Response,
     entry_date: date = Query(None, description="Filter by date"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    start: date = Query(None, description="Earliest entry date (inclusive)"),
+    end: date = Query(None, description="Latest entry date (inclusive)"),
+    cursor: str = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Get food entries for the current user.
-    Optionally filter by date.
+    Get food entries for the current user, newest first.
+    Optionally filter by a single date or a start/end date range.
+    
+    Results are paginated; when more entries exist the next page's cursor
+    is returned in the X-Next-Cursor header (and as a Link rel="next").
     """
-    query = db.query(FoodEntry).filter(FoodEntry.user_id == current_user.id)
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
     
-    if entry_date:
-        query = query.filter(FoodEntry.entry_date == entry_date)
+    def fetch_page(session: Session) -> list:
+        query = session.query(FoodEntry).filter(FoodEntry.user_id == current_user.id)
+        if entry_date:
+            query = query.filter(FoodEntry.entry_date == entry_date)
+        if start:
+            query = query.filter(FoodEntry.entry_date >= start)
+        if end:
+            query = query.filter(FoodEntry.entry_date <= end)
+        return paginate_entries(query, FoodEntry, request, response, cursor, limit)
     
-    entries = query.order_by(FoodEntry.created_at.desc()).all()
-    return entries
+    rows = await db.run_sync(fetch_page)
+    return fast_response(rows, response, FOOD_ENTRY_JSON)
 
 
 @router.get("/entries/{entry_id}", response_model=FoodEntryResponse)
-def get_food_entry(
+async def get_food_entry(
+    request: Request,
+    response: Response,
     entry_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    entry_date: date = Query(None, description="The entry's date, if known (limits the lookup to that month's partition)"),
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a specific food entry by ID.
     """
-    entry = db.query(FoodEntry).filter(
-        and_(
-            FoodEntry.id == entry_id,
-            FoodEntry.user_id == current_user.id
-        )
-    ).first()
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
+    query = select(FoodEntry).where(
+        FoodEntry.id == entry_id,
+        FoodEntry.user_id == current_user.id
+    )
+    if entry_date:
+        query = query.where(FoodEntry.entry_date == entry_date)
+    entry = (await db.execute(query.limit(1))).scalars().first()
     
     if not entry:
         raise HTTPException(
@@ -147,18 +188,22 @@ def get_food_entry(
 def update_food_entry(
     entry_id: int,
     entry_data: FoodEntryUpdate,
-    current_user: User = Depends(get_current_user),
+    entry_date: date = Query(None, description="The entry's date, if known (limits the lookup to that month's partition)"),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Update a food entry.
     """
-    entry = db.query(FoodEntry).filter(
+    query = db.query(FoodEntry).filter(
         and_(
             FoodEntry.id == entry_id,
             FoodEntry.user_id == current_user.id
         )
-    ).first()
+    )
+    if entry_date:
+        query = query.filter(FoodEntry.entry_date == entry_date)
+    entry = query.first()
     
     if not entry:
         raise HTTPException(
@@ -166,11 +211,15 @@ def update_food_entry(
             detail="Food entry not found"
         )
     
-    # Update only provided fields
+    # Update only provided fields, moving the entry's totals between rollups
+    record_food_entry(db, entry, sign=-1)
     for field, value in entry_data.dict(exclude_unset=True).items():
         setattr(entry, field, value)
+    record_food_entry(db, entry)
     
+    bump_data_version(db, current_user.id)
     db.commit()
+    invalidate_user_analytics(current_user.id)
     db.refresh(entry)
     
     return entry
@@ -179,18 +228,22 @@ def update_food_entry(
 @router.delete("/entries/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_food_entry(
     entry_id: int,
-    current_user: User = Depends(get_current_user),
+    entry_date: date = Query(None, description="The entry's date, if known (limits the lookup to that month's partition)"),
+    current_user: UserPrincipal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Delete a food entry.
     """
-    entry = db.query(FoodEntry).filter(
+    query = db.query(FoodEntry).filter(
         and_(
             FoodEntry.id == entry_id,
             FoodEntry.user_id == current_user.id
         )
-    ).first()
+    )
+    if entry_date:
+        query = query.filter(FoodEntry.entry_date == entry_date)
+    entry = query.first()
     
     if not entry:
         raise HTTPException(
@@ -198,8 +251,11 @@ def delete_food_entry(
             detail="Food entry not found"
         )
     
+    record_food_entry(db, entry, sign=-1)
     db.delete(entry)
+    bump_data_version(db, current_user.id)
     db.commit()
+    invalidate_user_analytics(current_user.id)
     
     return None
 
@@ -235,6 +291,14 @@ def _update_streak(user_id: int, entry_date: date, db: Session):
         if streak.current_streak > streak.longest_streak:
             streak.longest_streak = streak.current_streak
         
+        bump_data_version(db, user_id)
         db.commit()
 
 
+def _food_aggregator(db: Session, read_db: Session):
+    """
+    Build the food aggregator. Imported here so the external API clients
+    are only loaded once food search is first used.
+    """
+    from services.food_aggregator import FoodAggregator
+    return FoodAggregator(db, read_db=read_db)
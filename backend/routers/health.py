@@ -0,0 +1,80 @@
+"""
+Health Router
+Liveness and readiness probes for load balancers and Kubernetes.
+
+Probes check out a connection with a short timeout and always return it,
+and readiness reports pool utilization so an exhausted pool takes the
+instance out of rotation instead of queueing more requests on it.
+Unhealthy replicas don't fail readiness; reads fall back to the primary.
+"""
+
+import asyncio
+import os
+from fastapi import APIRouter, Response, status
+from sqlalchemy import text
+from database import engine, async_engine
+from utils.db_pool import checkout_wait, checkout_errors, pool_exhausted, pool_status
+from utils.read_routing import replica_status
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+# Seconds a readiness probe waits for a connection and SELECT 1
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+
+
+@router.get("")
+def health_check():
+    """
+    Verifies that the backend and database are online.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return {"status": "ok", "database": "connected"}
+    except Exception as e:
+        return {"status": "error", "database": "disconnected", "detail": str(e)}
+
+
+@router.get("/live")
+async def liveness():
+    """
+    Liveness probe: the process is up and serving requests.
+    Does not touch the database, so a database outage doesn't restart pods.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness(response: Response):
+    """
+    Readiness probe: a database connection can be checked out and used
+    within HEALTH_CHECK_TIMEOUT, and neither primary pool (sync or async)
+    is exhausted.
+    Returns 503 otherwise.
+    """
+    try:
+        await asyncio.wait_for(_ping_database(), timeout=HEALTH_CHECK_TIMEOUT)
+        database = "connected"
+    except asyncio.TimeoutError:
+        database = "timeout"
+    except Exception:
+        database = "disconnected"
+    
+    pools = {"primary": pool_status(engine), "primary_async": pool_status(async_engine)}
+    ready = database == "connected" and not (pool_exhausted(engine) or pool_exhausted(async_engine))
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    
+    return {
+        "status": "ok" if ready else "unavailable",
+        "database": database,
+        "pools": pools,
+        "replicas": replica_status(),
+        "checkout_wait_seconds": {name: histogram.snapshot() for name, histogram in checkout_wait.items()},
+        "checkout_errors": dict(checkout_errors),
+    }
+
+
+async def _ping_database() -> None:
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
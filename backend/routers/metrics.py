@@ -0,0 +1,21 @@
+"""
+Metrics Router
+Prometheus scrape endpoint: request latency and status counts, food
+aggregation hit rates and upstream timings, connection pools, the password
+hashing pool and replica lag. See utils/metrics.py.
+"""
+
+from fastapi import APIRouter, Response
+from utils.metrics import render
+
+router = APIRouter(tags=["Health"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    All metrics of this worker process in the Prometheus text format.
+    """
+    return Response(content=render(), media_type=PROMETHEUS_CONTENT_TYPE)
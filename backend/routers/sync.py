@@ -0,0 +1,295 @@
+"""
+Sync Router
+Delta sync for offline-first clients: pull only what changed since a token,
+and push batches of offline mutations with idempotency keys.
+
+Bootstrap protocol: call GET /sync without `since` to obtain a token, then
+download entries through the listing endpoints, then pull with
+?since=<token>. Changes made during the download are replayed as upserts.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
+from schemas.sync_schemas import SyncPullResponse, SyncPushRequest, SyncPushResponse, SyncMutationRequest
+from schemas.food_schemas import FoodEntryCreate, FoodEntryUpdate, FoodEntryResponse
+from schemas.exercise_schemas import ExerciseEntryCreate, ExerciseEntryUpdate, ExerciseEntryResponse
+from schemas.streak_schemas import WeightLogCreate, WeightLogResponse
+from models import User, FoodEntry, ExerciseEntry, WeightLog, ChangeLog, SyncMutation
+from database import engine
+from utils.auth import get_db, get_current_principal
+from utils.principal_cache import UserPrincipal, invalidate_principal
+from routers.food import create_food_entry, update_food_entry, delete_food_entry
+from routers.exercise import create_exercise_entry, update_exercise_entry, delete_exercise_entry
+from routers.dashboard import log_weight, delete_weight_log
+from services.analytics import invalidate_user_analytics
+from services.change_log import latest_seq
+from utils.fast_json import RowSerializer, fast_response
+from utils.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/sync", tags=["Sync"], route_class=ProfiledRoute)
+
+# entity -> (model, response schema)
+SYNC_ENTITIES = {
+    "food": (FoodEntry, FoodEntryResponse),
+    "exercise": (ExerciseEntry, ExerciseEntryResponse),
+    "weight": (WeightLog, WeightLogResponse),
+}
+SYNC_ENTITY_JSON = {entity: RowSerializer(schema) for entity, (_, schema) in SYNC_ENTITIES.items()}
+
+# Tokens are "s<seq>"; the prefix tells them apart from the change_log ids used before
+TOKEN_PREFIX = "s"
+
+# Entities stored in tables partitioned by entry_date
+PARTITIONED_ENTITIES = ("food", "exercise")
+
+# (entity, op) -> (endpoint, input schema, success status)
+SYNC_OPERATIONS = {
+    ("food", "create"): (create_food_entry, FoodEntryCreate, status.HTTP_201_CREATED),
+    ("food", "update"): (update_food_entry, FoodEntryUpdate, status.HTTP_200_OK),
+    ("food", "delete"): (delete_food_entry, None, status.HTTP_204_NO_CONTENT),
+    ("exercise", "create"): (create_exercise_entry, ExerciseEntryCreate, status.HTTP_201_CREATED),
+    ("exercise", "update"): (update_exercise_entry, ExerciseEntryUpdate, status.HTTP_200_OK),
+    ("exercise", "delete"): (delete_exercise_entry, None, status.HTTP_204_NO_CONTENT),
+    ("weight", "create"): (log_weight, WeightLogCreate, status.HTTP_201_CREATED),
+    ("weight", "delete"): (delete_weight_log, None, status.HTTP_204_NO_CONTENT),
+}
+
+
+@router.get("", response_model=SyncPullResponse)
+def pull_changes(
+    response: Response,
+    since: str = Query(None, description="Token from the previous pull"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum changes to return"),
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Get food, exercise and weight changes since a sync token.
+
+    Each entity appears at most once per page with its latest state:
+    an upsert carrying the current row, or a delete tombstone.
+    Without a token (or with an unknown one) the response only carries
+    the current token and reset=true.
+    """
+    latest = latest_seq(db, current_user.id)
+
+    since_seq = _parse_token(since)
+    if since_seq is None or since_seq > latest:
+        return {"changes": [], "token": _token(latest), "has_more": False, "reset": True}
+
+    rows = db.query(ChangeLog).filter(
+        ChangeLog.user_id == current_user.id,
+        ChangeLog.seq > since_seq
+    ).order_by(ChangeLog.seq.asc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Keep only the last change per entity within this page
+    last_changes = {}
+    for row in rows:
+        last_changes.pop((row.entity_type, row.entity_id), None)
+        last_changes[(row.entity_type, row.entity_id)] = row
+
+    current_rows = _load_current_rows(current_user.id, last_changes.values(), db)
+
+    changes = []
+    for (entity_type, entity_id), row in last_changes.items():
+        if row.op == "delete":
+            changes.append({"change_id": row.seq, "entity": entity_type, "op": "delete", "id": entity_id, "data": None})
+            continue
+
+        entity = current_rows.get((entity_type, entity_id))
+        if entity is None:
+            # Deleted after this page; its tombstone arrives on a later pull
+            continue
+
+        changes.append({
+            "change_id": row.seq,
+            "entity": entity_type,
+            "op": "upsert",
+            "id": entity_id,
+            "data": SYNC_ENTITY_JSON[entity_type].one(entity)
+        })
+
+    token = _token(rows[-1].seq if rows else since_seq)
+    return fast_response({"changes": changes, "token": token, "has_more": has_more, "reset": False}, response)
+
+
+@router.post("", response_model=SyncPushResponse)
+def push_mutations(
+    batch: SyncPushRequest,
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply a batch of offline mutations in order.
+
+    Each mutation is committed on its own together with its idempotency key,
+    so a retried batch replays the stored results for keys already applied
+    instead of writing duplicates. Failed mutations, including database
+    errors such as an unknown food_master_id, are reported per item.
+    """
+    user_id = current_user.id
+    results = []
+
+    for mutation in batch.mutations:
+        stored = _find_mutation(user_id, mutation.idempotency_key, db)
+        if stored:
+            results.append(_stored_result(stored))
+            continue
+
+        try:
+            status_code, result = _apply_mutation(mutation, user_id)
+        except _KeyAlreadyClaimed:
+            # A concurrent retry claimed this key first
+            results.append(_stored_result(_find_mutation(user_id, mutation.idempotency_key, db)))
+            continue
+
+        results.append({
+            "idempotency_key": mutation.idempotency_key,
+            "status_code": status_code,
+            "result": result
+        })
+
+    return {"results": results, "token": _token(latest_seq(db, user_id))}
+
+
+class _KeyAlreadyClaimed(Exception):
+    """Another request committed a mutation with the same idempotency key."""
+
+
+def _apply_mutation(mutation: SyncMutationRequest, user_id: int):
+    """
+    Run one mutation through the regular endpoint so rollups, streaks and
+    caches stay consistent. The change and its idempotency record, result
+    included, are committed in a single transaction.
+
+    The endpoint runs on a session joined to that transaction in savepoint
+    mode, so its own commit only releases a savepoint and its errors roll
+    back only its part; the outer transaction is committed here.
+    """
+    with engine.connect() as connection, connection.begin():
+        session = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            record = SyncMutation(user_id=user_id, idempotency_key=mutation.idempotency_key)
+            session.add(record)
+            try:
+                session.commit()
+            except IntegrityError:
+                raise _KeyAlreadyClaimed()
+
+            try:
+                status_code, result = _call_endpoint(mutation, session.get(User, user_id), session)
+            except HTTPException as e:
+                status_code, result = e.status_code, {"detail": e.detail}
+            except ValidationError as e:
+                status_code, result = status.HTTP_422_UNPROCESSABLE_ENTITY, {"detail": e.errors(include_url=False)}
+            except IntegrityError:
+                status_code, result = status.HTTP_409_CONFLICT, {"detail": "Conflicts with existing data"}
+            except OperationalError:
+                # Timeouts and lost connections are transient; fail the batch so the client retries
+                raise
+            except SQLAlchemyError:
+                status_code, result = status.HTTP_422_UNPROCESSABLE_ENTITY, {"detail": "Invalid data"}
+
+            # Errors are stored too, so a retry gets the same answer
+            if status_code >= 400:
+                session.rollback()
+            record.status_code = status_code
+            record.result = result
+            session.commit()
+        finally:
+            session.close()
+
+    # The endpoint's commit ran before this one; a read in between may have cached the old data
+    invalidate_principal(user_id)
+    invalidate_user_analytics(user_id)
+
+    return status_code, result
+
+
+def _call_endpoint(mutation: SyncMutationRequest, current_user: User, db: Session):
+    """
+    Dispatch a mutation to its endpoint function and serialize the result.
+    """
+    operation = SYNC_OPERATIONS.get((mutation.entity, mutation.op))
+    if operation is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{mutation.op} is not supported for {mutation.entity}"
+        )
+    endpoint, input_schema, success_status = operation
+
+    if mutation.op != "create" and mutation.id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="id is required for update and delete"
+        )
+
+    # Food and exercise lookups by id take an optional entry_date hint; mutations carry no hint
+    lookup = {"entry_date": None} if mutation.entity in PARTITIONED_ENTITIES else {}
+
+    if mutation.op == "create":
+        entity = endpoint(input_schema.model_validate(mutation.data or {}), current_user=current_user, db=db)
+    elif mutation.op == "update":
+        entity = endpoint(mutation.id, input_schema.model_validate(mutation.data or {}), current_user=current_user, db=db, **lookup)
+    else:
+        endpoint(mutation.id, current_user=current_user, db=db, **lookup)
+        return success_status, None
+
+    response_schema = SYNC_ENTITIES[mutation.entity][1]
+    return success_status, response_schema.model_validate(entity).model_dump(mode="json")
+
+
+def _load_current_rows(user_id: int, changes, db: Session) -> dict:
+    """
+    Fetch the current rows for upserted entities, one query per entity type.
+    """
+    ids_by_type = {}
+    for change in changes:
+        if change.op == "upsert":
+            ids_by_type.setdefault(change.entity_type, []).append(change.entity_id)
+
+    current_rows = {}
+    for entity_type, ids in ids_by_type.items():
+        model = SYNC_ENTITIES[entity_type][0]
+        for entity in db.query(model).filter(model.user_id == user_id, model.id.in_(ids)).all():
+            current_rows[(entity_type, entity.id)] = entity
+
+    return current_rows
+
+
+def _find_mutation(user_id: int, idempotency_key: str, db: Session):
+    return db.query(SyncMutation).filter(
+        SyncMutation.user_id == user_id,
+        SyncMutation.idempotency_key == idempotency_key
+    ).first()
+
+
+def _stored_result(stored: SyncMutation) -> dict:
+    return {
+        "idempotency_key": stored.idempotency_key,
+        "status_code": stored.status_code,
+        "result": stored.result,
+        "replayed": True
+    }
+
+
+def _token(seq: int) -> str:
+    return f"{TOKEN_PREFIX}{seq}"
+
+
+def _parse_token(token: str):
+    """
+    Sync tokens are per-user change seqs; None for a missing or malformed
+    token, including the bare change_log ids issued before seqs existed.
+    """
+    if not token or not token.startswith(TOKEN_PREFIX):
+        return None
+    try:
+        return int(token[len(TOKEN_PREFIX):])
+    except ValueError:
+        return None
@@ -3,23 +3,108 @@ Users Router
 Handles user profile management and onboarding.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
 from schemas.user_schemas import UserResponse, UserProfileUpdate, OnboardingData
 from models import User
-from utils.auth import get_db, get_current_user
+from utils.auth import get_db, get_async_db, get_current_user, get_current_principal, get_current_principal_async
+from utils.principal_cache import UserPrincipal
+from utils.etag import bump_data_version, check_not_modified_async
+from utils.profiling import ProfiledRoute
+from services.analytics import invalidate_user_analytics
+from services.data_export import EXPORT_DATASETS, EXPORT_FORMATS, iter_export
+from services.data_import import HistoryImportError, import_history
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=ProfiledRoute)
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_profile(current_user: User = Depends(get_current_user)):
+async def get_current_user_profile(
+    request: Request,
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_principal_async),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Get the current authenticated user's profile.
     """
+    not_modified = await check_not_modified_async(request, response, current_user, db)
+    if not_modified:
+        return not_modified
+    
     return current_user
 
 
+@router.get("/me/export")
+def export_user_data(
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    dataset: str = Query("all", pattern="^(all|food|exercise|weight)$", description="Which history to export"),
+    compress: bool = Query(False, description="Gzip the export on the fly"),
+    current_user: UserPrincipal = Depends(get_current_principal)
+):
+    """
+    Download the current user's full history as CSV or NDJSON.
+    
+    Every row carries a record_type (food, exercise or weight). The export
+    is streamed from server-side cursors, so it works for any history size.
+    """
+    datasets = list(EXPORT_DATASETS) if dataset == "all" else [dataset]
+    media_type, extension = EXPORT_FORMATS[fmt]
+    filename = f"fittrack-{dataset}-{date.today()}.{extension}"
+    
+    if compress:
+        media_type = "application/gzip"
+        filename += ".gz"
+    
+    return StreamingResponse(
+        iter_export(current_user.id, datasets, fmt, compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/me/import")
+def import_user_data(
+    file: UploadFile = File(..., description="CSV export from FitTrack+ or another tracker"),
+    dataset: str = Query(None, pattern="^(food|exercise|weight)$", description="Dataset for CSVs without a record_type column"),
+    current_user: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-import food, exercise and weight history from a CSV file.
+    
+    Rows are validated, loaded with COPY into staging tables and merged in
+    one transaction. Identical rows are all imported, except where the user
+    already has that many identical entries; skipped rows are counted and
+    their first line numbers returned. The new rows' totals are added to
+    the progress rollups, and the streak is recomputed once at the end.
+    """
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = import_history(db, current_user.id, lines, dataset)
+    except HistoryImportError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except (UnicodeDecodeError, csv.Error):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File is not a valid UTF-8 CSV"
+        )
+    
+    invalidate_user_analytics(current_user.id)
+    
+    return result
+
+
 @router.put("/me", response_model=UserResponse)
 def update_user_profile(
     profile_data: UserProfileUpdate,
@@ -33,7 +118,9 @@ def update_user_profile(
     for field, value in profile_data.dict(exclude_unset=True).items():
         setattr(current_user, field, value)
     
+    bump_data_version(db, current_user.id)
     db.commit()
+    invalidate_user_analytics(current_user.id)
     db.refresh(current_user)
     
     return current_user
@@ -82,7 +169,9 @@ def complete_onboarding(
     current_user.target_carbs_g = (target_calories * 0.40) / 4
     current_user.target_fat_g = (target_calories * 0.30) / 9  # 9 cal per gram
     
+    bump_data_version(db, current_user.id)
     db.commit()
+    invalidate_user_analytics(current_user.id)
     db.refresh(current_user)
     
     return current_user
@@ -13,5 +13,12 @@ from .exercise_schemas import (
 from .streak_schemas import (
     StreakResponse, WeightLogCreate, WeightLogResponse
 )
+from .analytics_schemas import (
+    AnalyticsPoint, TrendAnalyticsResponse
+)
+from .sync_schemas import (
+    SyncChange, SyncPullResponse, SyncMutationRequest, SyncPushRequest,
+    SyncMutationResult, SyncPushResponse
+)
 
 
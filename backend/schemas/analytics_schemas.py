@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import date
+
+
+# Trend Analytics Schemas
+class AnalyticsPoint(BaseModel):
+    date: date
+    weight_kg: Optional[float] = None
+    trend_kg: Optional[float] = None
+    calories_consumed: Optional[float] = None
+    avg_7d_calories: Optional[float] = None
+    avg_30d_calories: Optional[float] = None
+
+
+class TrendAnalyticsResponse(BaseModel):
+    days: int
+    series: List[AnalyticsPoint]
+    current_trend_kg: Optional[float] = None
+    weekly_rate_kg: Optional[float] = None
+    estimated_tdee: Optional[int] = None
+    adherence_pct: Optional[float] = None
+    logged_days_pct: float
+    target_calories: Optional[int] = None
+    goal_weight_kg: Optional[float] = None
+    days_to_goal: Optional[int] = None
+    goal_eta: Optional[date] = None
+
+
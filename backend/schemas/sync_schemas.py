@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Any, Dict
+
+
+# Delta Sync Schemas
+class SyncChange(BaseModel):
+    change_id: int
+    entity: str  # food, exercise, weight
+    op: str  # upsert, delete
+    id: int
+    data: Optional[Dict[str, Any]] = None  # Current row for upserts, None for tombstones
+
+
+class SyncPullResponse(BaseModel):
+    changes: List[SyncChange]
+    token: str  # Pass back as ?since= on the next pull
+    has_more: bool
+    reset: bool = False  # Client must re-download entries before applying changes
+
+
+class SyncMutationRequest(BaseModel):
+    idempotency_key: str = Field(..., min_length=1, max_length=128)
+    entity: str = Field(..., pattern="^(food|exercise|weight)$")
+    op: str = Field(..., pattern="^(create|update|delete)$")
+    id: Optional[int] = None  # Required for update/delete
+    data: Optional[Dict[str, Any]] = None  # Required for create/update
+
+
+class SyncPushRequest(BaseModel):
+    mutations: List[SyncMutationRequest] = Field(..., max_length=500)
+
+
+class SyncMutationResult(BaseModel):
+    idempotency_key: str
+    status_code: Optional[int] = None
+    result: Optional[Any] = None  # Created/updated row, or error detail
+    replayed: bool = False  # True if this key was already applied earlier
+
+
+class SyncPushResponse(BaseModel):
+    results: List[SyncMutationResult]
+    token: str
+
+
@@ -1,6 +1,15 @@
 # Services package
-from .nutritionix_service import NutritionixService
-from .usda_service import USDAService
-from .food_aggregator import FoodAggregator
+# The external food API clients pull in `requests`, so they are imported on first access.
+import importlib
 
+_LAZY_EXPORTS = {
+    "NutritionixService": ".nutritionix_service",
+    "USDAService": ".usda_service",
+    "FoodAggregator": ".food_aggregator",
+}
 
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
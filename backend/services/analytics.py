@@ -0,0 +1,131 @@
+"""
+Trend Analytics
+Server-side analytics over a user's weight and intake history, computed
+with NumPy on a contiguous daily grid:
+
+- Exponentially smoothed weight trend (gaps between logs are interpolated)
+- Rolling 7 and 30 day intake averages over logged days
+- TDEE estimated from energy balance (intake vs. trend weight change)
+- Adherence to target_calories
+- Projected date for reaching goal_weight_kg
+
+Results are cached per user, keyed by the range, the user's data version
+and today's date, so any write (from any worker) or a new day makes older
+entries unreachable. The routers still drop a user's entries after their
+writes to free the memory early. The NumPy computation lives in
+services.trend_analytics and is imported lazily.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from models import User
+
+CACHE_MAX_USERS = 1024
+CACHE_TTL_SECONDS = 300
+
+
+class _AnalyticsCache:
+    """
+    Bounded LRU of computed analytics keyed by user, then by
+    (days, data_version, date). Entries also expire after a TTL, which
+    frees users who don't come back.
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Dict[Tuple[int, int, date], tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, key: Tuple[int, int, date]) -> Optional[dict]:
+        with self._lock:
+            per_user = self._entries.get(user_id)
+            if not per_user or key not in per_user:
+                return None
+            stored_at, result = per_user[key]
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del per_user[key]
+                return None
+            self._entries.move_to_end(user_id)
+            return result
+
+    def set(self, user_id: int, key: Tuple[int, int, date], result: dict) -> None:
+        _, data_version, day = key
+        with self._lock:
+            per_user = self._entries.setdefault(user_id, {})
+            # Entries for an older version or day can no longer be requested
+            for old_key in [old_key for old_key in per_user if old_key[1:] != (data_version, day)]:
+                del per_user[old_key]
+            per_user[key] = (time.monotonic(), result)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def prune(self) -> int:
+        """Drop expired entries of users who haven't come back. Returns how many."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        pruned = 0
+        with self._lock:
+            for user_id in list(self._entries):
+                per_user = self._entries[user_id]
+                for key in [key for key, (stored_at, _) in per_user.items() if stored_at < cutoff]:
+                    del per_user[key]
+                    pruned += 1
+                if not per_user:
+                    del self._entries[user_id]
+        return pruned
+
+
+_cache = _AnalyticsCache(CACHE_MAX_USERS, CACHE_TTL_SECONDS)
+
+
+def invalidate_user_analytics(user_id: int) -> None:
+    """
+    Drop cached analytics for a user. Optional after a write (the new data
+    version already misses the cache), but frees the memory right away.
+    """
+    _cache.invalidate(user_id)
+
+
+def prune_analytics_cache() -> int:
+    """
+    Free expired cache entries (run by the scheduler in every worker).
+    """
+    return _cache.prune()
+
+
+def get_user_analytics(user: User, days: int, db: Session, data_version: int) -> dict:
+    """
+    Return trend analytics for the last `days` days, from cache when possible.
+    `data_version` is the user's current version as resolved for the ETag
+    (utils.etag.check_not_modified); a user snapshot older than that is
+    computed from but not cached, since its targets may be out of date.
+    """
+    if data_version != user.data_version:
+        return compute_user_analytics(user, days, db)
+
+    key = (days, data_version, date.today())
+    cached = _cache.get(user.id, key)
+    if cached is not None:
+        return cached
+
+    result = compute_user_analytics(user, days, db)
+    _cache.set(user.id, key, result)
+    return result
+
+
+def compute_user_analytics(user: User, days: int, db: Session) -> dict:
+    """
+    Load the user's daily series and compute all analytics for the last `days` days.
+    """
+    # NumPy is only imported once analytics are first requested
+    from services.trend_analytics import compute_trend_analytics
+    return compute_trend_analytics(user, days, db)
@@ -0,0 +1,73 @@
+"""
+Change Log
+Appends a row to change_log for every insert, update or delete of a food
+entry, exercise entry or weight log flushed through the ORM. The log gives
+each user a monotonically increasing change feed for delta sync.
+
+Rows are written in the same transaction as the change itself, so the feed
+never shows a change that was rolled back. Their seq comes from the user's
+counter (users.change_seq), incremented under the user's row lock, which
+is held until commit; a change therefore never becomes visible behind a
+seq a client has already been given. Set-based writes that bypass the ORM
+(bulk import) reserve their seqs with `reserve_seqs` and append their own
+rows.
+"""
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from models import FoodEntry, ExerciseEntry, WeightLog, ChangeLog
+
+TRACKED_ENTITIES = {
+    FoodEntry: "food",
+    ExerciseEntry: "exercise",
+    WeightLog: "weight",
+}
+
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session: Session, flush_context) -> None:
+    """
+    Collect tracked objects from the flush and append their change rows.
+    """
+    rows = []
+    
+    for obj in list(session.new) + [obj for obj in session.dirty if session.is_modified(obj)]:
+        entity_type = TRACKED_ENTITIES.get(type(obj))
+        if entity_type:
+            rows.append({"user_id": obj.user_id, "entity_type": entity_type, "entity_id": obj.id, "op": "upsert"})
+    
+    for obj in session.deleted:
+        entity_type = TRACKED_ENTITIES.get(type(obj))
+        if entity_type:
+            rows.append({"user_id": obj.user_id, "entity_type": entity_type, "entity_id": obj.id, "op": "delete"})
+    
+    if not rows:
+        return
+
+    connection = session.connection()
+    rows_by_user = {}
+    for row in rows:
+        rows_by_user.setdefault(row["user_id"], []).append(row)
+    for user_id, user_rows in rows_by_user.items():
+        first = reserve_seqs(connection, user_id, len(user_rows))
+        for offset, row in enumerate(user_rows):
+            row["seq"] = first + offset
+    connection.execute(ChangeLog.__table__.insert(), rows)
+
+
+def reserve_seqs(connection: Connection, user_id: int, count: int) -> int:
+    """
+    Take the next `count` change seqs of a user and return the first.
+    Locks the user's row until the transaction ends.
+    """
+    last = connection.execute(
+        text("UPDATE users SET change_seq = change_seq + :count WHERE id = :user_id RETURNING change_seq"),
+        {"count": count, "user_id": user_id}
+    ).scalar()
+    return last - count + 1
+
+
+def latest_seq(db: Session, user_id: int) -> int:
+    """The user's latest change seq (0 before the first change)."""
+    return db.execute(text("SELECT change_seq FROM users WHERE id = :user_id"), {"user_id": user_id}).scalar() or 0
@@ -0,0 +1,142 @@
+"""
+Data Export Service
+Streams a user's full history (food, exercise and weight logs) as CSV or
+NDJSON, optionally gzip-compressed on the fly.
+
+Rows are read as plain column tuples through server-side cursors
+(yield_per), written into a small buffer and flushed in chunks, so memory
+use stays constant no matter how many years of data a user has.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List
+from sqlalchemy import select
+from database import SessionLocal
+from models import FoodEntry, ExerciseEntry, WeightLog
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+# Flush the output buffer once it grows past this many characters
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Exported columns per dataset, in output order
+EXPORT_DATASETS: Dict[str, tuple] = {
+    "food": (FoodEntry, FoodEntry.entry_date, [
+        "id", "entry_date", "meal_type", "food_name", "brand_name", "calories",
+        "protein_g", "carbs_g", "fat_g", "quantity", "unit", "food_master_id", "created_at",
+    ]),
+    "exercise": (ExerciseEntry, ExerciseEntry.entry_date, [
+        "id", "entry_date", "exercise_name", "duration_minutes", "calories_burned",
+        "notes", "created_at",
+    ]),
+    "weight": (WeightLog, WeightLog.log_date, [
+        "id", "log_date", "weight_kg", "notes", "created_at",
+    ]),
+}
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def export_columns(datasets: List[str]) -> List[str]:
+    """
+    CSV header: a record_type column followed by the union of the
+    selected datasets' columns, in first-seen order.
+    """
+    columns = ["record_type"]
+    for dataset in datasets:
+        for column in EXPORT_DATASETS[dataset][2]:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def iter_export(user_id: int, datasets: List[str], fmt: str, compress: bool = False) -> Iterator[bytes]:
+    """
+    Generate the export as a stream of byte chunks.
+    Opens its own session so it can outlive the request handler.
+    """
+    chunks = _iter_text_chunks(user_id, datasets, fmt)
+    if compress:
+        return _gzip_chunks(chunks)
+    return (chunk.encode("utf-8") for chunk in chunks)
+
+
+def _iter_records(db, user_id: int, dataset: str) -> Iterator[Dict]:
+    """
+    Stream one dataset's rows for a user, oldest first.
+    """
+    model, date_column, columns = EXPORT_DATASETS[dataset]
+    stmt = select(*[getattr(model, column) for column in columns]).where(
+        model.user_id == user_id
+    ).order_by(date_column.asc(), model.id.asc()).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    for row in db.execute(stmt):
+        record = {"record_type": dataset}
+        record.update(zip(columns, row))
+        yield record
+
+
+def _iter_text_chunks(user_id: int, datasets: List[str], fmt: str) -> Iterator[str]:
+    """
+    Serialize records into text chunks of roughly EXPORT_CHUNK_SIZE characters.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=export_columns(datasets), extrasaction="ignore")
+        writer.writeheader()
+
+    db = SessionLocal()
+    try:
+        for dataset in datasets:
+            for record in _iter_records(db, user_id, dataset):
+                if writer:
+                    writer.writerow({key: _format_csv(value) for key, value in record.items()})
+                else:
+                    buffer.write(json.dumps(record, default=_format_json))
+                    buffer.write("\n")
+
+                if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+    finally:
+        db.close()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    Gzip a stream of text chunks incrementally.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode("utf-8"))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _format_csv(value):
+    """CSV cell value: ISO dates, empty string for NULL."""
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _format_json(value):
+    """json.dumps fallback for dates."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
@@ -0,0 +1,357 @@
+"""
+Bulk History Import
+Loads large CSV histories (food, exercise and weight) for a user in one
+transaction:
+
+1. The CSV is parsed as a stream and each row is validated against the
+   matching create schema (FoodEntryCreate, ExerciseEntryCreate, WeightLogCreate).
+2. Valid rows are buffered and written in batches with COPY into temporary
+   staging tables.
+3. A single INSERT ... SELECT per table merges the staged rows. Rows
+   are matched to existing entries by content and position in the file
+   (see _merge_sql): repeated identical entries are kept, entries the user
+   already has are skipped and reported, and re-importing the same file
+   is a no-op. Merged rows are appended to the sync change log in the
+   same statement.
+4. The merged rows' totals are added to their weekly/monthly rollups in
+   the same statement (rollups of archived months stay intact), and the
+   streak is recomputed once at the end.
+
+Accepts the /users/me/export CSV format (with a record_type column) or a
+single-dataset CSV whose columns match the create schema.
+"""
+
+import csv
+import io
+from typing import Dict, Iterable, List, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from schemas.food_schemas import FoodEntryCreate
+from schemas.exercise_schemas import ExerciseEntryCreate
+from schemas.streak_schemas import WeightLogCreate
+from services.rollups import ROLLUP_MODELS
+from services.streaks import recompute_streak
+from utils.etag import bump_data_version
+
+# Validated rows buffered per dataset before each COPY
+IMPORT_BATCH_SIZE = 5000
+# Row-level validation errors and skipped lines reported back (the rest are only counted)
+MAX_REPORTED_ERRORS = 100
+
+
+class _ImportTarget:
+    """Schema, staging table and merge rules for one dataset."""
+
+    def __init__(self, schema: type, staging: str, columns: Dict[str, str],
+                 table: str, identity: tuple, insert_sql: str, rollup_columns: Dict[str, str]):
+        self.schema = schema
+        self.staging = staging
+        self.columns = columns  # column name -> SQL type, in COPY order
+        self.table = table
+        self.identity = identity  # columns that identify an entry; the date column first
+        self.insert_sql = insert_sql  # inserts the rows of new_rows s
+        self.rollup_columns = rollup_columns  # rollup column -> entry column it sums
+
+
+IMPORT_TARGETS: Dict[str, _ImportTarget] = {
+    "food": _ImportTarget(
+        FoodEntryCreate,
+        "import_food_staging",
+        {
+            "food_name": "text", "brand_name": "text", "calories": "double precision",
+            "protein_g": "double precision", "carbs_g": "double precision",
+            "fat_g": "double precision", "quantity": "double precision", "unit": "text",
+            "meal_type": "text", "entry_date": "date", "food_master_id": "integer",
+        },
+        "food_entries",
+        ("entry_date", "food_name", "calories", "meal_type"),
+        """
+        INSERT INTO food_entries
+            (user_id, food_name, brand_name, calories, protein_g, carbs_g, fat_g,
+             quantity, unit, meal_type, entry_date, food_master_id, created_at)
+        SELECT :user_id, s.food_name, s.brand_name, s.calories, s.protein_g, s.carbs_g, s.fat_g,
+               s.quantity, s.unit, s.meal_type, s.entry_date, fm.id, now()
+        FROM new_rows s
+        LEFT JOIN food_master fm ON fm.id = s.food_master_id
+        """,
+        {"calories_consumed": "calories", "protein_g": "protein_g", "carbs_g": "carbs_g", "fat_g": "fat_g"},
+    ),
+    "exercise": _ImportTarget(
+        ExerciseEntryCreate,
+        "import_exercise_staging",
+        {
+            "exercise_name": "text", "duration_minutes": "double precision",
+            "calories_burned": "double precision", "entry_date": "date", "notes": "text",
+        },
+        "exercise_entries",
+        ("entry_date", "exercise_name", "duration_minutes"),
+        """
+        INSERT INTO exercise_entries
+            (user_id, exercise_name, duration_minutes, calories_burned, entry_date, notes, created_at)
+        SELECT :user_id, s.exercise_name, s.duration_minutes, s.calories_burned,
+               s.entry_date, s.notes, now()
+        FROM new_rows s
+        """,
+        {"calories_burned": "calories_burned"},
+    ),
+    "weight": _ImportTarget(
+        WeightLogCreate,
+        "import_weight_staging",
+        {"weight_kg": "double precision", "log_date": "date", "notes": "text"},
+        "weight_logs",
+        ("log_date", "weight_kg"),
+        """
+        INSERT INTO weight_logs (user_id, weight_kg, log_date, notes, created_at)
+        SELECT :user_id, s.weight_kg, s.log_date, s.notes, now()
+        FROM new_rows s
+        """,
+        {},
+    ),
+}
+
+
+def _merge_sql(target: _ImportTarget) -> str:
+    """
+    Statement that inserts a dataset's new staged rows, appends them to the
+    sync change log and returns the inserted count and the skipped lines.
+
+    The n-th row of the file with a given identity is new only if the user
+    has fewer than n entries with that identity, so repeated entries (two
+    identical snacks on one day) are all imported once, re-importing the
+    same file inserts nothing, and entries already logged are not doubled.
+    """
+    identity = ", ".join(target.identity)
+    date_column = target.identity[0]
+    matches = " AND ".join(
+        f"e.{column} = s.{column}" if column == date_column else f"e.{column} IS NOT DISTINCT FROM s.{column}"
+        for column in target.identity
+    )
+    returning = ", ".join(["id", date_column, *target.rollup_columns.values()])
+    rollups = "".join(f"""
+        {resolution}_rollup AS ({_rollup_delta_sql(target, resolution)}),"""
+        for resolution in ROLLUP_MODELS if target.rollup_columns
+    )
+    # Seqs are reserved from users.change_seq as in services.change_log.reserve_seqs
+    return f"""
+        WITH numbered AS (
+            SELECT s.*, row_number() OVER (PARTITION BY {identity} ORDER BY s.line) AS occurrence
+            FROM {target.staging} s
+        ),
+        existing AS (
+            SELECT {identity}, count(*) AS copies
+            FROM {target.table}
+            WHERE user_id = :user_id
+              AND {date_column} BETWEEN (SELECT min({date_column}) FROM {target.staging})
+                                    AND (SELECT max({date_column}) FROM {target.staging})
+            GROUP BY {identity}
+        ),
+        new_rows AS (
+            SELECT s.* FROM numbered s
+            LEFT JOIN existing e ON {matches}
+            WHERE s.occurrence > coalesce(e.copies, 0)
+        ),
+        inserted AS ({target.insert_sql} RETURNING {returning}),{rollups}
+        reserved AS (
+            UPDATE users SET change_seq = change_seq + (SELECT count(*) FROM inserted)
+            WHERE id = :user_id
+            RETURNING change_seq - (SELECT count(*) FROM inserted) AS seq_before
+        ),
+        logged AS (
+            INSERT INTO change_log (user_id, seq, entity_type, entity_id, op, changed_at)
+            SELECT :user_id, reserved.seq_before + row_number() OVER (ORDER BY inserted.id),
+                   :entity_type, inserted.id, 'upsert', now()
+            FROM inserted, reserved
+        )
+        SELECT (SELECT count(*) FROM inserted) AS inserted,
+               ARRAY(
+                   SELECT line FROM {target.staging}
+                   EXCEPT SELECT line FROM new_rows
+                   ORDER BY 1 LIMIT :max_reported
+               ) AS skipped_lines
+    """
+
+
+def _rollup_delta_sql(target: _ImportTarget, resolution: str) -> str:
+    """
+    Add the inserted rows' totals to their periods' rollups, like
+    services.rollups.record_food_entry does for a single entry.
+    """
+    table = ROLLUP_MODELS[resolution].__tablename__
+    bucket = "week" if resolution == "weekly" else "month"
+    totals = [
+        column for column in ROLLUP_MODELS[resolution].__table__.columns.keys()
+        if column not in ("id", "user_id", "period_start", "updated_at")
+    ]
+    sums = ", ".join(
+        f"COALESCE(SUM({target.rollup_columns[column]}), 0)" if column in target.rollup_columns else "0"
+        for column in totals
+    )
+    updates = ", ".join(f"{column} = {table}.{column} + excluded.{column}" for column in target.rollup_columns)
+    return f"""
+            INSERT INTO {table} (user_id, period_start, {", ".join(totals)}, updated_at)
+            SELECT :user_id, date_trunc('{bucket}', {target.identity[0]})::date, {sums}, now()
+            FROM inserted
+            GROUP BY 2
+            ON CONFLICT (user_id, period_start) DO UPDATE SET {updates}, updated_at = now()
+        """
+
+
+class HistoryImportError(Exception):
+    """Raised when the uploaded file cannot be imported at all."""
+
+
+def import_history(db: Session, user_id: int, lines: Iterable[str], dataset: Optional[str] = None) -> Dict:
+    """
+    Import a CSV history for a user and commit.
+
+    Args:
+        db: Database session
+        user_id: Owner of the imported rows
+        lines: CSV text lines (e.g. a text-mode file object)
+        dataset: Dataset for files without a record_type column
+
+    Returns:
+        Counts of staged/inserted/skipped rows and the first skipped lines
+        per dataset, plus validation errors
+    """
+    reader = csv.DictReader(lines)
+    fieldnames = reader.fieldnames or []
+    if "record_type" not in fieldnames and dataset not in IMPORT_TARGETS:
+        raise HistoryImportError("CSV has no record_type column; specify the dataset (food, exercise or weight)")
+
+    for target in IMPORT_TARGETS.values():
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in target.columns.items())
+        db.execute(text(f"CREATE TEMP TABLE {target.staging} (line integer, {columns}) ON COMMIT DROP"))
+
+    # Validated rows with their line numbers, per dataset
+    buffers: Dict[str, List[Tuple[int, BaseModel]]] = {name: [] for name in IMPORT_TARGETS}
+    staged = {name: 0 for name in IMPORT_TARGETS}
+    errors: List[Dict] = []
+    error_count = 0
+
+    # Line 1 is the header
+    for line_number, row in enumerate(reader, start=2):
+        record_type = row.get("record_type") or dataset
+        target = IMPORT_TARGETS.get(record_type)
+        if target is None:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": f"Unknown record_type '{record_type}'"})
+            continue
+
+        values = {
+            key: value for key, value in row.items()
+            if key in target.schema.model_fields and value not in ("", None)
+        }
+        try:
+            buffers[record_type].append((line_number, target.schema.model_validate(values)))
+        except ValidationError as e:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": _summarize_validation_error(e)})
+            continue
+
+        if len(buffers[record_type]) >= IMPORT_BATCH_SIZE:
+            staged[record_type] += _copy_batch(db, target, buffers[record_type])
+            buffers[record_type] = []
+
+    for name, target in IMPORT_TARGETS.items():
+        if buffers[name]:
+            staged[name] += _copy_batch(db, target, buffers[name])
+
+    # Concurrent imports for the same user merge one after the other, so
+    # each sees the other's rows as existing
+    db.execute(text("SELECT 1 FROM users WHERE id = :user_id FOR UPDATE"), {"user_id": user_id})
+
+    # Each merge also appends its rows to the sync change log
+    inserted = {}
+    skipped_lines = {}
+    for name, target in IMPORT_TARGETS.items():
+        if not staged[name]:
+            inserted[name], skipped_lines[name] = 0, []
+            continue
+        inserted[name], skipped_lines[name] = db.execute(
+            text(_merge_sql(target)),
+            {"user_id": user_id, "entity_type": name, "max_reported": MAX_REPORTED_ERRORS}
+        ).one()
+
+    # Derived data is recomputed once for the whole import
+    if any(inserted.values()):
+        recompute_streak(db, user_id)
+        bump_data_version(db, user_id)
+
+    db.commit()
+
+    return {
+        "staged": staged,
+        "inserted": inserted,
+        "skipped_duplicates": {name: staged[name] - inserted[name] for name in IMPORT_TARGETS},
+        "skipped_lines": skipped_lines,
+        "invalid_rows": error_count,
+        "errors": errors,
+    }
+
+
+def _copy_batch(db: Session, target: _ImportTarget, rows: List[Tuple[int, BaseModel]]) -> int:
+    """
+    COPY a batch of validated rows and their line numbers into the target's staging table.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    columns = list(target.columns)
+    for line_number, row in rows:
+        writer.writerow([line_number] + [_copy_value(getattr(row, column)) for column in columns])
+    buffer.seek(0)
+
+    # COPY goes through the raw DBAPI connection of the session's transaction
+    raw_connection = db.connection().connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {target.staging} (line, {', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+    return len(rows)
+
+
+def _copy_value(value):
+    """CSV representation for COPY: NULL is an unquoted empty field."""
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _summarize_validation_error(error: ValidationError) -> str:
+    """One-line description of the first few validation problems."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()[:3]
+    )
+
+
+# CLI: python -m services.data_import <user_id> <file.csv> [dataset]
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+
+    if len(sys.argv) < 3:
+        print("Usage: python -m services.data_import <user_id> <file.csv> [food|exercise|weight]")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        with open(sys.argv[2], newline="", encoding="utf-8-sig") as csv_file:
+            result = import_history(db, int(sys.argv[1]), csv_file, sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"Inserted: {result['inserted']}")
+        print(f"Skipped duplicates: {result['skipped_duplicates']}")
+        for name, lines in result["skipped_lines"].items():
+            if lines:
+                print(f"  {name}: line {', '.join(str(line) for line in lines)}")
+        print(f"Invalid rows: {result['invalid_rows']}")
+        for error in result["errors"]:
+            print(f"  line {error['line']}: {error['error']}")
+    finally:
+        db.close()
@@ -14,6 +14,10 @@ from sqlalchemy import or_
 from models import FoodMaster
 from services.openfoodfacts_service import OpenFoodFactsService
 from services.usda_service import USDAService
+from utils.metrics import food_lookups, food_results, cache_write_batch
+from utils.log import get_logger, log_fields, LOG_SAMPLE_RATE
+
+logger = get_logger(__name__)
 
 
 class FoodAggregator:
@@ -22,8 +26,10 @@ class FoodAggregator:
     Priority: Internal DB -> Open Food Facts -> USDA
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, read_db: Optional[Session] = None):
         self.db = db
+        # Catalog lookups may use a read replica; caching writes go to db
+        self.read_db = read_db or db
         self.openfoodfacts = OpenFoodFactsService()
         self.usda = USDAService()
     
@@ -49,8 +55,10 @@ class FoodAggregator:
         # Step 1: Search internal database
         internal_results = self._search_internal(query, limit)
         results.extend(internal_results)
+        food_results.inc("internal", amount=len(internal_results))
+        answered_by = "internal" if internal_results else "miss"
         
-        print(f"[FOOD AGGREGATOR] Found {len(internal_results)} results in internal database")
+        logger.debug("Internal food search", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, results=len(internal_results)))
         
         # Step 2: If we need more results, query external APIs
         remaining = limit - len(results)
@@ -60,10 +68,13 @@ class FoodAggregator:
             # Cache external results in database
             if external_results:
                 self._cache_results(external_results)
+                answered_by = "external"
             
             results.extend(external_results)
-            print(f"[FOOD AGGREGATOR] Found {len(external_results)} results from external APIs")
+            food_results.inc("external", amount=len(external_results))
+            logger.debug("External food search", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, results=len(external_results)))
         
+        food_lookups.inc("search", answered_by)
         return results[:limit]
     
     def search_by_barcode(self, barcode: str) -> Optional[Dict]:
@@ -77,24 +88,27 @@ class FoodAggregator:
             Food item data if found
         """
         # Check internal database first
-        food = self.db.query(FoodMaster).filter(
+        food = self.read_db.query(FoodMaster).filter(
             FoodMaster.barcode == barcode
         ).first()
         
         if food:
-            print(f"[FOOD AGGREGATOR] Found barcode in internal database: {barcode}")
+            food_lookups.inc("barcode", "internal")
+            logger.debug("Barcode found internally", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, barcode=barcode))
             return self._food_master_to_dict(food)
         
         # Try external APIs
-        print(f"[FOOD AGGREGATOR] Searching external APIs for barcode: {barcode}")
+        logger.debug("Barcode lookup going external", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, barcode=barcode))
         
         # Try Open Food Facts
         result = self.openfoodfacts.search_by_barcode(barcode)
         if result:
+            food_lookups.inc("barcode", "external")
             # Cache the result
             self._cache_results([result])
             return result
         
+        food_lookups.inc("barcode", "miss")
         return None
     
     def _search_internal(self, query: str, limit: int) -> List[Dict]:
@@ -103,7 +117,7 @@ class FoodAggregator:
         """
         query_lower = f"%{query.lower()}%"
         
-        foods = self.db.query(FoodMaster).filter(
+        foods = self.read_db.query(FoodMaster).filter(
             or_(
                 FoodMaster.food_name.ilike(query_lower),
                 FoodMaster.brand_name.ilike(query_lower)
@@ -126,22 +140,22 @@ class FoodAggregator:
         try:
             openfoodfacts_results = self.openfoodfacts.search_food(query, per_source_limit)
             all_results.extend(openfoodfacts_results)
-        except Exception as e:
-            print(f"[FOOD AGGREGATOR] Open Food Facts search error: {e}")
+        except Exception:
+            logger.warning("Open Food Facts search failed", exc_info=True, extra=log_fields(query=query))
         
         # Query USDA
         try:
             usda_results = self.usda.search_food(query, per_source_limit)
             all_results.extend(usda_results)
-        except Exception as e:
-            print(f"[FOOD AGGREGATOR] USDA search error: {e}")
+        except Exception:
+            logger.warning("USDA search failed", exc_info=True, extra=log_fields(query=query))
         
         # Remove duplicates based on food_name + brand_name
         seen = set()
         unique_results = []
         
         for result in all_results:
-            key = (result["food_name"].lower(), result.get("brand_name", "").lower())
+            key = (result["food_name"].lower(), (result.get("brand_name") or "").lower())
             if key not in seen:
                 seen.add(key)
                 unique_results.append(result)
@@ -153,6 +167,7 @@ class FoodAggregator:
         Cache external API results in the food_master table.
         Avoids duplicates by checking external_id + source.
         """
+        added = 0
         for result in results:
             # Check if this food already exists in database
             existing = self.db.query(FoodMaster).filter(
@@ -183,14 +198,16 @@ class FoodAggregator:
             )
             
             self.db.add(food_master)
+            added += 1
         
         # Commit all new entries
         try:
             self.db.commit()
-            print(f"[FOOD AGGREGATOR] Cached {len(results)} new food items")
-        except Exception as e:
+            cache_write_batch.observe(added)
+            logger.debug("Cached food items", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, added=added, fetched=len(results)))
+        except Exception:
             self.db.rollback()
-            print(f"[FOOD AGGREGATOR] Error caching results: {e}")
+            logger.error("Caching food results failed", exc_info=True, extra=log_fields(fetched=len(results)))
     
     def _food_master_to_dict(self, food: FoodMaster) -> Dict:
         """
@@ -0,0 +1,199 @@
+"""
+Maintenance Jobs
+Periodic housekeeping run by the in-process scheduler (utils/scheduler.py).
+Importing this module registers the jobs; all but the cache prune run on
+the leader worker only:
+
+- partitions: create upcoming entry partitions and archive months past
+  PARTITION_RETAIN_MONTHS (services/partitions.py)
+- streaks: zero current_streak for users who haven't logged since before
+  yesterday, so stored streaks match what the next food log would compute
+- rollups: delete weekly/monthly rollup rows whose totals went back to
+  zero after their entries were deleted (a missing row reads as zero)
+- sync_mutations: delete push idempotency records older than
+  SYNC_MUTATION_RETENTION_DAYS
+- analytics_cache: drop expired analytics cache entries (every worker)
+
+    SYNC_MUTATION_RETENTION_DAYS   days a pushed mutation can be replayed (default 30)
+
+Each job bounds its statements with statement_timeout (and DDL waits with
+lock_timeout) so a stuck run gives up in the database, not only in the
+scheduler. Any job can be run by hand:
+
+    python -m services.maintenance streaks
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import text, update
+from sqlalchemy.orm import Session
+import config  # noqa: F401  (loads .env)
+from database import engine, SessionLocal
+from models import Streak, User
+from services.analytics import prune_analytics_cache
+from services.partitions import ensure_partitions, archive_partitions
+from services.rollups import ROLLUP_MODELS
+from utils.log import get_logger, log_fields
+from utils.principal_cache import mark_user_changed
+from utils.scheduler import schedule_job
+
+logger = get_logger(__name__)
+
+SYNC_MUTATION_RETENTION_DAYS = int(os.getenv("SYNC_MUTATION_RETENTION_DAYS", "30"))
+
+# Rows deleted per statement, so a large backlog doesn't hold locks for long
+DELETE_BATCH_SIZE = 5000
+
+# Totals closer to zero than this are float residue of deleted entries
+ROLLUP_ZERO_EPSILON = 0.005
+
+
+def _bound_statements(db, timeout_s: float, lock_timeout_s: Optional[float] = None) -> None:
+    """Limit each statement of the current transaction (SET LOCAL)."""
+    db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_s * 1000)}"))
+    if lock_timeout_s is not None:
+        db.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_s * 1000)}"))
+
+
+def create_entry_partitions() -> List[str]:
+    """
+    Create upcoming partitions (also called on startup). Gives up after
+    waiting 10s for a table lock rather than stalling behind long queries.
+    """
+    with engine.begin() as connection:
+        _bound_statements(connection, 300, lock_timeout_s=10)
+        return ensure_partitions(connection)
+
+
+def maintain_entry_partitions() -> List[str]:
+    """
+    Create upcoming partitions, then archive expired months, in separate
+    transactions so a failed archive doesn't undo the creation.
+    """
+    changed = create_entry_partitions()
+    with engine.begin() as connection:
+        _bound_statements(connection, 300, lock_timeout_s=10)
+        archived = archive_partitions(connection)
+    if changed or archived:
+        logger.info("Maintained entry partitions", extra=log_fields(created=changed, archived=archived))
+    return changed + archived
+
+
+def reset_lapsed_streaks(today: Optional[date] = None) -> int:
+    """
+    Zero the current streak of users whose last log is older than yesterday
+    and bump their data version so cached dashboards revalidate.
+    Returns the number of streaks reset.
+    """
+    yesterday = (today or date.today()) - timedelta(days=1)
+    db: Session = SessionLocal()
+    try:
+        _bound_statements(db, 120)
+        user_ids = db.execute(
+            update(Streak)
+            .where(Streak.current_streak > 0, Streak.last_logged_date < yesterday)
+            .values(current_streak=0, updated_at=datetime.utcnow())
+            .returning(Streak.user_id)
+        ).scalars().all()
+        if user_ids:
+            db.execute(
+                update(User)
+                .where(User.id.in_(user_ids))
+                .values(data_version=User.data_version + 1)
+            )
+            for user_id in user_ids:
+                mark_user_changed(db, user_id)
+        db.commit()
+    finally:
+        db.close()
+    if user_ids:
+        logger.info("Reset lapsed streaks", extra=log_fields(users=len(user_ids)))
+    return len(user_ids)
+
+
+def compact_rollups() -> int:
+    """
+    Delete rollup rows whose totals are all zero. Returns the rows deleted.
+    A row an entry write updates concurrently no longer matches and is
+    kept; a write that lands after the delete re-inserts it.
+    """
+    columns = ("calories_consumed", "calories_burned", "protein_g", "carbs_g", "fat_g")
+    empty = " AND ".join(f"abs({column}) < :epsilon" for column in columns)
+    deleted = 0
+    for model in ROLLUP_MODELS.values():
+        deleted += _delete_in_batches(model.__tablename__, empty, {"epsilon": ROLLUP_ZERO_EPSILON})
+    if deleted:
+        logger.info("Compacted rollups", extra=log_fields(rows=deleted))
+    return deleted
+
+
+def prune_sync_mutations(retention_days: int = SYNC_MUTATION_RETENTION_DAYS) -> int:
+    """
+    Delete idempotency records of pushes older than the retention. A client
+    replaying an older batch re-applies it, so keep this longer than any
+    client stays offline. Returns the rows deleted.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = _delete_in_batches("sync_mutations", "created_at < :cutoff", {"cutoff": cutoff})
+    if deleted:
+        logger.info("Pruned sync mutations", extra=log_fields(rows=deleted, retention_days=retention_days))
+    return deleted
+
+
+def _delete_in_batches(table: str, condition: str, params: dict) -> int:
+    """
+    Delete the rows matching `condition`, DELETE_BATCH_SIZE per transaction.
+    The batch subquery isn't re-checked against concurrent updates under
+    READ COMMITTED, so the condition is repeated on the DELETE; rows locked
+    by other transactions are left for the next run.
+    """
+    deleted = 0
+    while True:
+        with engine.begin() as connection:
+            _bound_statements(connection, 60)
+            count = connection.execute(text(f"""
+                DELETE FROM {table}
+                WHERE id IN (SELECT id FROM {table} WHERE {condition} LIMIT :batch FOR UPDATE SKIP LOCKED)
+                  AND {condition}
+            """), {**params, "batch": DELETE_BATCH_SIZE}).rowcount
+        deleted += count
+        if count < DELETE_BATCH_SIZE:
+            return deleted
+
+
+def prune_analytics() -> int:
+    pruned = prune_analytics_cache()
+    if pruned:
+        logger.debug("Pruned analytics cache", extra=log_fields(entries=pruned))
+    return pruned
+
+
+# Streak dates use the server's local day, so check hourly rather than at UTC midnight
+schedule_job("partitions", maintain_entry_partitions, cron="17 3 * * *", jitter=300, timeout=900)
+schedule_job("streaks", reset_lapsed_streaks, cron="5 * * * *", jitter=60, timeout=300)
+schedule_job("rollups", compact_rollups, cron="40 4 * * *", jitter=300, timeout=900)
+schedule_job("sync_mutations", prune_sync_mutations, cron="10 5 * * *", jitter=300, timeout=900)
+schedule_job("analytics_cache", prune_analytics, every=300, jitter=30, timeout=60, leader=False)
+
+JOBS = {
+    "partitions": maintain_entry_partitions,
+    "streaks": reset_lapsed_streaks,
+    "rollups": compact_rollups,
+    "sync_mutations": prune_sync_mutations,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run a maintenance job once.")
+    parser.add_argument("job", choices=sorted(JOBS))
+    args = parser.parse_args(argv)
+    result = JOBS[args.job]()
+    print(f"{args.job}: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
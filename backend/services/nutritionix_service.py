@@ -6,9 +6,11 @@ Currently uses mock responses for development.
 
 import os
 from typing import List, Dict, Optional
-from dotenv import load_dotenv
+import config  # noqa: F401  (loads .env)
+from utils.metrics import upstream_call
+from utils.log import get_logger, log_fields, LOG_SAMPLE_RATE
 
-load_dotenv()
+logger = get_logger(__name__)
 
 # ====================================================================
 # PLACEHOLDER: Add your Nutritionix API credentials in .env file
@@ -70,8 +72,9 @@ class NutritionixService:
         #     return []
         # ====================================================================
         
-        print(f"[NUTRITIONIX SERVICE] Would search for: '{query}' (limit: {limit})")
-        return self._get_mock_results(query, limit)
+        logger.debug("Nutritionix mock search", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, query=query, limit=limit))
+        with upstream_call("nutritionix"):
+            return self._get_mock_results(query, limit)
     
     def search_by_barcode(self, barcode: str) -> Optional[Dict]:
         """
@@ -105,8 +108,9 @@ class NutritionixService:
         #     return None
         # ====================================================================
         
-        print(f"[NUTRITIONIX SERVICE] Would search barcode: {barcode}")
-        return self._get_mock_barcode_result(barcode)
+        logger.debug("Nutritionix mock barcode lookup", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, barcode=barcode))
+        with upstream_call("nutritionix"):
+            return self._get_mock_barcode_result(barcode)
     
     def _parse_nutritionix_response(self, data: Dict) -> List[Dict]:
         """Parse Nutritionix API response into standardized format"""
@@ -7,15 +7,24 @@ Website: https://world.openfoodfacts.org/
 API Docs: https://openfoodfacts.github.io/openfoodfacts-server/api/
 """
 
+import os
 import requests
 from typing import List, Dict, Optional
+import config  # noqa: F401  (loads .env)
+from utils.metrics import upstream_call, upstream_errors
+from utils.log import get_logger, log_fields
+
+logger = get_logger(__name__)
+
+# Overridable so load tests can use a local stand-in (perf/loadtest.py)
+OPENFOODFACTS_URL = os.getenv("OPENFOODFACTS_URL", "https://world.openfoodfacts.org")
 
 
 class OpenFoodFactsService:
     """Service for interacting with Open Food Facts API"""
     
     def __init__(self):
-        self.base_url = "https://world.openfoodfacts.org"
+        self.base_url = OPENFOODFACTS_URL
         self.api_version = "api/v2"
         # User agent is recommended by Open Food Facts
         self.headers = {
@@ -45,17 +54,19 @@ class OpenFoodFactsService:
                          "code,nutrition_grade_fr,categories,image_url"
             }
             
-            response = requests.get(url, params=params, headers=self.headers, timeout=10)
+            with upstream_call("openfoodfacts"):
+                response = requests.get(url, params=params, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 return self._parse_openfoodfacts_response(data)
             else:
-                print(f"[OPENFOODFACTS] Error: Status {response.status_code}")
+                upstream_errors.inc("openfoodfacts")
+                logger.warning("Open Food Facts search failed", extra=log_fields(status=response.status_code))
                 return []
                 
-        except Exception as e:
-            print(f"[OPENFOODFACTS] Exception during search: {e}")
+        except Exception:
+            logger.warning("Open Food Facts search failed", exc_info=True)
             return []
     
     def search_by_barcode(self, barcode: str) -> Optional[Dict]:
@@ -72,18 +83,21 @@ class OpenFoodFactsService:
             # Product endpoint
             url = f"{self.base_url}/api/v2/product/{barcode}.json"
             
-            response = requests.get(url, headers=self.headers, timeout=10)
+            with upstream_call("openfoodfacts"):
+                response = requests.get(url, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get("status") == 1:  # Product found
                     product = data.get("product", {})
                     return self._parse_single_product(product)
+            elif response.status_code != 404:
+                upstream_errors.inc("openfoodfacts")
             
             return None
             
-        except Exception as e:
-            print(f"[OPENFOODFACTS] Exception during barcode lookup: {e}")
+        except Exception:
+            logger.warning("Open Food Facts barcode lookup failed", exc_info=True, extra=log_fields(barcode=barcode))
             return None
     
     def _parse_openfoodfacts_response(self, data: Dict) -> List[Dict]:
@@ -131,8 +145,8 @@ class OpenFoodFactsService:
                 "categories": product.get("categories", "").split(",") if product.get("categories") else []
             }
             
-        except Exception as e:
-            print(f"[OPENFOODFACTS] Error parsing product: {e}")
+        except Exception:
+            logger.debug("Skipping unparseable Open Food Facts product", exc_info=True)
             return None
     
     def get_product_by_id(self, product_id: str) -> Optional[Dict]:
@@ -0,0 +1,262 @@
+"""
+Entry Table Partitioning
+food_entries and exercise_entries are range-partitioned by entry_date, one
+partition per calendar month (food_entries_p2026_01, ...), plus a default
+partition for dates no monthly partition covers (e.g. imported history).
+Queries that filter on entry_date only scan the months they touch, and
+old months can be detached without rewriting the table.
+
+    PARTITION_MONTHS_AHEAD    future months kept ready (default 3)
+    PARTITION_RETAIN_MONTHS   months kept attached by `archive`; older months are
+                              moved to PARTITION_ARCHIVE_SCHEMA (default 0: keep all)
+    PARTITION_ARCHIVE_SCHEMA  schema for archived partitions (default archive)
+
+`ensure` runs on application startup and both run daily from the
+scheduler (services/maintenance.py); by hand:
+
+    python -m services.partitions ensure    # create upcoming months, split the default partition
+    python -m services.partitions archive   # detach months older than the retention
+    python -m services.partitions restore food_entries 2024-01
+    python -m services.partitions list
+
+Archived months no longer appear in entry listings, exports or streaks.
+Weekly and monthly rollups keep their totals, so long-range progress
+charts are unaffected.
+"""
+
+import argparse
+import os
+import re
+import sys
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_RETAIN_MONTHS = int(os.getenv("PARTITION_RETAIN_MONTHS", "0"))
+PARTITION_ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+
+PARTITIONED_TABLES = ("food_entries", "exercise_entries")
+
+# Serializes partition DDL across workers and hosts
+PARTITION_LOCK_KEY = 7310401
+
+_BOUND_PATTERN = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+_MONTH_NAME_PATTERN = re.compile(rf"(?:{'|'.join(PARTITIONED_TABLES)})_p(\d{{4}})_(\d{{2}})")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def is_partition_name(name: str) -> bool:
+    """True for the name of a monthly or default partition of an entry table."""
+    return any(re.fullmatch(rf"{table}_(p\d{{4}}_\d{{2}}|default)", name) for table in PARTITIONED_TABLES)
+
+
+def is_partitioned(connection: Connection, table: str) -> bool:
+    return connection.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table}
+    ).scalar() is True
+
+
+def list_partitions(connection: Connection, table: str) -> List[Dict]:
+    """
+    Attached partitions of a table, oldest first, with their month ranges
+    (start/end are None for the default partition).
+    """
+    rows = connection.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+    """), {"table": table}).all()
+
+    partitions = []
+    for name, bound, estimated_rows in rows:
+        match = _BOUND_PATTERN.search(bound)
+        partitions.append({
+            "name": name,
+            "start": date.fromisoformat(match.group(1)) if match else None,
+            "end": date.fromisoformat(match.group(2)) if match else None,
+            "estimated_rows": max(int(estimated_rows), 0),
+        })
+    return sorted(partitions, key=lambda partition: partition["start"] or date.max)
+
+
+def archived_through(connection: Connection) -> Optional[date]:
+    """
+    First day after the newest archived month of any entry table (so data
+    from this date on is attached), or None if nothing has been archived.
+    """
+    names = connection.execute(
+        text("SELECT table_name FROM information_schema.tables WHERE table_schema = :schema"),
+        {"schema": PARTITION_ARCHIVE_SCHEMA}
+    ).scalars()
+    months = [
+        date(int(match.group(1)), int(match.group(2)), 1)
+        for match in map(_MONTH_NAME_PATTERN.fullmatch, names) if match
+    ]
+    return add_months(max(months), 1) if months else None
+
+
+def ensure_partitions(
+    connection: Connection,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    today: Optional[date] = None,
+    first_month: Optional[date] = None
+) -> List[str]:
+    """
+    Create monthly partitions from the current month (or first_month, to
+    prepare for loading history) through months_ahead, and move any month
+    found in the default partition into its own partition. Returns the
+    names of the partitions created. Skips the work when another process
+    holds the partition lock.
+    """
+    if not connection.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY}).scalar():
+        return []
+
+    current = month_start(today or date.today())
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+        existing = {partition["start"] for partition in list_partitions(connection, table)}
+        wanted = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        month = month_start(first_month or current)
+        while month < current:
+            wanted.add(month)
+            month = add_months(month, 1)
+        wanted.update(connection.execute(text(
+            f"SELECT DISTINCT date_trunc('month', entry_date)::date FROM {default_partition_name(table)}"
+        )).scalars())
+
+        for month in sorted(wanted - existing):
+            _create_partition(connection, table, month)
+            created.append(partition_name(table, month))
+    return created
+
+
+def archive_partitions(
+    connection: Connection,
+    retain_months: int = PARTITION_RETAIN_MONTHS,
+    today: Optional[date] = None
+) -> List[str]:
+    """
+    Detach monthly partitions that ended more than retain_months ago and
+    move them to the archive schema. Returns the archived names.
+    A retention of 0 keeps everything.
+    """
+    if retain_months <= 0:
+        return []
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+
+    cutoff = add_months(month_start(today or date.today()), -retain_months)
+    connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {PARTITION_ARCHIVE_SCHEMA}"))
+    archived = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+        for partition in list_partitions(connection, table):
+            if partition["end"] is None or partition["end"] > cutoff:
+                continue
+            connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition['name']}"))
+            connection.execute(text(f"ALTER TABLE {partition['name']} SET SCHEMA {PARTITION_ARCHIVE_SCHEMA}"))
+            archived.append(partition["name"])
+    return archived
+
+
+def restore_partition(connection: Connection, table: str, month: date) -> str:
+    """
+    Move an archived month back into the table. Fails if the default
+    partition has since received rows for that month.
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+
+    month = month_start(month)
+    name = partition_name(table, month)
+    schema = connection.execute(text("SELECT current_schema()")).scalar()
+    connection.execute(text(f"ALTER TABLE {PARTITION_ARCHIVE_SCHEMA}.{name} SET SCHEMA {schema}"))
+    connection.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} {_bounds(month)}"
+    ))
+    return name
+
+
+def _create_partition(connection: Connection, table: str, month: date) -> None:
+    """
+    Create one month's partition. Rows for that month already sitting in
+    the default partition are moved into it before it is attached.
+    """
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    in_range = "entry_date >= :start AND entry_date < :end"
+    params = {"start": month, "end": add_months(month, 1)}
+
+    has_rows = connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"), params).scalar()
+    if not has_rows:
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {_bounds(month)}"))
+        return
+
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    connection.execute(text(f"""
+        WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING *)
+        INSERT INTO {name} SELECT * FROM moved
+    """), params)
+    connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {_bounds(month)}"))
+
+
+def _bounds(month: date) -> str:
+    return f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain monthly partitions of the entry tables.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="create upcoming months and split the default partition")
+    ensure.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    archive = commands.add_parser("archive", help="detach months older than the retention")
+    archive.add_argument("--retain-months", type=int, default=PARTITION_RETAIN_MONTHS)
+    restore = commands.add_parser("restore", help="re-attach an archived month")
+    restore.add_argument("table", choices=PARTITIONED_TABLES)
+    restore.add_argument("month", help="YYYY-MM")
+    commands.add_parser("list", help="show attached partitions")
+    args = parser.parse_args(argv)
+
+    from database import engine
+
+    with engine.begin() as connection:
+        if args.command == "ensure":
+            names = ensure_partitions(connection, args.months_ahead)
+            print(f"Created {len(names)} partition(s): {', '.join(names) or '-'}")
+        elif args.command == "archive":
+            names = archive_partitions(connection, args.retain_months)
+            print(f"Archived {len(names)} partition(s) to {PARTITION_ARCHIVE_SCHEMA}: {', '.join(names) or '-'}")
+        elif args.command == "restore":
+            name = restore_partition(connection, args.table, date.fromisoformat(f"{args.month}-01"))
+            print(f"Restored {name}")
+        else:
+            for table in PARTITIONED_TABLES:
+                for partition in list_partitions(connection, table):
+                    span = f"{partition['start']} .. {partition['end']}" if partition["start"] else "default"
+                    print(f"{partition['name']:32} {span:26} ~{partition['estimated_rows']} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Nutrition Rollups
+Maintains weekly and monthly pre-aggregated totals so that long-range
+progress charts read a few hundred rows instead of scanning food_entries.
+
+Rollups are updated incrementally in the same transaction as the entry
+write (apply a delta on create, reverse it on delete, both on update).
+`rebuild_rollups` recomputes a user's rows from scratch with set-based SQL.
+Periods before archived_through() (services.partitions) are left alone:
+their entries were archived, and the rollups are all that remain of them.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from models import FoodEntry, ExerciseEntry, WeeklyRollup, MonthlyRollup
+from services.partitions import archived_through
+
+ROLLUP_MODELS = {
+    "weekly": WeeklyRollup,
+    "monthly": MonthlyRollup,
+}
+
+# Ranges up to these many days are served at the given resolution
+DAILY_MAX_DAYS = 90
+WEEKLY_MAX_DAYS = 730
+
+
+def week_start(day: date) -> date:
+    """Monday of the week containing `day` (matches Postgres date_trunc('week'))."""
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    """First day of the month containing `day`."""
+    return day.replace(day=1)
+
+
+def period_start(resolution: str, day: date) -> date:
+    """Start of the weekly/monthly bucket containing `day`."""
+    return week_start(day) if resolution == "weekly" else month_start(day)
+
+
+def next_period_start(resolution: str, start: date) -> date:
+    """Start of the bucket following the one that begins at `start`."""
+    if resolution == "weekly":
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def pick_resolution(days: int, resolution: Optional[str] = None) -> str:
+    """
+    Choose daily/weekly/monthly buckets for a chart covering `days` days.
+    An explicit resolution wins, except that daily is capped at
+    DAILY_MAX_DAYS (longer ranges would scan raw entries instead of the
+    rollups) and falls back to the automatic choice.
+    """
+    if resolution and not (resolution == "daily" and days > DAILY_MAX_DAYS):
+        return resolution
+    if days <= DAILY_MAX_DAYS:
+        return "daily"
+    if days <= WEEKLY_MAX_DAYS:
+        return "weekly"
+    return "monthly"
+
+
+def record_food_entry(db: Session, entry: FoodEntry, sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) a food entry's totals from its rollups.
+    Does not commit; the caller commits together with the entry change.
+    """
+    _apply_delta(db, entry.user_id, entry.entry_date, {
+        "calories_consumed": sign * (entry.calories or 0),
+        "protein_g": sign * (entry.protein_g or 0),
+        "carbs_g": sign * (entry.carbs_g or 0),
+        "fat_g": sign * (entry.fat_g or 0),
+    })
+
+
+def record_exercise_entry(db: Session, entry: ExerciseEntry, sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) an exercise entry's calories from its rollups.
+    Does not commit; the caller commits together with the entry change.
+    """
+    _apply_delta(db, entry.user_id, entry.entry_date, {
+        "calories_burned": sign * (entry.calories_burned or 0),
+    })
+
+
+def _apply_delta(db: Session, user_id: int, entry_date: date, delta: Dict[str, float]) -> None:
+    """
+    Upsert the weekly and monthly rows for a date, adding `delta` to their totals.
+    """
+    for resolution, model in ROLLUP_MODELS.items():
+        table = model.__table__
+        stmt = insert(table).values(
+            user_id=user_id,
+            period_start=period_start(resolution, entry_date),
+            **delta
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.period_start],
+            set_={
+                **{column: table.c[column] + stmt.excluded[column] for column in delta},
+                "updated_at": func.now(),
+            }
+        )
+        db.execute(stmt)
+
+
+def rebuild_rollups(db: Session, user_id: int, since: Optional[date] = None) -> None:
+    """
+    Recompute a user's rollup rows from food_entries and exercise_entries,
+    for the periods starting on or after `since` and after any archived
+    months. Used after bulk loads and by maintenance jobs to correct drift.
+    """
+    since = max(filter(None, (since, archived_through(db.connection()))), default=date.min)
+    params = {"user_id": user_id, "since": since}
+    for resolution, model in ROLLUP_MODELS.items():
+        table = model.__tablename__
+        bucket = "week" if resolution == "weekly" else "month"
+        db.execute(text(f"DELETE FROM {table} WHERE user_id = :user_id AND period_start >= :since"), params)
+        db.execute(text(f"""
+            INSERT INTO {table}
+                (user_id, period_start, calories_consumed, calories_burned,
+                 protein_g, carbs_g, fat_g, updated_at)
+            SELECT :user_id, period_start,
+                   COALESCE(SUM(calories_consumed), 0), COALESCE(SUM(calories_burned), 0),
+                   COALESCE(SUM(protein_g), 0), COALESCE(SUM(carbs_g), 0),
+                   COALESCE(SUM(fat_g), 0), now()
+            FROM (
+                SELECT date_trunc('{bucket}', entry_date)::date AS period_start,
+                       calories AS calories_consumed, 0 AS calories_burned,
+                       protein_g, carbs_g, fat_g
+                FROM food_entries WHERE user_id = :user_id AND entry_date >= :since
+                UNION ALL
+                SELECT date_trunc('{bucket}', entry_date)::date,
+                       0, calories_burned, 0, 0, 0
+                FROM exercise_entries WHERE user_id = :user_id AND entry_date >= :since
+            ) AS combined
+            WHERE period_start >= :since
+            GROUP BY period_start
+        """), params)
+
+
+# Backfill: rebuild rollups for every user (python -m services.rollups)
+if __name__ == "__main__":
+    from database import SessionLocal
+    from models import User
+    
+    db = SessionLocal()
+    try:
+        user_ids = [row.id for row in db.query(User.id).all()]
+        for user_id in user_ids:
+            rebuild_rollups(db, user_id)
+            db.commit()
+        print(f"Rebuilt rollups for {len(user_ids)} users")
+        cutoff = archived_through(db.connection())
+        if cutoff:
+            print(f"Periods before {cutoff} were kept (their entries are archived)")
+    finally:
+        db.close()
@@ -0,0 +1,52 @@
+"""
+Streak Reconciliation
+Recomputes a user's streak from their food log history in one query, for
+use after bulk imports and by maintenance jobs. The per-request update in
+the food router remains the normal path.
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from models import Streak
+
+
+def recompute_streak(db: Session, user_id: int, today: Optional[date] = None) -> Streak:
+    """
+    Rebuild current/longest streak from distinct food entry dates using
+    gaps-and-islands. The current streak is the run ending today or
+    yesterday; longest never decreases. Does not commit.
+    """
+    today = today or date.today()
+
+    runs = db.execute(text("""
+        SELECT MAX(entry_date) AS run_end, COUNT(*) AS run_length
+        FROM (
+            SELECT entry_date,
+                   entry_date - (ROW_NUMBER() OVER (ORDER BY entry_date))::int AS run_key
+            FROM (
+                SELECT DISTINCT entry_date FROM food_entries
+                WHERE user_id = :user_id AND entry_date <= :today
+            ) AS days
+        ) AS numbered
+        GROUP BY run_key
+        ORDER BY run_end DESC
+    """), {"user_id": user_id, "today": today}).all()
+
+    streak = db.query(Streak).filter(Streak.user_id == user_id).first()
+    if not streak:
+        streak = Streak(user_id=user_id, current_streak=0, longest_streak=0)
+        db.add(streak)
+
+    if not runs:
+        streak.current_streak = 0
+        streak.last_logged_date = None
+        return streak
+
+    latest = runs[0]
+    streak.last_logged_date = latest.run_end
+    streak.current_streak = latest.run_length if latest.run_end >= today - timedelta(days=1) else 0
+    streak.longest_streak = max(streak.longest_streak or 0, max(run.run_length for run in runs))
+
+    return streak
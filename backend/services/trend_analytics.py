@@ -0,0 +1,238 @@
+"""
+Trend Analytics Computation
+NumPy implementation behind services.analytics: loads a user's daily series
+onto a contiguous grid and computes the smoothed weight trend, rolling
+intake averages, TDEE, adherence and goal projection.
+
+Imported on first use so NumPy stays out of application startup.
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from models import User, FoodEntry, ExerciseEntry, WeightLog
+
+# Smoothing factor for the daily weight trend (10% of each new reading)
+TREND_ALPHA = 0.1
+# Approximate energy content of one kg of body weight change
+KCAL_PER_KG = 7700
+# Net intake within this fraction of target counts as an on-target day
+ADHERENCE_TOLERANCE = 0.10
+# Window used for TDEE and trend-rate estimates
+ESTIMATE_WINDOW_DAYS = 28
+# Extra history loaded before the requested range to warm up averages and trend
+WARMUP_DAYS = 30
+
+# EWMA is evaluated in blocks so the (1 - alpha) ** -n scaling stays finite
+_EWMA_BLOCK = 256
+
+
+def compute_trend_analytics(user: User, days: int, db: Session) -> dict:
+    """
+    Load the user's daily series and compute all analytics for the last `days` days.
+    """
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    load_start = start_date - timedelta(days=WARMUP_DAYS)
+    total_days = (end_date - load_start).days + 1
+
+    intake, logged = _load_daily_totals(db, FoodEntry, FoodEntry.calories, user.id, load_start, end_date, total_days)
+    burned, _ = _load_daily_totals(db, ExerciseEntry, ExerciseEntry.calories_burned, user.id, load_start, end_date, total_days)
+    weights = _load_daily_weights(db, user.id, load_start, end_date, total_days)
+
+    trend = _weight_trend(weights)
+    avg_7d = _rolling_mean(intake, logged, 7)
+    avg_30d = _rolling_mean(intake, logged, 30)
+
+    # Only report the requested range; the warm-up days are discarded
+    visible = slice(WARMUP_DAYS, None)
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+    series = [
+        {
+            "date": day,
+            "weight_kg": _to_float(w),
+            "trend_kg": _to_float(t),
+            "calories_consumed": _to_float(c) if is_logged else None,
+            "avg_7d_calories": _to_float(a7),
+            "avg_30d_calories": _to_float(a30),
+        }
+        for day, w, t, c, is_logged, a7, a30 in zip(
+            dates, weights[visible], trend[visible], intake[visible],
+            logged[visible], avg_7d[visible], avg_30d[visible]
+        )
+    ]
+
+    window = slice(-min(ESTIMATE_WINDOW_DAYS, days), None)
+    rate_kg_per_day = _trend_slope(trend[window])
+    current_trend = _to_float(trend[-1])
+
+    days_to_goal, goal_eta = _goal_projection(current_trend, user.goal_weight_kg, rate_kg_per_day, end_date)
+
+    return {
+        "days": days,
+        "series": series,
+        "current_trend_kg": current_trend,
+        "weekly_rate_kg": _to_float(rate_kg_per_day * 7) if rate_kg_per_day is not None else None,
+        "estimated_tdee": _estimate_tdee(intake[window], logged[window], rate_kg_per_day),
+        "adherence_pct": _adherence_pct(intake[visible], burned[visible], logged[visible], user.target_calories),
+        "logged_days_pct": round(float(logged[visible].mean()) * 100, 1),
+        "target_calories": user.target_calories,
+        "goal_weight_kg": user.goal_weight_kg,
+        "days_to_goal": days_to_goal,
+        "goal_eta": goal_eta,
+    }
+
+
+def _load_daily_totals(db: Session, model, column, user_id: int, start: date, end: date, total_days: int):
+    """
+    Sum a column per day into a dense array. Also returns a mask of days with any entry.
+    """
+    rows = db.query(
+        model.entry_date,
+        func.sum(column).label('total')
+    ).filter(
+        model.user_id == user_id,
+        model.entry_date >= start,
+        model.entry_date <= end
+    ).group_by(model.entry_date).all()
+
+    totals = np.zeros(total_days)
+    mask = np.zeros(total_days, dtype=bool)
+    if rows:
+        offsets = np.fromiter(((row.entry_date - start).days for row in rows), dtype=np.int64, count=len(rows))
+        totals[offsets] = np.fromiter((row.total or 0 for row in rows), dtype=float, count=len(rows))
+        mask[offsets] = True
+
+    return totals, mask
+
+
+def _load_daily_weights(db: Session, user_id: int, start: date, end: date, total_days: int) -> np.ndarray:
+    """
+    Weight logs placed on a dense daily array, NaN on days without a log.
+    If several logs share a day, the latest one wins.
+    """
+    rows = db.query(WeightLog.log_date, WeightLog.weight_kg).filter(
+        WeightLog.user_id == user_id,
+        WeightLog.log_date >= start,
+        WeightLog.log_date <= end
+    ).order_by(WeightLog.log_date.asc(), WeightLog.created_at.asc()).all()
+
+    weights = np.full(total_days, np.nan)
+    if rows:
+        offsets = np.fromiter(((row.log_date - start).days for row in rows), dtype=np.int64, count=len(rows))
+        weights[offsets] = np.fromiter((row.weight_kg for row in rows), dtype=float, count=len(rows))
+
+    return weights
+
+
+def _weight_trend(weights: np.ndarray) -> np.ndarray:
+    """
+    Exponentially smoothed trend on the daily grid. Missing days are linearly
+    interpolated between logs and held flat after the last one; days before
+    the first log stay NaN.
+    """
+    trend = np.full_like(weights, np.nan)
+    observed = np.flatnonzero(~np.isnan(weights))
+    if observed.size == 0:
+        return trend
+
+    first = observed[0]
+    grid = np.arange(first, weights.size)
+    filled = np.interp(grid, observed, weights[observed])
+    trend[first:] = _ewma(filled, TREND_ALPHA)
+    return trend
+
+
+def _ewma(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Vectorized exponentially weighted moving average seeded with values[0].
+    Uses t_k = d^k * (d * t_prev + alpha * sum_j x_j * d^-j) per block, d = 1 - alpha.
+    """
+    decay = 1.0 - alpha
+    out = np.empty_like(values)
+    prev = values[0]
+    for start in range(0, values.size, _EWMA_BLOCK):
+        block = values[start:start + _EWMA_BLOCK]
+        powers = decay ** np.arange(block.size)
+        if start == 0:
+            # Seed so that t_0 == x_0
+            prev = block[0]
+        out_block = powers * (decay * prev + alpha * np.cumsum(block / powers))
+        out[start:start + block.size] = out_block
+        prev = out_block[-1]
+    return out
+
+
+def _rolling_mean(values: np.ndarray, mask: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over the last `window` days, counting only masked (logged) days.
+    NaN where the window contains no logged days.
+    """
+    sums = np.concatenate(([0.0], np.cumsum(np.where(mask, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(mask)))
+    upper = np.arange(1, values.size + 1)
+    lower = np.maximum(upper - window, 0)
+    window_counts = counts[upper] - counts[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, (sums[upper] - sums[lower]) / window_counts, np.nan)
+
+
+def _trend_slope(trend: np.ndarray) -> Optional[float]:
+    """
+    Least-squares slope of the trend in kg/day, or None with under a week of trend.
+    """
+    valid = ~np.isnan(trend)
+    if valid.sum() < 7:
+        return None
+    x = np.flatnonzero(valid).astype(float)
+    slope, _ = np.polyfit(x, trend[valid], 1)
+    return float(slope)
+
+
+def _estimate_tdee(intake: np.ndarray, logged: np.ndarray, rate_kg_per_day: Optional[float]) -> Optional[int]:
+    """
+    Energy balance: expenditure = average intake - weight change * kcal/kg.
+    Needs a trend rate and at least a week of logged intake.
+    """
+    if rate_kg_per_day is None or logged.sum() < 7:
+        return None
+    mean_intake = float(intake[logged].mean())
+    return int(round(mean_intake - rate_kg_per_day * KCAL_PER_KG))
+
+
+def _adherence_pct(intake: np.ndarray, burned: np.ndarray, logged: np.ndarray, target: Optional[int]) -> Optional[float]:
+    """
+    Percentage of logged days whose net intake (consumed - burned) was within
+    the tolerance band around target_calories.
+    """
+    if not target or not logged.any():
+        return None
+    net = intake[logged] - burned[logged]
+    on_target = np.abs(net - target) <= target * ADHERENCE_TOLERANCE
+    return round(float(on_target.mean()) * 100, 1)
+
+
+def _goal_projection(current: Optional[float], goal: Optional[float], rate_kg_per_day: Optional[float], today: date):
+    """
+    Days and date at which the current trend rate reaches the goal weight.
+    (None, None) if there is no goal, no rate, or the trend is moving away from it.
+    """
+    if current is None or goal is None or not rate_kg_per_day:
+        return None, None
+    remaining = goal - current
+    if remaining == 0:
+        return 0, today
+    days_needed = remaining / rate_kg_per_day
+    if days_needed <= 0:
+        return None, None
+    days_needed = int(np.ceil(days_needed))
+    return days_needed, today + timedelta(days=days_needed)
+
+
+def _to_float(value) -> Optional[float]:
+    """Round a NumPy scalar for output, mapping NaN to None."""
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), 2)
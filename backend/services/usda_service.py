@@ -6,9 +6,11 @@ Currently uses mock responses for development.
 
 import os
 from typing import List, Dict, Optional
-from dotenv import load_dotenv
+import config  # noqa: F401  (loads .env)
+from utils.metrics import upstream_call
+from utils.log import get_logger, log_fields, LOG_SAMPLE_RATE
 
-load_dotenv()
+logger = get_logger(__name__)
 
 # ====================================================================
 # PLACEHOLDER: Add your USDA API key in .env file
@@ -62,8 +64,9 @@ class USDAService:
         #     return []
         # ====================================================================
         
-        print(f"[USDA SERVICE] Would search for: '{query}' (limit: {limit})")
-        return self._get_mock_results(query, limit)
+        logger.debug("USDA mock search", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, query=query, limit=limit))
+        with upstream_call("usda"):
+            return self._get_mock_results(query, limit)
     
     def get_food_by_id(self, fdc_id: str) -> Optional[Dict]:
         """
@@ -94,7 +97,7 @@ class USDAService:
         #     return None
         # ====================================================================
         
-        print(f"[USDA SERVICE] Would fetch food ID: {fdc_id}")
+        logger.debug("USDA mock lookup", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, fdc_id=fdc_id))
         return None
     
     def _parse_usda_response(self, data: Dict) -> List[Dict]:
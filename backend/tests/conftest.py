@@ -0,0 +1,40 @@
+"""
+Shared fixtures. Run from backend/:
+
+    python -m pytest tests
+
+Tests that need PostgreSQL use the `db` fixture and are skipped when
+DATABASE_URL is unset or the server can't be reached.
+"""
+
+import os
+import sys
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import config  # noqa: E402,F401  (loads .env)
+
+
+@pytest.fixture
+def db():
+    """A session whose changes are rolled back after the test."""
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import Session
+    from database import engine
+
+    try:
+        connection = engine.connect()
+    except OperationalError as error:
+        pytest.skip(f"database unavailable: {error}")
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
@@ -0,0 +1,27 @@
+import uuid
+from datetime import date
+from models import FoodEntry, User
+from services.data_import import import_history
+
+FOOD_CSV = """entry_date,food_name,calories,meal_type
+2026-01-05,Banana,105,snack
+2026-01-05,Banana,105,snack
+2026-01-05,Banana,105,snack
+2026-01-06,Apple,95,
+"""
+
+
+def test_import_keeps_repeats_and_skips_existing_entries(db):
+    user = User(email=f"import-{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    db.add(FoodEntry(user_id=user.id, food_name="Banana", calories=105, meal_type="snack", entry_date=date(2026, 1, 5)))
+    db.flush()
+
+    result = import_history(db, user.id, FOOD_CSV.splitlines(keepends=True), "food")
+
+    assert result["inserted"]["food"] == 3
+    assert result["skipped_duplicates"]["food"] == 1
+    assert result["skipped_lines"]["food"] == [2]
+    bananas = db.query(FoodEntry).filter(FoodEntry.user_id == user.id, FoodEntry.food_name == "Banana").count()
+    assert bananas == 3
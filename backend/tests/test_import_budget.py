@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+from perf.import_budget import BACKEND_DIR
+
+
+def test_main_imports_within_budget():
+    # Importing main creates the engines but doesn't connect, so any URL will do
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "postgresql://fittrack@localhost/fittrack")
+    result = subprocess.run(
+        [sys.executable, "-m", "perf.import_budget", "--runs", "3"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "within budget" in result.stdout
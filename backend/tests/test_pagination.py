@@ -0,0 +1,17 @@
+from datetime import date
+import pytest
+from fastapi import HTTPException
+from utils.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(date(2026, 3, 14), 12345)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (date(2026, 3, 14), 12345)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", encode_cursor(date(2026, 1, 1), 1)[:-2], "MjAyNi0xMy0wMTox"])
+def test_malformed_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,43 @@
+import uuid
+from datetime import date
+import pytest
+from sqlalchemy import create_engine, text
+from utils.query_stats import QueryBudgetExceeded, query_budget
+
+
+@pytest.fixture
+def sqlite_connection():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+def test_query_budget_allows_statements_within_budget(sqlite_connection):
+    with query_budget(2) as stats:
+        sqlite_connection.execute(text("SELECT 1"))
+        sqlite_connection.execute(text("SELECT 2"))
+    assert stats.count == 2
+
+
+def test_query_budget_lists_statements_over_budget(sqlite_connection):
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with query_budget(1):
+            sqlite_connection.execute(text("SELECT 1"))
+            sqlite_connection.execute(text("SELECT 2"))
+    message = str(excinfo.value)
+    assert "2 queries issued, budget is 1" in message
+    assert "2. SELECT 2" in message
+
+
+def test_daily_summary_query_budget(db):
+    from models import User
+    from routers.dashboard import _build_daily_summary
+
+    user = User(email=f"budget-{uuid.uuid4().hex}@example.com", hashed_password="x", target_calories=2000)
+    db.add(user)
+    db.flush()
+
+    with query_budget(2):
+        summary = _build_daily_summary(user, date.today(), db)
+    assert summary["calories_remaining"] == 2000
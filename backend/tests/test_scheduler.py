@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+import pytest
+from utils.scheduler import CronSchedule
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_parses_lists_ranges_and_steps():
+    schedule = CronSchedule("0,30 */6 1-3 * 1-5/2")
+    assert schedule.minutes == {0, 30}
+    assert schedule.hours == {0, 6, 12, 18}
+    assert schedule.days == {1, 2, 3}
+    assert schedule.months == set(range(1, 13))
+    assert schedule.weekdays == {1, 3, 5}
+
+
+def test_sunday_is_0_or_7():
+    assert CronSchedule("0 0 * * 7").weekdays == {0}
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "*/0 * * * *", "5-1 * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_next_after_is_strictly_later():
+    schedule = CronSchedule("30 3 * * *")
+    assert schedule.next_after(_utc(2026, 1, 1, 3, 30)) == _utc(2026, 1, 2, 3, 30)
+    assert schedule.next_after(_utc(2026, 1, 1, 3, 29, 59)) == _utc(2026, 1, 1, 3, 30)
+
+
+def test_next_after_matches_day_of_month_or_week():
+    # 2026-01-01 is a Thursday; the 15th or any Monday fires
+    schedule = CronSchedule("0 0 15 * 1")
+    assert schedule.next_after(_utc(2026, 1, 1)) == _utc(2026, 1, 5)
+    assert schedule.next_after(_utc(2026, 1, 13)) == _utc(2026, 1, 15)
+
+
+def test_next_after_finds_leap_day():
+    assert CronSchedule("0 0 29 2 *").next_after(_utc(2026, 3, 1)) == _utc(2028, 2, 29)
+
+
+def test_never_firing_expression():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(_utc(2026, 1, 1))
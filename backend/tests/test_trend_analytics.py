@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from services.trend_analytics import _EWMA_BLOCK, _ewma, _goal_projection, _rolling_mean
+
+
+def _ewma_loop(values, alpha):
+    out = [values[0]]
+    for value in values[1:]:
+        out.append(out[-1] + alpha * (value - out[-1]))
+    return np.array(out)
+
+
+def test_ewma_matches_recurrence_across_blocks():
+    values = np.random.default_rng(0).normal(80, 2, _EWMA_BLOCK * 2 + 17)
+    np.testing.assert_allclose(_ewma(values, 0.1), _ewma_loop(values, 0.1))
+
+
+def test_ewma_is_seeded_with_first_value():
+    assert _ewma(np.array([70.0, 70.0, 70.0]), 0.1).tolist() == pytest.approx([70.0, 70.0, 70.0])
+
+
+def test_rolling_mean_counts_only_logged_days():
+    values = np.array([2000.0, 0.0, 1000.0, 0.0, 0.0, 0.0])
+    mask = np.array([True, False, True, False, False, False])
+    result = _rolling_mean(values, mask, 3)
+    assert result[:5].tolist() == [2000.0, 2000.0, 1500.0, 1000.0, 1000.0]
+    assert np.isnan(result[5])
+
+
+def test_goal_projection_reaches_goal():
+    today = date(2026, 1, 1)
+    assert _goal_projection(80.0, 78.0, -0.1, today) == (20, today + timedelta(days=20))
+    assert _goal_projection(78.0, 78.0, -0.1, today) == (0, today)
+
+
+def test_goal_projection_none_when_moving_away_or_missing():
+    today = date(2026, 1, 1)
+    assert _goal_projection(80.0, 78.0, 0.1, today) == (None, None)
+    assert _goal_projection(80.0, None, -0.1, today) == (None, None)
+    assert _goal_projection(80.0, 78.0, None, today) == (None, None)
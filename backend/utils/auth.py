@@ -1,14 +1,22 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+import os
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import SessionLocal, AsyncSessionLocal
 from models import User
 from utils.security import decode_access_token
+from utils.principal_cache import UserPrincipal, get_principal, get_principal_async, get_cached_token, cache_token
+from utils.read_routing import read_session, async_read_session
 from typing import Optional
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Shared secret for operator endpoints (/admin); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 
 def get_db():
     """
@@ -21,12 +29,22 @@ def get_db():
         db.close()
 
 
-def get_current_user(
+async def get_async_db():
+    """
+    Dependency to get an async database session (asyncpg).
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_current_principal(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> UserPrincipal:
     """
-    Dependency to get the current authenticated user from JWT token.
+    Dependency to get a read-only snapshot of the authenticated user.
+    Served from the principal cache, so most requests skip the users query.
+    Use get_current_user instead when the endpoint modifies the user.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,48 +52,141 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
-    payload = decode_access_token(token)
+    user_id = _resolve_user_id(credentials.credentials)
+    if user_id is None:
+        raise credentials_exception
     
-    if payload is None:
+    principal = get_principal(user_id, db)
+    if principal is None:
         raise credentials_exception
     
-    user_id: Optional[int] = payload.get("sub")
+    return principal
+
+
+async def get_current_principal_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
+    """
+    get_current_principal for async endpoints. Runs on the event loop: a
+    cached snapshot needs no threadpool slot, and a miss is loaded through
+    the request's async session.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    user_id = _resolve_user_id(credentials.credentials)
     if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    principal = await get_principal_async(user_id, db)
+    if principal is None:
         raise credentials_exception
     
+    return principal
+
+
+def get_current_user(
+    principal: UserPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Dependency to get the current authenticated user as an ORM object
+    attached to the request's session.
+    """
+    user = db.get(User, principal.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     return user
 
 
+def get_read_db(current_user: UserPrincipal = Depends(get_current_principal)):
+    """
+    Dependency to get a read-only session for the current user's data.
+    Uses a read replica when one is healthy and the user hasn't written recently.
+    """
+    db = read_session(current_user)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(current_user: UserPrincipal = Depends(get_current_principal_async)):
+    """
+    Async variant of get_read_db.
+    """
+    async with await async_read_session(current_user) as db:
+        yield db
+
+
+def get_catalog_read_db():
+    """
+    Dependency to get a read-only session for shared data (e.g. the food catalog).
+    """
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
-) -> Optional[User]:
+) -> Optional[UserPrincipal]:
     """
-    Optional authentication - returns user if token is valid, None otherwise.
+    Optional authentication - returns the user snapshot if token is valid, None otherwise.
     Useful for endpoints that work with or without authentication.
     """
     if not credentials:
         return None
     
     try:
-        token = credentials.credentials
-        payload = decode_access_token(token)
-        
-        if payload is None:
-            return None
-        
-        user_id: Optional[int] = payload.get("sub")
+        user_id = _resolve_user_id(credentials.credentials)
         if user_id is None:
             return None
         
-        user = db.query(User).filter(User.id == user_id).first()
-        return user
+        return get_principal(user_id, db)
     except:
         return None
 
 
+def _resolve_user_id(token: str) -> Optional[int]:
+    """
+    User id for a valid token. Verified tokens are cached until they expire.
+    """
+    user_id = get_cached_token(token)
+    if user_id is not None:
+        return user_id
+    
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        return None
+    
+    cache_token(token, user_id, payload.get("exp"))
+    return user_id
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependency for operator endpoints: the X-Admin-Token header must match
+    ADMIN_TOKEN. Without ADMIN_TOKEN configured the endpoints don't exist.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
@@ -0,0 +1,184 @@
+"""
+Connection Pool Configuration and Instrumentation
+
+Pool sizing, pre-ping and recycle settings come from the environment:
+
+    DB_POOL_SIZE          persistent connections per engine (default 5)
+    DB_MAX_OVERFLOW       extra connections allowed under load (default 5)
+    DB_POOL_TIMEOUT       seconds to wait for a free connection (default 10)
+    DB_POOL_RECYCLE       seconds before a connection is replaced (default 1800)
+    DB_POOL_PRE_PING      test connections on checkout (default true)
+    DB_PGBOUNCER          true when connecting through PgBouncer in
+                          transaction pooling mode (default false)
+
+Each worker process has two engines per database (sync and asyncpg), so a
+deployment can open up to
+
+    workers x 2 x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+connections to the primary (20 per worker with the defaults), and as many
+again to each read replica. Keep that below the server's max_connections,
+minus what migrations, maintenance and admin sessions need.
+
+In PgBouncer mode PgBouncer does the pooling, so the engines use NullPool
+and asyncpg's prepared statement caches are disabled (prepared statements
+do not survive a server connection switch between transactions).
+
+Every pooled checkout is timed into a per-engine histogram, so pool
+exhaustion shows up as growing checkout waits before it turns into
+request timeouts.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Tuple
+import config  # noqa: F401  (loads .env)
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+from utils.metrics import Histogram, histogram_samples, register_collector
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+
+# Upper bounds (seconds) of the checkout-wait histogram buckets
+CHECKOUT_WAIT_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Checkout waits and failed checkouts (timeouts, connect errors) per engine name
+checkout_wait: Dict[str, Histogram] = {}
+checkout_errors: Dict[str, int] = {}
+_checkout_errors_lock = threading.Lock()
+# Instrumented engines by name, for pool status and /metrics
+instrumented_engines: Dict[str, object] = {}
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long each checkout waited."""
+
+    metrics_name = "default"
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        # QueuePool keeps its overflow limit private; pool_size=0 means unbounded
+        self.max_overflow = -1 if kwargs.get("pool_size", 5) == 0 else max_overflow
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            with _checkout_errors_lock:
+                checkout_errors[self.metrics_name] = checkout_errors.get(self.metrics_name, 0) + 1
+            raise
+        histogram = checkout_wait.get(self.metrics_name)
+        if histogram is not None:
+            histogram.observe(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() replaces the pool; keep reporting under the same name
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(is_async: bool = False) -> Dict:
+    """
+    Keyword arguments for create_engine / create_async_engine.
+    """
+    if DB_PGBOUNCER:
+        options = {"poolclass": NullPool}
+        if is_async:
+            # Unique statement names avoid collisions on shared server connections
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        return options
+
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def instrument_pool(engine, name: str) -> None:
+    """
+    Register an engine's pool under a name for checkout metrics and status.
+    Accepts sync engines and AsyncEngine.
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    instrumented_engines[name] = engine
+    checkout_wait.setdefault(name, Histogram(CHECKOUT_WAIT_BUCKETS))
+    checkout_errors.setdefault(name, 0)
+    if isinstance(pool, _TimedCheckout):
+        pool.metrics_name = name
+
+
+def pool_status(engine) -> Dict:
+    """
+    Current utilization of an engine's pool.
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    if not isinstance(pool, _TimedCheckout):
+        return {"pool": type(pool).__name__}
+
+    capacity = pool.size() + max(pool.max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool.max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "utilization": round(checked_out / capacity, 3) if capacity > 0 else 0.0,
+        "exhausted": pool.max_overflow >= 0 and checked_out >= capacity,
+    }
+
+
+def pool_exhausted(engine) -> bool:
+    """
+    Whether every connection the engine's pool may open is checked out.
+    Always False for unbounded pools and NullPool.
+    """
+    return bool(pool_status(engine).get("exhausted"))
+
+
+def _pool_metrics():
+    """Checkout waits, checkout errors and utilization of every instrumented pool."""
+    statuses = {name: pool_status(engine) for name, engine in instrumented_engines.items()}
+    yield (
+        "db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection.",
+        [sample for name, histogram in checkout_wait.items()
+         for sample in histogram_samples("db_pool_checkout_wait_seconds", {"engine": name}, histogram)]
+    )
+    yield (
+        "db_pool_checkout_errors_total", "counter", "Failed connection checkouts (timeouts, connect errors).",
+        [("db_pool_checkout_errors_total", {"engine": name}, count) for name, count in checkout_errors.items()]
+    )
+    for field in ("size", "checked_out", "overflow", "utilization"):
+        yield (
+            f"db_pool_{field}", "gauge", f"Connection pool {field.replace('_', ' ')}.",
+            [(f"db_pool_{field}", {"engine": name}, status[field]) for name, status in statuses.items() if field in status]
+        )
+
+
+register_collector(_pool_metrics)
@@ -0,0 +1,92 @@
+"""
+Conditional GET support for per-user read endpoints.
+
+Every write to a user's data bumps users.data_version in the same
+transaction. Read endpoints derive a weak ETag from that version (plus the
+request URL and today's date, since several responses are relative to
+today) and answer 304 Not Modified before running any entry queries.
+
+Bumping also evicts the user's cached principal once the transaction
+commits. A principal served from a per-process cache may predate a write
+made by another worker, so its version is re-read before comparing; on a
+replica session, the version read from the primary by utils.read_routing
+is used instead of the replica's. When the re-read version differs from the
+snapshot's, the response is still rendered from the stale snapshot, so it
+goes out without an ETag and the snapshot is evicted for the next request.
+"""
+
+import hashlib
+from datetime import date
+from typing import Optional
+from fastapi import Request, Response, status
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import User
+from utils.principal_cache import invalidate_principal, is_shared, mark_user_changed
+from utils.read_routing import PRIMARY_DATA_VERSION_KEY
+
+
+def bump_data_version(db: Session, user_id: int) -> None:
+    """
+    Increment the user's data version. Takes effect when the caller commits.
+    """
+    db.query(User).filter(User.id == user_id).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+    mark_user_changed(db, user_id)
+
+
+def current_data_version(user, db: Session) -> int:
+    """
+    The user's data version, re-read from the database when the user object
+    is a snapshot from a cache that other workers cannot invalidate.
+    """
+    primary_version = db.info.get(PRIMARY_DATA_VERSION_KEY)
+    if primary_version is not None:
+        return primary_version
+    if not getattr(user, "cached", False) or is_shared():
+        return user.data_version
+    return db.query(User.data_version).filter(User.id == user.id).scalar()
+
+
+def user_etag(user: User, request: Request, data_version: int) -> str:
+    """
+    Weak ETag for a user's view of the requested URL.
+    """
+    key = f"{user.id}:{data_version}:{date.today()}:{request.url.path}?{request.url.query}"
+    return f'W/"{hashlib.blake2s(key.encode(), digest_size=12).hexdigest()}"'
+
+
+def check_not_modified(request: Request, response: Response, user: User, db: Session) -> Optional[Response]:
+    """
+    Return a 304 response if the client's If-None-Match matches the current
+    ETag; otherwise set the ETag on the outgoing response and return None.
+    The resolved data version is left in request.state.data_version.
+    """
+    data_version = current_data_version(user, db)
+    request.state.data_version = data_version
+    etag = user_etag(user, request, data_version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    stale = data_version != user.data_version
+    if stale:
+        invalidate_principal(user.id)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in candidates or etag in candidates:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # A body rendered from a stale snapshot must not be cached under the current ETag
+    if stale:
+        del headers["ETag"]
+    response.headers.update(headers)
+    return None
+
+
+async def check_not_modified_async(request: Request, response: Response, user: User, db: AsyncSession) -> Optional[Response]:
+    """
+    check_not_modified for endpoints using an async session.
+    """
+    return await db.run_sync(lambda session: check_not_modified(request, response, user, session))
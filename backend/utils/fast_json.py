@@ -0,0 +1,106 @@
+"""
+Fast JSON Responses
+By default FastAPI validates a handler's return value against its
+response_model (from_attributes on every ORM row), dumps the models to
+JSON-compatible dicts and encodes them with json.dumps. For list endpoints
+that is most of the request's CPU time.
+
+Endpoints whose data comes straight from our own database rows opt out of
+that path: a RowSerializer, built once per schema, copies the schema's
+fields off each row into a plain dict, and fast_response() encodes the
+result with orjson, which handles dates and datetimes natively. The
+response_model stays on the route for the OpenAPI docs, and the JSON is
+the same either way (perf/serialization_bench.py checks that, and
+measures the difference).
+
+    FAST_JSON    use the fast path (default true); false falls back to
+                 FastAPI's validation and encoding, e.g. to compare output
+
+Data from outside (request bodies, external food APIs) still goes through
+validation; such routes can use FastJSONResponse as their response_class
+to at least skip json.dumps.
+"""
+
+import operator
+import os
+import typing
+from typing import Any, Dict, List, Optional, Tuple, Type
+import config  # noqa: F401  (loads .env)
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+FAST_JSON = os.getenv("FAST_JSON", "true").lower() in ("1", "true", "yes")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _is_float(annotation) -> bool:
+    if annotation is float:
+        return True
+    return typing.get_origin(annotation) is typing.Union and float in typing.get_args(annotation)
+
+
+class RowSerializer:
+    """
+    Converts ORM rows (or dicts) to dicts with a schema's fields, without
+    validating them. Float fields are coerced like pydantic would (so an
+    integer 0 renders as 0.0); other values are passed through as read.
+    Only for flat schemas whose fields map one-to-one onto the row.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        self.names: Tuple[str, ...] = tuple(schema.model_fields)
+        self.float_names: Tuple[str, ...] = tuple(
+            name for name, field in schema.model_fields.items() if _is_float(field.annotation)
+        )
+        # attrgetter/itemgetter return a tuple for two or more names
+        self._get_attrs = operator.attrgetter(*self.names, *self.names[:1])
+        self._get_items = operator.itemgetter(*self.names, *self.names[:1])
+
+    def one(self, row) -> Dict[str, Any]:
+        if isinstance(row, dict):
+            values = self._get_items(row)
+        else:
+            # Loaded ORM rows keep column values in __dict__; reading it skips
+            # the instrumented attribute lookups. Expired or unloaded columns
+            # are missing there and go through getattr (which loads them).
+            try:
+                values = self._get_items(row.__dict__)
+            except KeyError:
+                values = self._get_attrs(row)
+        result = dict(zip(self.names, values))
+        for name in self.float_names:
+            value = result[name]
+            if value is not None and type(value) is not float:
+                result[name] = float(value)
+        return result
+
+    def many(self, rows) -> List[Dict[str, Any]]:
+        return [self.one(row) for row in rows]
+
+
+def fast_response(content: Any, response: Response, serializer: Optional[RowSerializer] = None):
+    """
+    Return value for an endpoint opting into the fast path: content (a row,
+    a list of rows, or JSON-ready data when no serializer is given) encoded
+    with orjson, carrying the headers and status set on the endpoint's
+    Response parameter (ETag, pagination links).
+
+    With FAST_JSON off, the content is returned for FastAPI to validate
+    and encode as usual.
+    """
+    if not FAST_JSON:
+        return content
+    if serializer is not None:
+        content = serializer.many(content) if isinstance(content, list) else serializer.one(content)
+    fast = FastJSONResponse(content, status_code=response.status_code or 200)
+    fast.headers.raw.extend(response.headers.raw)
+    return fast
@@ -0,0 +1,190 @@
+"""
+Structured Logging
+Application logs go through the standard logging module into an in-memory
+queue; a background thread formats them and writes them to stdout. Logging
+on a request path is an enqueue and never waits on stdout, so slow log
+collection cannot stall workers. When the queue is full, records are
+dropped and counted (log_records_dropped_total in /metrics).
+
+    LOG_LEVEL         minimum level (default INFO)
+    LOG_FORMAT        json (default) or text
+    LOG_QUEUE_SIZE    records buffered before dropping (default 10000)
+    LOG_SAMPLE_RATE   share of high-frequency events kept (default 0.01)
+
+Records carry the request id of the request being served (the incoming
+X-Request-ID header, or a generated one echoed back in the response), and
+any structured fields passed with log_fields():
+
+    logger = get_logger(__name__)
+    logger.info("Cached food items", extra=log_fields(count=len(rows)))
+    logger.debug("Internal search", extra=log_fields(sample_rate=LOG_SAMPLE_RATE, results=5))
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+import config  # noqa: F401  (loads .env)
+from utils.metrics import Counter
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+# Parent of every application logger (get_logger prefixes names with it)
+APP_LOGGER = "fittrack"
+
+records_dropped = Counter("log_records_dropped_total", "Log records dropped because the log queue was full.")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_listener: Optional[QueueListener] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the application namespace (fittrack.<name>)."""
+    return logging.getLogger(f"{APP_LOGGER}.{name}")
+
+
+def log_fields(sample_rate: Optional[float] = None, **fields) -> dict:
+    """
+    `extra` for a log call: structured fields, and optionally the share of
+    these events to keep (for events logged on every request).
+    """
+    return {"fields": fields, "sample_rate": sample_rate}
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class _ContextFilter(logging.Filter):
+    """Drops unsampled events and stamps the request id (in the caller's thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None and random.random() >= sample_rate:
+            return False
+        record.request_id = _request_id.get()
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Enqueues without waiting; drops the record when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            records_dropped.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now; keep structured fields as attributes
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record)} {record.levelname:7} {record.name}: {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if getattr(record, "request_id", None):
+            line += f" request_id={record.request_id}"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def configure_logging() -> None:
+    """
+    Route application logs through the queue to the stdout writer thread.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = _NonBlockingQueueHandler(log_queue)
+    handler.addFilter(_ContextFilter())
+
+    app_logger = logging.getLogger(APP_LOGGER)
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(handler)
+    app_logger.propagate = False
+
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    _listener = QueueListener(log_queue, writer, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware that binds a request id to everything logged while
+    serving the request and returns it in the X-Request-ID header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        token = _request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _request_id.reset(token)
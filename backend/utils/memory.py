@@ -0,0 +1,323 @@
+"""
+Memory Diagnostics
+Finds where worker memory goes without restarting the worker:
+
+- /metrics reports resident and virtual memory (where the platform exposes
+  them; Windows has neither /proc nor getrusage), GC collections,
+  collected and uncollectable objects per generation, and GC pause times.
+- /admin/memory (utils/auth.require_admin) starts and stops tracemalloc,
+  takes snapshots, lists the top allocation sites grouped by module,
+  package, line or traceback, and diffs two snapshots to show what grew.
+- While tracemalloc is tracing, a share of requests records its peak and
+  retained allocation per route (request_peak_alloc_bytes and
+  request_retained_alloc_bytes in /metrics). Only one request is
+  measured at a time, but the peak is process-wide, so concurrent
+  requests add to it.
+
+    MEMORY_TRACE_FRAMES   start tracemalloc at startup with this many frames per trace (default 0: off)
+    MEMORY_SAMPLE_RATE    share of requests measured while tracing (default 0.05)
+    MEMORY_SNAPSHOTS      snapshots kept for diffing (default 3)
+
+Tracing slows allocation-heavy code noticeably and holds a trace per live
+allocation, so turn it on to investigate and off again afterwards.
+"""
+
+import functools
+import gc
+import mmap
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import config  # noqa: F401  (loads .env)
+from utils.metrics import HistogramFamily, register_collector
+
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "0"))
+MEMORY_SAMPLE_RATE = float(os.getenv("MEMORY_SAMPLE_RATE", "0.05"))
+MEMORY_SNAPSHOTS = int(os.getenv("MEMORY_SNAPSHOTS", "3"))
+
+GROUP_BY = ("module", "package", "line", "traceback")
+
+# Upper bounds (bytes) for per-request allocation histograms
+ALLOCATION_BUCKETS: Tuple[float, ...] = (
+    16 * 1024, 64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2, 256 * 1024 ** 2
+)
+
+request_peak_alloc = HistogramFamily(
+    "request_peak_alloc_bytes", "Peak traced memory above the start of a sampled request.", ("route",),
+    buckets=ALLOCATION_BUCKETS
+)
+request_retained_alloc = HistogramFamily(
+    "request_retained_alloc_bytes", "Traced memory still allocated when a sampled request finished.", ("route",),
+    buckets=ALLOCATION_BUCKETS
+)
+gc_pause = HistogramFamily(
+    "python_gc_pause_seconds", "Garbage collector pauses.", ("generation",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+)
+
+_PAGE_SIZE = mmap.PAGESIZE
+
+# Frames that only describe tracemalloc and the import system
+_IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def memory_usage() -> Dict[str, Optional[int]]:
+    """
+    Resident and virtual size of this process in bytes: from /proc, else
+    peak RSS from getrusage, else None (e.g. on Windows).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            virtual_pages, resident_pages = statm.read().split()[:2]
+        return {"rss_bytes": int(resident_pages) * _PAGE_SIZE, "vms_bytes": int(virtual_pages) * _PAGE_SIZE}
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return {"rss_bytes": None, "vms_bytes": None}
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"rss_bytes": peak_kb * (1 if sys.platform == "darwin" else 1024), "vms_bytes": None}
+
+
+# --- GC pauses ---
+
+_gc_started: Dict[int, float] = {}
+
+
+def _on_gc(phase: str, info: dict) -> None:
+    thread_id = threading.get_ident()
+    if phase == "start":
+        _gc_started[thread_id] = time.perf_counter()
+    else:
+        started = _gc_started.pop(thread_id, None)
+        if started is not None:
+            gc_pause.observe(time.perf_counter() - started, str(info["generation"]))
+
+
+if _on_gc not in gc.callbacks:
+    gc.callbacks.append(_on_gc)
+
+
+def _memory_metrics():
+    """Process memory, GC and tracemalloc figures, read at scrape time."""
+    usage = memory_usage()
+    if usage["rss_bytes"] is not None:
+        yield "process_resident_memory_bytes", "gauge", "Resident memory size.", [
+            ("process_resident_memory_bytes", {}, usage["rss_bytes"])]
+    if usage["vms_bytes"] is not None:
+        yield "process_virtual_memory_bytes", "gauge", "Virtual memory size.", [
+            ("process_virtual_memory_bytes", {}, usage["vms_bytes"])]
+
+    stats = gc.get_stats()
+    for field, name, kind, documentation in (
+        ("collections", "python_gc_collections_total", "counter", "Garbage collections per generation."),
+        ("collected", "python_gc_objects_collected_total", "counter", "Objects collected per generation."),
+        ("uncollectable", "python_gc_objects_uncollectable_total", "counter", "Uncollectable objects found per generation."),
+    ):
+        yield name, kind, documentation, [
+            (name, {"generation": str(generation)}, generation_stats[field])
+            for generation, generation_stats in enumerate(stats)
+        ]
+    yield "python_gc_pending_objects", "gauge", "Allocations counted towards each generation's next collection.", [
+        ("python_gc_pending_objects", {"generation": str(generation)}, count)
+        for generation, count in enumerate(gc.get_count())
+    ]
+
+    current, peak = tracemalloc.get_traced_memory()
+    yield "tracemalloc_tracing", "gauge", "Whether tracemalloc is tracing allocations.", [
+        ("tracemalloc_tracing", {}, int(tracemalloc.is_tracing()))]
+    yield "tracemalloc_traced_bytes", "gauge", "Memory currently allocated by traced allocations.", [
+        ("tracemalloc_traced_bytes", {}, current)]
+    yield "tracemalloc_peak_bytes", "gauge", "Peak traced memory since tracing started or the peak was reset.", [
+        ("tracemalloc_peak_bytes", {}, peak)]
+
+
+register_collector(_memory_metrics)
+
+
+# --- tracemalloc control and snapshots ---
+
+_snapshots: "OrderedDict[str, Tuple[float, tracemalloc.Snapshot]]" = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def start_tracing(frames: int) -> None:
+    """Start tracemalloc (no-op when already tracing)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing() -> None:
+    """Stop tracemalloc and drop the stored snapshots."""
+    tracemalloc.stop()
+    with _snapshots_lock:
+        _snapshots.clear()
+
+
+def status() -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    with _snapshots_lock:
+        snapshots = [{"id": snapshot_id, "taken_at": _timestamp(taken_at)}
+                     for snapshot_id, (taken_at, _) in _snapshots.items()]
+    return {
+        **memory_usage(),
+        "gc": {"counts": list(gc.get_count()), "thresholds": list(gc.get_threshold()), "stats": gc.get_stats()},
+        "tracemalloc": {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else 0,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+        },
+        "snapshots": snapshots,
+    }
+
+
+def take_snapshot() -> str:
+    """Snapshot the traced allocations and store it; returns its id."""
+    snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+    snapshot_id = uuid.uuid4().hex[:12]
+    with _snapshots_lock:
+        _snapshots[snapshot_id] = (time.time(), snapshot)
+        while len(_snapshots) > MEMORY_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return snapshot_id
+
+
+def get_snapshot(snapshot_id: str) -> Optional[tracemalloc.Snapshot]:
+    with _snapshots_lock:
+        entry = _snapshots.get(snapshot_id)
+    return entry[1] if entry else None
+
+
+@functools.lru_cache(maxsize=4096)
+def module_name(filename: str) -> str:
+    """Dotted module name for a source file, from the longest matching sys.path entry."""
+    best = ""
+    for entry in sys.path:
+        entry = os.path.abspath(entry or ".")
+        if filename.startswith(entry + os.sep) and len(entry) > len(best):
+            best = entry
+    if not best:
+        return filename
+    relative = os.path.splitext(filename[len(best) + 1:])[0]
+    parts = relative.split(os.sep)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts) or filename
+
+
+def _group_key(trace_frame: tracemalloc.Frame, group_by: str) -> str:
+    name = module_name(trace_frame.filename)
+    if group_by == "package":
+        return name.split(".")[0]
+    if group_by == "line":
+        return f"{name}:{trace_frame.lineno}"
+    return name
+
+
+def _grouped(snapshot: tracemalloc.Snapshot, group_by: str) -> Dict[str, List[int]]:
+    """{site: [bytes, allocations]} for the given grouping."""
+    totals: Dict[str, List[int]] = {}
+    key_type = "lineno" if group_by == "line" else "filename"
+    for stat in snapshot.statistics(key_type):
+        key = _group_key(stat.traceback[0], group_by)
+        entry = totals.setdefault(key, [0, 0])
+        entry[0] += stat.size
+        entry[1] += stat.count
+    return totals
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, group_by: str = "module", limit: int = 25) -> dict:
+    """The largest allocation sites of a snapshot."""
+    if group_by == "traceback":
+        stats = snapshot.statistics("traceback")
+        sites = [{"site": _format_traceback(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                 for stat in stats[:limit]]
+        total = sum(stat.size for stat in stats)
+    else:
+        totals = _grouped(snapshot, group_by)
+        ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+        sites = [{"site": site, "size_bytes": size, "count": count} for site, (size, count) in ranked[:limit]]
+        total = sum(size for size, _ in totals.values())
+    return {"group_by": group_by, "total_bytes": total, "sites": sites}
+
+
+def diff_allocations(base: tracemalloc.Snapshot, current: tracemalloc.Snapshot,
+                     group_by: str = "module", limit: int = 25) -> dict:
+    """Allocation sites that grew (or shrank) the most between two snapshots."""
+    if group_by == "traceback":
+        stats = current.compare_to(base, "traceback")
+        sites = [{"site": _format_traceback(stat.traceback), "size_diff_bytes": stat.size_diff,
+                  "size_bytes": stat.size, "count_diff": stat.count_diff} for stat in stats[:limit]]
+        total_diff = sum(stat.size_diff for stat in stats)
+    else:
+        before, after = _grouped(base, group_by), _grouped(current, group_by)
+        diffs = [
+            (site, after.get(site, [0, 0])[0] - before.get(site, [0, 0])[0], after.get(site, [0, 0])[0],
+             after.get(site, [0, 0])[1] - before.get(site, [0, 0])[1])
+            for site in before.keys() | after.keys()
+        ]
+        diffs.sort(key=lambda item: abs(item[1]), reverse=True)
+        sites = [{"site": site, "size_diff_bytes": size_diff, "size_bytes": size, "count_diff": count_diff}
+                 for site, size_diff, size, count_diff in diffs[:limit] if size_diff or count_diff]
+        total_diff = sum(item[1] for item in diffs)
+    return {"group_by": group_by, "total_diff_bytes": total_diff, "sites": sites}
+
+
+def _format_traceback(traceback: tracemalloc.Traceback) -> List[str]:
+    # Most recent call first, without import machinery frames
+    return [f"{module_name(frame.filename)}:{frame.lineno}" for frame in reversed(traceback)
+            if not frame.filename.startswith("<frozen ")]
+
+
+def _timestamp(value: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value))
+
+
+# --- Per-route allocation sampling ---
+
+_measuring = False
+
+
+class MemorySamplingMiddleware:
+    """
+    ASGI middleware that, while tracemalloc is tracing, measures the peak and
+    retained traced memory of a sample of requests, one request at a time.
+    Resets the tracemalloc peak for each measured request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _measuring
+        if (scope["type"] != "http" or _measuring or not tracemalloc.is_tracing()
+                or random.random() >= MEMORY_SAMPLE_RATE or scope["path"].startswith("/admin")):
+            await self.app(scope, receive, send)
+            return
+
+        _measuring = True
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _measuring = False
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                request_peak_alloc.observe(max(peak - start, 0), route)
+                request_retained_alloc.observe(max(current - start, 0), route)
@@ -0,0 +1,242 @@
+"""
+Metrics
+In-process counters, gauges and histograms rendered in the Prometheus text
+exposition format at GET /metrics.
+
+Recording is a dict lookup and an increment under a lock, cheap enough for
+every request. Values are per worker process; with several uvicorn
+workers, scrape each one (or run one worker per container).
+
+Metrics owned by other modules (connection pools, the password pool,
+replica lag) are read at scrape time by collectors registered with
+register_collector().
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Upper bounds (seconds) for request and upstream latency histograms
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Dict:
+        """Cumulative bucket counts keyed by upper bound, plus sum and count."""
+        with self._lock:
+            cumulative = {}
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+                running += count
+                cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+            return {"buckets": cumulative, "sum": round(self.sum, 6), "count": self.count}
+
+
+class _Family:
+    """A named metric with one value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels: str) -> None:
+        histogram = self._values.get(labels)
+        if histogram is None:
+            with self._lock:
+                histogram = self._values.setdefault(labels, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, histogram in items:
+            yield from histogram_samples(self.name, dict(zip(self.labelnames, labels)), histogram)
+
+
+def histogram_samples(name: str, labels: Dict[str, str], histogram: Histogram):
+    """Prometheus _bucket/_sum/_count samples for one histogram."""
+    snapshot = histogram.snapshot()
+    for bound, count in snapshot["buckets"].items():
+        yield f"{name}_bucket", {**labels, "le": bound}, count
+    yield f"{name}_sum", labels, snapshot["sum"]
+    yield f"{name}_count", labels, snapshot["count"]
+
+
+_registry: List[_Family] = []
+# Callables returning (name, kind, documentation, samples) at scrape time
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, Iterable]]]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[Tuple[str, str, str, Iterable]]]) -> None:
+    """Add a function that reports metrics owned elsewhere when /metrics is scraped."""
+    _collectors.append(collector)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    families = [(family.name, family.kind, family.documentation, family.samples()) for family in _registry]
+    for collector in _collectors:
+        families.extend(collector())
+
+    for name, kind, documentation, samples in families:
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample_name, labels, value in samples:
+            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- HTTP requests (recorded by MetricsMiddleware) ---
+
+http_requests = Counter("http_requests_total", "Requests by method, route and status code.", ("method", "route", "status"))
+http_request_duration = HistogramFamily("http_request_duration_seconds", "Request latency by method and route.", ("method", "route"))
+http_requests_in_flight = Gauge("http_requests_in_flight", "Requests currently being served.")
+
+# --- Food aggregation ---
+
+food_lookups = Counter(
+    "food_lookups_total",
+    "Food searches and barcode lookups by where they were answered (internal, external, miss).",
+    ("kind", "answered_by")
+)
+food_results = Counter("food_search_results_total", "Search results returned, by origin (internal or external).", ("origin",))
+upstream_duration = HistogramFamily("food_upstream_request_duration_seconds", "Latency of external food API calls.", ("source",))
+upstream_errors = Counter("food_upstream_errors_total", "Failed external food API calls (exceptions and non-200 responses).", ("source",))
+cache_write_batch = HistogramFamily(
+    "food_cache_write_batch_size",
+    "New food_master rows written per cache write.",
+    buckets=(0, 1, 2, 5, 10, 20, 50)
+)
+
+
+@contextmanager
+def upstream_call(source: str):
+    """Time a call to an external food API; exceptions count as errors."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        upstream_errors.inc(source)
+        raise
+    finally:
+        upstream_duration.observe(time.perf_counter() - started, source)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and in-flight requests.
+    Routes are labelled by their path template (/food/entries/{entry_id}),
+    so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(elapsed, scope["method"], route_label)
+            http_requests.inc(scope["method"], route_label, str(status_code))
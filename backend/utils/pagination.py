@@ -0,0 +1,72 @@
+"""
+Keyset pagination for entry listings.
+
+Pages are ordered by (entry_date desc, id desc) and continue from an opaque
+cursor encoding the last row's (entry_date, id), so each page is a bounded
+range scan on the (user_id, entry_date) index however long the history is.
+The cursor also bounds entry_date on its own, which lets Postgres skip the
+monthly partitions newer than the cursor (it cannot prune on the row
+comparison alone).
+The list body is unchanged; the next cursor is returned in the
+X-Next-Cursor and Link headers.
+"""
+
+import base64
+from datetime import date
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(entry_date: date, entry_id: int) -> str:
+    """Opaque cursor pointing just past the given row."""
+    raw = f"{entry_date.isoformat()}:{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Inverse of encode_cursor. Raises 400 for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        entry_date, entry_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        return date.fromisoformat(entry_date), int(entry_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def paginate_entries(
+    query: Query,
+    model,
+    request: Request,
+    response: Response,
+    cursor: Optional[str],
+    limit: int
+) -> list:
+    """
+    Apply keyset ordering and the cursor to an entry query and fetch one page.
+    Sets X-Next-Cursor / Link headers when more rows are available.
+    """
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            model.entry_date <= cursor_date,
+            tuple_(model.entry_date, model.id) < tuple_(cursor_date, cursor_id)
+        )
+    
+    rows = query.order_by(model.entry_date.desc(), model.id.desc()).limit(limit + 1).all()
+    
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].entry_date, rows[-1].id)
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    
+    return rows
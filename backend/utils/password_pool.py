@@ -0,0 +1,151 @@
+"""
+Password Hashing Pool
+Runs bcrypt hashing and verification in a dedicated process pool so a burst
+of logins cannot hold the GIL or tie up the threadpool that serves the rest
+of the API.
+
+The pool accepts at most PASSWORD_POOL_MAX_PENDING jobs at a time (running
+plus queued). Beyond that, submissions fail immediately with
+PasswordPoolSaturated so the auth endpoints can answer 503 right away
+instead of queueing.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+import config  # noqa: F401  (loads .env)
+from utils.security import get_password_hash, verify_password
+from utils.metrics import register_collector
+
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", str(PASSWORD_POOL_WORKERS * 8)))
+# Seconds a client is asked to wait before retrying a rejected request
+PASSWORD_POOL_RETRY_AFTER = 1
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when the hashing pool already has the maximum number of pending jobs."""
+
+
+class _PoolStats:
+    """Counters for the hashing pool; read with password_pool_stats()."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats = _PoolStats()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """
+    Start the pool on first use, so importing this module (and forking
+    server workers) does not spawn processes.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=PASSWORD_POOL_WORKERS)
+    return _executor
+
+
+async def _run(func, *args):
+    """
+    Run func in the pool, or raise PasswordPoolSaturated if it is full.
+    """
+    global _executor
+    if _stats.in_flight >= PASSWORD_POOL_MAX_PENDING:
+        _stats.rejected += 1
+        raise PasswordPoolSaturated()
+
+    _stats.submitted += 1
+    _stats.in_flight += 1
+    started = time.perf_counter()
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next request
+        _stats.failed += 1
+        with _executor_lock:
+            _executor = None
+        raise
+    except Exception:
+        _stats.failed += 1
+        raise
+    finally:
+        _stats.in_flight -= 1
+
+    # Only successful jobs count as completed and feed the timings
+    elapsed = time.perf_counter() - started
+    _stats.completed += 1
+    _stats.total_seconds += elapsed
+    _stats.max_seconds = max(_stats.max_seconds, elapsed)
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password for storage without blocking the event loop.
+    """
+    return await _run(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash without blocking the event loop.
+    """
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+def password_pool_stats() -> Dict:
+    """
+    Snapshot of the pool's configuration and counters.
+    """
+    return {
+        "workers": PASSWORD_POOL_WORKERS,
+        "max_pending": PASSWORD_POOL_MAX_PENDING,
+        "in_flight": _stats.in_flight,
+        "submitted": _stats.submitted,
+        "completed": _stats.completed,
+        "failed": _stats.failed,
+        "rejected": _stats.rejected,
+        "avg_seconds": round(_stats.total_seconds / _stats.completed, 4) if _stats.completed else 0.0,
+        "max_seconds": round(_stats.max_seconds, 4),
+    }
+
+
+def shutdown_password_pool() -> None:
+    """
+    Stop the pool's worker processes (called on application shutdown).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _password_pool_metrics():
+    stats = password_pool_stats()
+    yield "password_pool_in_flight", "gauge", "Hashing jobs running or queued.", [("password_pool_in_flight", {}, stats["in_flight"])]
+    yield (
+        "password_pool_jobs_total", "counter", "Hashing jobs by outcome.",
+        [("password_pool_jobs_total", {"outcome": outcome}, stats[outcome]) for outcome in ("completed", "failed", "rejected")]
+    )
+    yield "password_pool_job_seconds_total", "counter", "Time spent on completed hashing jobs.", [("password_pool_job_seconds_total", {}, _stats.total_seconds)]
+
+
+register_collector(_password_pool_metrics)
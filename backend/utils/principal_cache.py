@@ -0,0 +1,304 @@
+"""
+Authenticated-principal cache.
+
+Avoids a users-table query on every authenticated request by caching:
+- verified JWTs -> user id (local LRU, entries expire with the token), and
+- user id -> a lightweight, read-only snapshot of the user's columns.
+
+Snapshots are evicted after any commit that bumped the user's data version
+(see utils.etag.bump_data_version), so profile, onboarding and weight
+updates are visible immediately. By default the snapshot store is local to
+the worker process; set PRINCIPAL_CACHE_URL to a redis:// URL to share it
+(and its invalidations) across workers. Requires the `redis` package.
+
+A request that loaded a user just before a concurrent write committed must
+not put its stale snapshot back after the eviction. Evictions therefore
+leave a short-lived tombstone, and a snapshot is only stored when no
+eviction happened since its load began and the cached data_version isn't
+newer (atomically, via a Lua script, in Redis).
+
+Async endpoints use get_principal_async: a snapshot from the local store is
+returned on the event loop and a miss is loaded through the AsyncSession,
+so neither takes a threadpool slot (the Redis client's blocking calls still
+run in the threadpool).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Optional
+import config  # noqa: F401  (loads .env)
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models import User
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))  # 0 disables caching
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_URL = os.getenv("PRINCIPAL_CACHE_URL", "")
+
+# Every user column except the password hash
+PRINCIPAL_FIELDS = tuple(column.name for column in User.__table__.columns if column.name != "hashed_password")
+
+# Session.info key collecting users whose cached snapshot must be dropped on commit
+CHANGED_USERS_KEY = "principal_cache_changed_users"
+
+# How long an eviction blocks snapshots whose load began before it (longer than any user query)
+TOMBSTONE_SECONDS = 60
+
+
+class UserPrincipal:
+    """
+    Read-only snapshot of a user's columns. Safe to share across threads.
+    `cached` is True when the snapshot came from the cache rather than the database.
+    """
+
+    __slots__ = PRINCIPAL_FIELDS + ("cached",)
+
+    def __init__(self, cached: bool = False, **fields):
+        for name in PRINCIPAL_FIELDS:
+            object.__setattr__(self, name, fields.get(name))
+        object.__setattr__(self, "cached", cached)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserPrincipal is read-only; load the User model to modify it")
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in PRINCIPAL_FIELDS}
+
+
+class _LocalStore:
+    """Per-process LRU of user snapshots with a TTL."""
+
+    shared = False
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._evicted: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_token(self, user_id: int) -> float:
+        """Taken before loading a snapshot from the database; passed to set()."""
+        return time.monotonic()
+
+    def get(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            stored_at, fields = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return fields
+
+    def set(self, user_id: int, fields: dict, load_token: float) -> None:
+        with self._lock:
+            evicted_at = self._evicted.get(user_id)
+            if evicted_at is not None and evicted_at >= load_token:
+                return
+            current = self._entries.get(user_id)
+            if current is not None and current[1]["data_version"] > fields["data_version"]:
+                return
+            self._entries[user_id] = (time.monotonic(), fields)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._evicted[user_id] = now
+            self._evicted.move_to_end(user_id)
+            while self._evicted and now - next(iter(self._evicted.values())) > TOMBSTONE_SECONDS:
+                self._evicted.popitem(last=False)
+
+
+class _RedisStore:
+    """
+    Snapshots in Redis, shared by all workers. Invalidation is global.
+    Each eviction increments the user's generation key; a snapshot is only
+    stored if the generation is still the one read before loading it.
+    """
+
+    shared = True
+
+    # KEYS: snapshot, generation; ARGV: generation at load start, snapshot JSON, data_version, ttl
+    SET_SCRIPT = """
+        if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+            return 0
+        end
+        local current = redis.call('GET', KEYS[1])
+        if current then
+            local cached = cjson.decode(current)
+            if tonumber(cached['data_version']) > tonumber(ARGV[3]) then
+                return 0
+            end
+        end
+        redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[4])
+        return 1
+    """
+
+    def __init__(self, url: str, ttl: float):
+        import redis  # Optional dependency, only needed for the shared cache
+        self._client = redis.Redis.from_url(url)
+        self._set_script = self._client.register_script(self.SET_SCRIPT)
+        self.ttl = ttl
+
+    def load_token(self, user_id: int) -> str:
+        """Taken before loading a snapshot from the database; passed to set()."""
+        generation = self._client.get(f"principal-gen:{user_id}")
+        return generation.decode() if generation else ""
+
+    def get(self, user_id: int) -> Optional[dict]:
+        raw = self._client.get(f"principal:{user_id}")
+        return _decode_fields(json.loads(raw)) if raw else None
+
+    def set(self, user_id: int, fields: dict, load_token: str) -> None:
+        self._set_script(
+            keys=[f"principal:{user_id}", f"principal-gen:{user_id}"],
+            args=[load_token, json.dumps(fields, default=str), fields["data_version"], max(1, int(self.ttl))]
+        )
+
+    def delete(self, user_id: int) -> None:
+        pipeline = self._client.pipeline()
+        pipeline.incr(f"principal-gen:{user_id}")
+        pipeline.expire(f"principal-gen:{user_id}", TOMBSTONE_SECONDS)
+        pipeline.delete(f"principal:{user_id}")
+        pipeline.execute()
+
+
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_token_lock = threading.Lock()
+
+_store = None
+if PRINCIPAL_CACHE_TTL > 0:
+    _store = _RedisStore(PRINCIPAL_CACHE_URL, PRINCIPAL_CACHE_TTL) if PRINCIPAL_CACHE_URL else _LocalStore(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
+def is_shared() -> bool:
+    """True when cached snapshots are invalidated across all workers."""
+    return _store is None or _store.shared
+
+
+def get_cached_token(token: str) -> Optional[int]:
+    """User id for a previously verified, unexpired token."""
+    with _token_lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del _token_cache[token]
+            return None
+        _token_cache.move_to_end(token)
+        return user_id
+
+
+def cache_token(token: str, user_id: int, expires_at: Optional[float]) -> None:
+    """Remember a verified token until it expires."""
+    if _store is None:
+        return
+    with _token_lock:
+        _token_cache[token] = (user_id, expires_at)
+        _token_cache.move_to_end(token)
+        while len(_token_cache) > PRINCIPAL_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+
+def get_principal(user_id: int, db: Session) -> Optional[UserPrincipal]:
+    """
+    Snapshot for a user, from the cache when possible, else from the database.
+    """
+    load_token = None
+    if _store is not None:
+        fields = _store.get(user_id)
+        if fields is not None:
+            return UserPrincipal(cached=True, **fields)
+        load_token = _store.load_token(user_id)
+
+    columns = [getattr(User, name) for name in PRINCIPAL_FIELDS]
+    row = db.query(*columns).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    fields = dict(zip(PRINCIPAL_FIELDS, row))
+    if _store is not None:
+        _store.set(user_id, fields, load_token)
+    return UserPrincipal(**fields)
+
+
+async def get_principal_async(user_id: int, db: AsyncSession) -> Optional[UserPrincipal]:
+    """
+    get_principal for async endpoints.
+    """
+    load_token = None
+    if _store is not None:
+        fields = await _call_store(_store.get, user_id)
+        if fields is not None:
+            return UserPrincipal(cached=True, **fields)
+        load_token = await _call_store(_store.load_token, user_id)
+
+    columns = [getattr(User, name) for name in PRINCIPAL_FIELDS]
+    in_transaction = db.in_transaction()
+    row = (await db.execute(select(*columns).where(User.id == user_id))).first()
+    if not in_transaction:
+        # Return the connection; endpoints reading from a replica don't use this session again
+        await db.rollback()
+    if row is None:
+        return None
+
+    fields = dict(zip(PRINCIPAL_FIELDS, row))
+    if _store is not None:
+        await _call_store(_store.set, user_id, fields, load_token)
+    return UserPrincipal(**fields)
+
+
+async def _call_store(method, *args):
+    """Call a store method, off the event loop when it does network I/O."""
+    if _store.shared:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop a user's cached snapshot."""
+    if _store is not None:
+        _store.delete(user_id)
+
+
+def mark_user_changed(db: Session, user_id: int) -> None:
+    """Schedule a user's snapshot for eviction when this session commits."""
+    db.info.setdefault(CHANGED_USERS_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_changed_users(session: Session) -> None:
+    for user_id in session.info.pop(CHANGED_USERS_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop(CHANGED_USERS_KEY, None)
+
+
+def _decode_fields(fields: dict) -> dict:
+    """Restore date/datetime columns from their JSON (ISO string) form."""
+    for name, value in fields.items():
+        if not isinstance(value, str):
+            continue
+        python_type = User.__table__.c[name].type.python_type
+        if python_type is datetime:
+            fields[name] = datetime.fromisoformat(value)
+        elif python_type is date:
+            fields[name] = date.fromisoformat(value)
+    return fields
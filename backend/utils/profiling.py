@@ -0,0 +1,419 @@
+"""
+Per-Request Profiling
+Opt-in sampling profiler for finding where one slow request spends its
+time. A profiled request is sampled every PROFILE_INTERVAL_MS by a
+background thread reading the stacks of the threads working on it: the
+event loop while the request's task is running, and the worker threads
+running its sync endpoint and dependencies (bound by ProfiledRoute). The
+samples are stored as a speedscope profile (https://www.speedscope.app),
+also available as collapsed stacks for flamegraph.pl, and listed at
+/admin/profiles. The response carries the id in X-Profile-Id.
+
+A request is profiled when it carries `X-Profile: <ADMIN_TOKEN>`, when
+it comes from one of PROFILE_USER_IDS, or when it is sampled:
+
+    PROFILING            install the middleware and route hooks (default false)
+    PROFILE_SAMPLE_RATE  share of requests profiled (default 0)
+    PROFILE_PATHS        comma-separated path prefixes the rate applies to (default all)
+    PROFILE_USER_IDS     comma-separated user ids whose requests are always profiled
+    PROFILE_INTERVAL_MS  sampling interval (default 1)
+    PROFILE_STORE_SIZE   profiles kept per worker, and in PROFILE_DIR (default 50)
+    PROFILE_DIR          also save profiles here, so any worker can serve them;
+                         the oldest beyond PROFILE_STORE_SIZE are deleted
+
+With PROFILING off nothing is installed and requests pay nothing. Samples
+are wall-clock: a worker thread blocked on the database shows up in the
+driver call, while time the request's task spends awaiting on the event
+loop is not sampled.
+"""
+
+import asyncio
+import functools
+import hmac
+import inspect
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import config  # noqa: F401  (loads .env)
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from utils.auth import ADMIN_TOKEN
+from utils.log import get_logger, log_fields, current_request_id
+from utils.security import decode_access_token
+
+logger = get_logger(__name__)
+
+PROFILING = os.getenv("PROFILING", "false").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_PATHS = tuple(path.strip() for path in os.getenv("PROFILE_PATHS", "").split(",") if path.strip())
+PROFILE_USER_IDS = frozenset(user_id.strip() for user_id in os.getenv("PROFILE_USER_IDS", "").split(",") if user_id.strip())
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "50"))
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+
+# Longest profile kept; sampling stops after this
+PROFILE_MAX_SECONDS = 30
+# Deeper stacks are cut at the root end
+MAX_STACK_DEPTH = 200
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+
+
+class RequestProfile:
+    """Samples of one request: stack (code objects, root first) -> seconds."""
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.request_id = current_request_id()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.task: Optional[asyncio.Task] = None
+        self.loop_thread: Optional[int] = None
+        self.worker_threads: set = set()
+        self.stacks: Dict[tuple, float] = {}
+        self.samples = 0
+        # Held by the sampler thread while it records, and by finish()
+        self._lock = threading.Lock()
+        self._finished = False
+        # Filled in by finish()
+        self.frames: List[dict] = []
+        self.weighted_stacks: List[Tuple[List[int], float]] = []
+
+    def sample(self, frames: dict, seconds: float) -> None:
+        """Record the stacks of the threads currently working for this request."""
+        with self._lock:
+            if not self._finished:
+                self._sample(frames, seconds)
+
+    def _sample(self, frames: dict, seconds: float) -> None:
+        threads = [("worker thread", thread_id) for thread_id in tuple(self.worker_threads)]
+        if self.loop is not None and asyncio.current_task(self.loop) is self.task:
+            threads.append(("event loop", self.loop_thread))
+        for label, thread_id in threads:
+            frame = frames.get(thread_id)
+            codes = []
+            while frame is not None and len(codes) < MAX_STACK_DEPTH:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if codes:
+                codes.append(label)
+                stack = tuple(reversed(codes))
+                self.stacks[stack] = self.stacks.get(stack, 0.0) + seconds
+                self.samples += 1
+
+    def finish(self, status: Optional[int]) -> None:
+        """Stop timing and turn code objects into a frame table (releasing them)."""
+        self.duration_ms = round((time.perf_counter() - self.started) * 1000, 2)
+        self.status = status
+        # The sampler may still be inside sample() after remove(); wait for it
+        with self._lock:
+            self._finished = True
+            stacks, self.stacks = self.stacks, {}
+        index: Dict[object, int] = {}
+        for stack, seconds in stacks.items():
+            indexes = []
+            for code in stack:
+                if code not in index:
+                    index[code] = len(self.frames)
+                    if isinstance(code, str):
+                        self.frames.append({"name": f"[{code}]"})
+                    else:
+                        # co_qualname is new in Python 3.11
+                        name = getattr(code, "co_qualname", code.co_name)
+                        self.frames.append({"name": name, "file": code.co_filename, "line": code.co_firstlineno})
+                indexes.append(index[code])
+            self.weighted_stacks.append((indexes, seconds))
+        self.loop = self.task = None
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "reason": self.reason,
+            "request_id": self.request_id,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)),
+        }
+
+    def speedscope(self) -> dict:
+        total_ms = sum(seconds for _, seconds in self.weighted_stacks) * 1000
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": f"{self.method} {self.path} ({self.id})",
+            "exporter": "fittrack",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{self.method} {self.path}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(total_ms, 3),
+                "samples": [indexes for indexes, _ in self.weighted_stacks],
+                "weights": [round(seconds * 1000, 3) for _, seconds in self.weighted_stacks],
+            }],
+            "fittrack": self.summary(),
+        }
+
+
+def collapsed_stacks(speedscope: dict) -> str:
+    """Collapsed stacks (frame;frame;frame microseconds), the flamegraph.pl input format."""
+    frames = [frame["name"] for frame in speedscope["shared"]["frames"]]
+    profile = speedscope["profiles"][0]
+    lines = [
+        ";".join(frames[index] for index in stack) + f" {max(1, round(weight * 1000))}"
+        for stack, weight in zip(profile["samples"], profile["weights"])
+    ]
+    return "\n".join(sorted(lines)) + "\n"
+
+
+class _Sampler:
+    """Background thread sampling the active profiles; idle while there are none."""
+
+    def __init__(self):
+        self._profiles: List[RequestProfile] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._lock:
+            if profile in self._profiles:
+                self._profiles.remove(profile)
+
+    def _run(self) -> None:
+        interval = PROFILE_INTERVAL_MS / 1000
+        last = time.perf_counter()
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._wake.clear()
+            if not profiles:
+                self._wake.wait()
+                last = time.perf_counter()
+                continue
+
+            time.sleep(interval)
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for profile in profiles:
+                if now - profile.started < PROFILE_MAX_SECONDS:
+                    profile.sample(frames, now - last)
+            del frames
+            last = now
+
+
+_sampler = _Sampler()
+_store: "OrderedDict[str, RequestProfile]" = OrderedDict()
+_store_lock = threading.Lock()
+
+
+# In PROFILE_DIR each profile is saved twice: in full, and as its summary for listing
+PROFILE_SUFFIX = ".speedscope.json"
+SUMMARY_SUFFIX = ".summary.json"
+
+
+def _save(profile: RequestProfile) -> None:
+    with _store_lock:
+        _store[profile.id] = profile
+        while len(_store) > PROFILE_STORE_SIZE:
+            _store.popitem(last=False)
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        _write_json(os.path.join(PROFILE_DIR, profile.id + PROFILE_SUFFIX), profile.speedscope())
+        _write_json(os.path.join(PROFILE_DIR, profile.id + SUMMARY_SUFFIX), profile.summary())
+        _prune_profile_dir()
+
+
+def _write_json(path: str, data: dict) -> None:
+    """Write via a temporary file, so other workers never read a partial file."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as output:
+        json.dump(data, output)
+    os.replace(temporary, path)
+
+
+def _prune_profile_dir() -> None:
+    """Delete the oldest saved profiles beyond PROFILE_STORE_SIZE."""
+    saved = []
+    with os.scandir(PROFILE_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(PROFILE_SUFFIX):
+                try:
+                    saved.append((entry.stat().st_mtime, entry.name[:-len(PROFILE_SUFFIX)]))
+                except FileNotFoundError:  # Pruned by another worker
+                    pass
+    saved.sort(reverse=True)
+    for _, profile_id in saved[PROFILE_STORE_SIZE:]:
+        for suffix in (SUMMARY_SUFFIX, PROFILE_SUFFIX):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> List[dict]:
+    """Summaries of the stored profiles, newest first (this worker's, or PROFILE_DIR's)."""
+    if PROFILE_DIR and os.path.isdir(PROFILE_DIR):
+        summaries = []
+        for name in os.listdir(PROFILE_DIR):
+            if name.endswith(SUMMARY_SUFFIX):
+                try:
+                    with open(os.path.join(PROFILE_DIR, name)) as summary_file:
+                        summaries.append(json.load(summary_file))
+                except FileNotFoundError:  # Pruned by another worker
+                    pass
+    else:
+        with _store_lock:
+            summaries = [profile.summary() for profile in _store.values()]
+    return sorted(summaries, key=lambda summary: summary["started_at"], reverse=True)
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    """A stored profile in speedscope format, or None."""
+    with _store_lock:
+        profile = _store.get(profile_id)
+    if profile is not None:
+        return profile.speedscope()
+    if PROFILE_DIR and all(char in "0123456789abcdef" for char in profile_id):
+        try:
+            with open(os.path.join(PROFILE_DIR, profile_id + PROFILE_SUFFIX)) as profile_file:
+                return json.load(profile_file)
+        except FileNotFoundError:
+            pass
+    return None
+
+
+def _bind_thread(call):
+    """Wrap a sync endpoint or dependency so the thread running it is sampled."""
+    @functools.wraps(call)
+    def bound(*args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return call(*args, **kwargs)
+        thread_id = threading.get_ident()
+        profile.worker_threads.add(thread_id)
+        try:
+            return call(*args, **kwargs)
+        finally:
+            profile.worker_threads.discard(thread_id)
+    return bound
+
+
+def _is_plain_function(call) -> bool:
+    return (inspect.isfunction(call) and not inspect.iscoroutinefunction(call)
+            and not inspect.isgeneratorfunction(call) and not inspect.isasyncgenfunction(call))
+
+
+class ProfiledRoute(APIRoute):
+    """
+    APIRoute whose sync endpoint and (non-generator) sync dependencies run
+    bound to the request's profile, so their threadpool threads are sampled.
+    A plain APIRoute when PROFILING is off.
+    """
+
+    def get_route_handler(self):
+        if PROFILING:
+            pending = [self.dependant]
+            while pending:
+                dependant = pending.pop()
+                if _is_plain_function(dependant.call):
+                    dependant.call = _bind_thread(dependant.call)
+                pending.extend(dependant.dependencies)
+        return super().get_route_handler()
+
+
+def _profile_reason(scope) -> Optional[str]:
+    """Why this request should be profiled, or None."""
+    headers = dict(scope.get("headers", ()))
+    requested = headers.get(b"x-profile")
+    if requested is not None and ADMIN_TOKEN and hmac.compare_digest(requested, ADMIN_TOKEN.encode()):
+        return "header"
+
+    if PROFILE_USER_IDS:
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if authorization.lower().startswith("bearer "):
+            payload = decode_access_token(authorization[7:])
+            if payload and str(payload.get("sub")) in PROFILE_USER_IDS:
+                return "user"
+
+    if PROFILE_SAMPLE_RATE > 0 and (not PROFILE_PATHS or scope["path"].startswith(PROFILE_PATHS)):
+        if random.random() < PROFILE_SAMPLE_RATE:
+            return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles the requests selected by _profile_reason
+    and stores the result. Only installed when PROFILING is on.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/admin"):
+            await self.app(scope, receive, send)
+            return
+
+        reason = _profile_reason(scope)
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], reason)
+        profile.loop = asyncio.get_running_loop()
+        profile.task = asyncio.current_task()
+        profile.loop_thread = threading.get_ident()
+        status = None
+
+        async def send_with_profile_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = _active.set(profile)
+        _sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _sampler.remove(profile)
+            _active.reset(token)
+            profile.finish(status)
+            try:
+                await run_in_threadpool(_save, profile)
+            except OSError:
+                logger.warning("Saving profile failed", exc_info=True, extra=log_fields(profile_id=profile.id))
+            logger.info("Request profiled", extra=log_fields(
+                profile_id=profile.id, path=profile.path, duration_ms=profile.duration_ms,
+                samples=profile.samples, reason=reason
+            ))
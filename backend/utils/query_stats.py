@@ -0,0 +1,215 @@
+"""
+SQL Query Accounting
+Counts the statements every request sends to the database, and the time
+they take, via SQLAlchemy engine events (sync, async and replica engines
+alike). Totals are returned in the X-DB-Queries / X-DB-Time-Ms response
+headers and recorded per route in /metrics, so handlers that hide extra
+round trips stand out.
+
+    SLOW_QUERY_MS          statements slower than this are logged (default 500, 0 disables)
+    SLOW_QUERY_EXPLAIN     also log their EXPLAIN plan (default true)
+    DB_QUERY_HEADERS       add the X-DB-* response headers (default true)
+
+EXPLAIN runs on a background thread with its own connection, at most once
+per statement every SLOW_QUERY_EXPLAIN_INTERVAL seconds, so a slow query
+never gets slower by being logged. Plans are only captured for statements
+from the psycopg2 engines (asyncpg statements are logged without a plan).
+
+query_budget() fails code that issues more statements than expected, e.g.
+to catch N+1 regressions:
+
+    from routers.dashboard import _build_daily_summary
+
+    with query_budget(2):
+        _build_daily_summary(user, date.today(), db)
+
+For endpoints, compare the X-DB-Queries header against the budget.
+Statements are counted until the response headers are sent.
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import List, Optional
+import config  # noqa: F401  (loads .env)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.metrics import Counter, HistogramFamily
+from utils.log import get_logger, log_fields
+
+logger = get_logger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_EXPLAIN_INTERVAL = 300
+DB_QUERY_HEADERS = os.getenv("DB_QUERY_HEADERS", "true").lower() in ("1", "true", "yes")
+
+db_queries_per_request = HistogramFamily(
+    "db_queries_per_request", "SQL statements issued per request.", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 20, 50, 100)
+)
+db_time_per_request = HistogramFamily("db_time_per_request_seconds", "Time spent in SQL statements per request.", ("route",))
+slow_queries = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.")
+
+
+class QueryStats:
+    """Statements counted in one scope (a request, or a query_budget block)."""
+
+    __slots__ = ("count", "seconds", "statements", "parent")
+
+    def __init__(self, record_statements: bool = False, parent: Optional["QueryStats"] = None):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Optional[List[str]] = [] if record_statements else None
+        self.parent = parent
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget() when a block issues too many statements."""
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request (or budget block) being served, if any."""
+    return _current.get()
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Raise QueryBudgetExceeded if the block issues more than max_queries
+    statements. The statements are listed in the error.
+    """
+    stats = QueryStats(record_statements=True, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {i}. {statement}" for i, statement in enumerate(stats.statements, start=1))
+        raise QueryBudgetExceeded(f"{stats.count} queries issued, budget is {max_queries}:\n{listing}")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+
+    stats = _current.get()
+    while stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(" ".join(statement.split()))
+        stats = stats.parent
+
+    if SLOW_QUERY_MS > 0 and elapsed * 1000 >= SLOW_QUERY_MS:
+        _report_slow_query(conn, statement, parameters, executemany, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context):
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def _report_slow_query(conn, statement, parameters, executemany, elapsed) -> None:
+    slow_queries.inc()
+    logger.warning("Slow query", extra=log_fields(ms=round(elapsed * 1000), statement=" ".join(statement.split())))
+
+    explainable = statement.lstrip()[:6].upper() in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+    if not (SLOW_QUERY_EXPLAIN and explainable and not executemany and conn.dialect.driver == "psycopg2"):
+        return
+
+    now = time.monotonic()
+    if now - _explained_at.get(statement, -SLOW_QUERY_EXPLAIN_INTERVAL) < SLOW_QUERY_EXPLAIN_INTERVAL:
+        return
+    _explained_at[statement] = now
+    if len(_explained_at) > 1000:
+        _explained_at.clear()
+
+    _ensure_explain_worker()
+    try:
+        _explain_queue.put_nowait((conn.engine, statement, parameters, copy_context()))
+    except queue.Full:
+        pass
+
+
+_explain_queue: "queue.Queue" = queue.Queue(maxsize=100)
+_explained_at = {}
+_explain_worker: Optional[threading.Thread] = None
+_explain_worker_lock = threading.Lock()
+
+
+def _ensure_explain_worker() -> None:
+    global _explain_worker
+    if _explain_worker is not None:
+        return
+    with _explain_worker_lock:
+        if _explain_worker is None:
+            _explain_worker = threading.Thread(target=_explain_slow_queries, name="slow-query-explain", daemon=True)
+            _explain_worker.start()
+
+
+def _explain_slow_queries() -> None:
+    while True:
+        engine, statement, parameters, context = _explain_queue.get()
+        try:
+            # Raw DBAPI connection: EXPLAIN itself is not counted or timed
+            connection = engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute("EXPLAIN " + statement, parameters)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                connection.rollback()
+            finally:
+                connection.close()
+            # Logged in the request's context so the plan carries its request id
+            context.run(logger.warning, "Slow query plan", extra=log_fields(statement=" ".join(statement.split()), plan=plan))
+        except Exception:
+            context.run(logger.warning, "EXPLAIN of slow query failed", exc_info=True)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that counts each request's statements, reports them in
+    response headers and records them per route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and DB_QUERY_HEADERS:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            db_queries_per_request.observe(stats.count, route)
+            db_time_per_request.observe(stats.seconds, route)
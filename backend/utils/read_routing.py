@@ -0,0 +1,200 @@
+"""
+Read-Replica Routing
+
+Designated read-only endpoints (progress charts, weight history, entry
+listings, analytics and food search) take their session from here, so
+heavy GROUP BY reads can be spread over streaming replicas while writes
+stay on the primary.
+
+    READ_REPLICA_URLS           comma-separated replica DATABASE_URLs (none: always primary)
+    REPLICA_MAX_LAG_SECONDS     replicas further behind than this are skipped (default 5)
+    REPLICA_LAG_CHECK_INTERVAL  seconds between replication lag checks (default 5)
+    REPLICA_STICKY_SECONDS      after a write, the user's reads stay on the primary
+                                for this long (default max lag + check interval)
+
+Replication lag is measured by a background thread, so choosing a replica
+never blocks a request. Healthy replicas are used round-robin; when none
+is healthy, reads fall back to the primary.
+
+Read-your-writes: before a user's read goes to a replica, their
+data_version and updated_at (advanced by every data version bump) are
+read from the primary, one primary-key lookup. Users who wrote within
+REPLICA_STICKY_SECONDS read from the primary, whichever worker handled
+the write. The primary's data_version is kept in the session's info
+(PRIMARY_DATA_VERSION_KEY) so ETags never come from a lagging replica.
+"""
+
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import config  # noqa: F401  (loads .env)
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from database import engine, SessionLocal, AsyncSessionLocal, asyncpg_url
+from utils.db_pool import engine_options, instrument_pool, pool_status
+from utils.metrics import register_collector
+
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("READ_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "5"))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", str(REPLICA_MAX_LAG_SECONDS + REPLICA_LAG_CHECK_INTERVAL)))
+
+# Session.info key holding the user's data_version as read on the primary
+PRIMARY_DATA_VERSION_KEY = "primary_data_version"
+
+LAST_WRITE_SQL = text("SELECT data_version, updated_at FROM users WHERE id = :user_id")
+
+# Seconds since the last replayed transaction; 0 when the replica has replayed
+# everything it received (an idle primary produces no new transactions).
+REPLICATION_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class _Replica:
+    """Engines, session factories and last measured lag for one replica."""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_engine(url, **engine_options())
+        self.async_engine = create_async_engine(asyncpg_url(url), **engine_options(is_async=True))
+        instrument_pool(self.engine, name)
+        instrument_pool(self.async_engine, f"{name}_async")
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_session_factory = async_sessionmaker(self.async_engine, expire_on_commit=False)
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self.error: Optional[str] = None
+
+    def measure_lag(self) -> None:
+        try:
+            with self.engine.connect() as connection:
+                self.lag = float(connection.execute(REPLICATION_LAG_SQL).scalar())
+            self.error = None
+        except Exception as e:
+            self.lag = None
+            self.error = str(e)
+        self.checked_at = time.monotonic()
+
+    @property
+    def healthy(self) -> bool:
+        fresh = time.monotonic() - self.checked_at <= 3 * REPLICA_LAG_CHECK_INTERVAL
+        return fresh and self.lag is not None and self.lag <= REPLICA_MAX_LAG_SECONDS
+
+
+replicas: List[_Replica] = [_Replica(f"replica{i}", url) for i, url in enumerate(READ_REPLICA_URLS, start=1)]
+
+_round_robin = itertools.count()
+_monitor_lock = threading.Lock()
+_monitor: Optional[threading.Thread] = None
+
+
+def read_session(user=None) -> Session:
+    """Session for a read-only request, optionally on behalf of a user."""
+    replica, primary_version = _choose_replica(user)
+    db = replica.session_factory() if replica else SessionLocal()
+    if primary_version is not None:
+        db.info[PRIMARY_DATA_VERSION_KEY] = primary_version
+    return db
+
+
+async def async_read_session(user=None) -> AsyncSession:
+    """Async session for a read-only request, optionally on behalf of a user."""
+    # Without replicas there is nothing to check, so skip the threadpool
+    replica, primary_version = await run_in_threadpool(_choose_replica, user) if replicas else (None, None)
+    db = replica.async_session_factory() if replica else AsyncSessionLocal()
+    if primary_version is not None:
+        db.info[PRIMARY_DATA_VERSION_KEY] = primary_version
+    return db
+
+
+def replica_status() -> Dict:
+    """Lag, health and pool utilization per replica."""
+    return {
+        replica.name: {
+            "healthy": replica.healthy,
+            "lag_seconds": None if replica.lag is None else round(replica.lag, 3),
+            "error": replica.error,
+            "pool": pool_status(replica.engine),
+        }
+        for replica in replicas
+    }
+
+
+def _choose_replica(user) -> Tuple[Optional[_Replica], Optional[int]]:
+    """
+    A healthy replica (None for the primary) and, for a user's read on a
+    replica, their data_version as read on the primary.
+    """
+    if not replicas:
+        return None, None
+    _ensure_monitor()
+
+    healthy = [replica for replica in replicas if replica.healthy]
+    if not healthy:
+        return None, None
+
+    primary_version = None
+    if user is not None:
+        last_write = _last_write(user.id)
+        if last_write is None or _wrote_recently(last_write[1]):
+            return None, None
+        primary_version = last_write[0]
+    return healthy[next(_round_robin) % len(healthy)], primary_version
+
+
+def _last_write(user_id: int) -> Optional[Tuple[int, Optional[datetime]]]:
+    """The user's data_version and updated_at on the primary."""
+    with engine.connect() as connection:
+        row = connection.execute(LAST_WRITE_SQL, {"user_id": user_id}).first()
+    return tuple(row) if row else None
+
+
+def _wrote_recently(updated_at: Optional[datetime]) -> bool:
+    if updated_at is None:
+        return False
+    # updated_at is stored as naive UTC
+    return time.time() - updated_at.replace(tzinfo=timezone.utc).timestamp() < REPLICA_STICKY_SECONDS
+
+
+def _ensure_monitor() -> None:
+    """Start the lag-measuring thread on first use."""
+    global _monitor
+    if _monitor is not None:
+        return
+    with _monitor_lock:
+        if _monitor is None:
+            for replica in replicas:
+                replica.measure_lag()
+            _monitor = threading.Thread(target=_monitor_lag, name="replica-lag-monitor", daemon=True)
+            _monitor.start()
+
+
+def _monitor_lag() -> None:
+    while True:
+        time.sleep(REPLICA_LAG_CHECK_INTERVAL)
+        for replica in replicas:
+            replica.measure_lag()
+
+
+def _replica_metrics():
+    yield (
+        "db_replica_lag_seconds", "gauge", "Replication lag at the last check (NaN when unreachable).",
+        [("db_replica_lag_seconds", {"replica": replica.name}, replica.lag) for replica in replicas]
+    )
+    yield (
+        "db_replica_healthy", "gauge", "1 when the replica is used for reads.",
+        [("db_replica_healthy", {"replica": replica.name}, replica.healthy) for replica in replicas]
+    )
+
+
+register_collector(_replica_metrics)
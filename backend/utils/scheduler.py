@@ -0,0 +1,409 @@
+"""
+Background Job Scheduler
+Runs periodic maintenance inside the API process, started and stopped with
+the application (main.py). Jobs are registered with `schedule_job` and run
+either every N seconds or on a five-field cron expression evaluated in UTC
+(minute hour day-of-month month day-of-week; `*`, `a-b`, `*/n`, `a-b/n`
+and lists).
+
+Every worker runs the scheduler, but jobs registered with leader=True
+(the default) only run on the current leader: the worker holding a
+session-level Postgres advisory lock on a dedicated connection. If the
+leader dies its connection closes, the lock is released, and another
+worker takes over on its next check. Per-worker jobs (leader=False) run
+everywhere, e.g. pruning in-memory caches.
+
+A job never overlaps itself within a worker; a run still going when the
+next one is due is skipped. A run that exceeds its timeout is reported as
+a timeout, but the thread can't be killed, so jobs that touch the database
+should also bound their statements (see services/maintenance.py).
+
+    SCHEDULER_ENABLED                run jobs in this process (default true)
+    SCHEDULER_DATABASE_URL           direct (non-PgBouncer) URL for the leader lock
+                                     (default DATABASE_URL)
+    SCHEDULER_LEADER_CHECK_SECONDS   how often followers try to take over and the
+                                     leader checks its connection (default 15)
+
+Session advisory locks don't survive PgBouncer transaction pooling, so with
+DB_PGBOUNCER set leader jobs only run when SCHEDULER_DATABASE_URL points
+at Postgres directly. /metrics reports scheduler_job_runs_total,
+scheduler_job_duration_seconds, scheduler_job_last_success_timestamp_seconds
+and scheduler_leader; /admin/jobs lists the jobs and their last runs.
+"""
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, FrozenSet, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
+import config  # noqa: F401  (loads .env)
+from utils.db_pool import DB_PGBOUNCER
+from utils.log import get_logger, log_fields
+from utils.metrics import Counter, Gauge, HistogramFamily
+
+logger = get_logger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCHEDULER_DATABASE_URL = os.getenv("SCHEDULER_DATABASE_URL")
+SCHEDULER_LEADER_CHECK_SECONDS = float(os.getenv("SCHEDULER_LEADER_CHECK_SECONDS", "15"))
+
+# Session advisory lock held by the leader (partition maintenance uses 7310401)
+SCHEDULER_LOCK_KEY = 7310402
+
+job_runs = Counter(
+    "scheduler_job_runs_total", "Scheduled job runs by outcome (success, error, timeout, skipped).",
+    ("job", "outcome")
+)
+job_duration = HistogramFamily(
+    "scheduler_job_duration_seconds", "Scheduled job run time.", ("job",),
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+job_last_success = Gauge(
+    "scheduler_job_last_success_timestamp_seconds", "Unix time the job last finished successfully.", ("job",)
+)
+leader_gauge = Gauge("scheduler_leader", "1 while this worker holds the scheduler leader lock.")
+
+
+class CronSchedule:
+    """
+    Five-field cron expression evaluated in UTC. As in Vixie cron, when both
+    day-of-month and day-of-week are restricted a day matching either fires.
+    """
+
+    FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day of month", 1, 31), ("month", 1, 12), ("day of week", 0, 7))
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(field, name, low, high) for field, (name, low, high) in zip(fields, self.FIELDS)
+        )
+        # 0 and 7 are both Sunday
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, name: str, low: int, high: int) -> FrozenSet[int]:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(bound) for bound in part.split("-", 1))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if step < 1 or not low <= start <= end <= high:
+                raise ValueError(f"Invalid cron {name} field {field!r}")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_month = moment.day in self.days
+        in_week = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return in_week
+        if self.any_weekday:
+            return in_month
+        return in_month or in_week
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after `moment` (an aware datetime)."""
+        moment = moment.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Five years covers Feb 29 schedules
+        limit = moment + timedelta(days=5 * 366)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+
+class Job:
+    """
+    A registered job and the state of its last run.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], object],
+        every: Optional[float] = None,
+        cron: Optional[str] = None,
+        jitter: float = 0.0,
+        timeout: float = 300.0,
+        leader: bool = True
+    ):
+        if (every is None) == (cron is None):
+            raise ValueError(f"Job {name!r} needs exactly one of every= or cron=")
+        if every is not None and every <= 0:
+            raise ValueError(f"Job {name!r} needs a positive interval")
+        self.name = name
+        self.func = func
+        self.every = every
+        self.cron = CronSchedule(cron) if cron else None
+        self.jitter = jitter
+        self.timeout = timeout
+        self.leader = leader
+
+        self.running = False
+        self.next_run: Optional[datetime] = None
+        self.last_started: Optional[datetime] = None
+        self.last_finished: Optional[datetime] = None
+        self.last_outcome: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def schedule_next(self, now: datetime) -> datetime:
+        """
+        Pick the next run time. Jitter spreads jobs that share a schedule
+        (and the workers of a cluster) over a few seconds or minutes.
+        """
+        due = self.cron.next_after(now) if self.cron else now + timedelta(seconds=self.every)
+        self.next_run = due + timedelta(seconds=random.uniform(0, self.jitter))
+        return self.next_run
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "schedule": self.cron.expression if self.cron else f"every {self.every:g}s",
+            "leader_only": self.leader,
+            "timeout_seconds": self.timeout,
+            "running": self.running,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "last_started": self.last_started.isoformat() if self.last_started else None,
+            "last_finished": self.last_finished.isoformat() if self.last_finished else None,
+            "last_outcome": self.last_outcome,
+            "last_error": self.last_error,
+        }
+
+
+_jobs: Dict[str, Job] = {}
+
+
+def schedule_job(
+    name: str,
+    func: Callable[[], object],
+    *,
+    every: Optional[float] = None,
+    cron: Optional[str] = None,
+    jitter: float = 0.0,
+    timeout: float = 300.0,
+    leader: bool = True
+) -> Job:
+    """
+    Register a synchronous job; it runs in the thread pool. Give either
+    `every` (seconds between runs) or `cron`. Register before startup.
+    """
+    if name in _jobs:
+        raise ValueError(f"Job {name!r} is already scheduled")
+    job = Job(name, func, every=every, cron=cron, jitter=jitter, timeout=timeout, leader=leader)
+    _jobs[name] = job
+    return job
+
+
+def list_jobs() -> List[dict]:
+    return [job.describe() for job in _jobs.values()]
+
+
+def get_job(name: str) -> Optional[Job]:
+    return _jobs.get(name)
+
+
+class _LeaderLock:
+    """
+    Session advisory lock on a dedicated autocommit connection, kept open so
+    followers can retry cheaply and the leader's heartbeat notices a lost
+    connection (and with it the lock).
+    """
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+        self.connection = None
+        self.held = False
+
+    def check(self) -> bool:
+        """Return whether this worker is the leader, trying to become it."""
+        try:
+            if self.connection is None:
+                self.connection = self.engine.connect()
+            if self.held:
+                self.connection.execute(text("SELECT 1"))
+            else:
+                self.held = bool(self.connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}
+                ).scalar())
+        except SQLAlchemyError:
+            if self.held:
+                logger.warning("Lost the scheduler leader connection", exc_info=True)
+            self._discard()
+        return self.held
+
+    def release(self) -> None:
+        if self.connection is not None and self.held:
+            try:
+                self.connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEDULER_LOCK_KEY})
+            except SQLAlchemyError:
+                pass
+        self._discard()
+        self.engine.dispose()
+
+    def _discard(self) -> None:
+        self.held = False
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except SQLAlchemyError:
+                pass
+            self.connection = None
+
+
+class _Scheduler:
+    def __init__(self, leader_url: Optional[str]):
+        self.leader_lock = _LeaderLock(leader_url) if leader_url else None
+        self.is_leader = False
+        self.tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.leader_lock is not None and any(job.leader for job in _jobs.values()):
+            self.tasks.append(loop.create_task(self._elect()))
+        for job in _jobs.values():
+            if job.leader and self.leader_lock is None:
+                continue
+            self.tasks.append(loop.create_task(self._run_forever(job)))
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
+        if self.leader_lock is not None:
+            await run_in_threadpool(self.leader_lock.release)
+        self._set_leader(False)
+
+    def _set_leader(self, is_leader: bool) -> None:
+        if is_leader != self.is_leader:
+            logger.info(
+                "Became scheduler leader" if is_leader else "No longer scheduler leader",
+                extra=log_fields(pid=os.getpid())
+            )
+        self.is_leader = is_leader
+        leader_gauge.set(1 if is_leader else 0)
+
+    async def _elect(self) -> None:
+        while True:
+            self._set_leader(await run_in_threadpool(self.leader_lock.check))
+            await asyncio.sleep(SCHEDULER_LEADER_CHECK_SECONDS)
+
+    async def _run_forever(self, job: Job) -> None:
+        while True:
+            now = datetime.now(timezone.utc)
+            await asyncio.sleep(max(0.0, (job.schedule_next(now) - now).total_seconds()))
+            if job.leader and not self.is_leader:
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        if job.running:
+            job_runs.inc(job.name, "skipped")
+            logger.warning("Skipped job run, previous run still going", extra=log_fields(job=job.name))
+            return
+
+        job.running = True
+        job.last_started = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        timed_out = False
+        # Shielded so a timeout stops waiting without orphaning the bookkeeping
+        task = asyncio.ensure_future(run_in_threadpool(job.func))
+
+        def finished(task: asyncio.Task) -> None:
+            elapsed = time.perf_counter() - started
+            job.running = False
+            job.last_finished = datetime.now(timezone.utc)
+            job_duration.observe(elapsed, job.name)
+            error = None if task.cancelled() else task.exception()
+            if timed_out:
+                return
+            if task.cancelled():
+                job.last_outcome = "cancelled"
+            elif error is not None:
+                job.last_outcome, job.last_error = "error", repr(error)
+                job_runs.inc(job.name, "error")
+                logger.error(
+                    "Job failed", exc_info=(type(error), error, error.__traceback__),
+                    extra=log_fields(job=job.name, duration_s=round(elapsed, 3))
+                )
+            else:
+                job.last_outcome, job.last_error = "success", None
+                job_runs.inc(job.name, "success")
+                job_last_success.set(time.time(), job.name)
+                logger.info("Job finished", extra=log_fields(job=job.name, duration_s=round(elapsed, 3)))
+
+        task.add_done_callback(finished)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), job.timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            job.last_outcome, job.last_error = "timeout", f"still running after {job.timeout:g}s"
+            job_runs.inc(job.name, "timeout")
+            logger.error("Job timed out", extra=log_fields(job=job.name, timeout_s=job.timeout))
+        except Exception:
+            # Reported by the done callback
+            pass
+
+
+_scheduler: Optional[_Scheduler] = None
+
+
+def start_scheduler() -> None:
+    """
+    Start the registered jobs on the running event loop (startup event).
+    """
+    global _scheduler
+    if not SCHEDULER_ENABLED or _scheduler is not None or not _jobs:
+        return
+    leader_url = SCHEDULER_DATABASE_URL
+    if leader_url is None:
+        if DB_PGBOUNCER:
+            logger.warning("DB_PGBOUNCER is set without SCHEDULER_DATABASE_URL; leader-only jobs are disabled")
+        else:
+            from database import DATABASE_URL as leader_url
+    _scheduler = _Scheduler(leader_url)
+    _scheduler.start()
+    logger.info("Scheduler started", extra=log_fields(jobs=len(_jobs)))
+
+
+async def stop_scheduler() -> None:
+    """
+    Cancel the job loops and release the leader lock (shutdown event).
+    Job threads already running are left to finish.
+    """
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
+
+
+def is_leader() -> bool:
+    return _scheduler is not None and _scheduler.is_leader
@@ -0,0 +1,75 @@
+"""
+Schema Version Check
+The schema is managed by Alembic migrations (backend/migrations). Instead
+of creating tables on every start, the application only checks that the
+database has been migrated to the latest revision:
+
+    DB_SCHEMA_CHECK   strict: refuse to start when the schema is behind (default)
+                      warn:   log a warning and start anyway
+                      off:    skip the check
+
+Run `alembic upgrade head` from backend/ to migrate.
+"""
+
+import os
+from typing import Optional, Tuple
+import config  # noqa: F401  (loads .env)
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from utils.log import get_logger
+
+logger = get_logger(__name__)
+
+DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "strict").lower()
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised when the database is not at the latest migration."""
+
+
+def head_revision() -> str:
+    """Latest revision in the migrations directory."""
+    # Alembic is only needed here, not on the request path
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_current_head()
+
+
+def current_revision(engine) -> Optional[str]:
+    """Revision recorded in the database, or None if it was never migrated."""
+    with engine.connect() as connection:
+        try:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        except DBAPIError:
+            # No alembic_version table
+            return None
+
+
+def check_schema_version(engine) -> Tuple[Optional[str], str]:
+    """
+    Compare the database revision with the migrations head.
+    Raises SchemaOutOfDate in strict mode when they differ.
+    """
+    if DB_SCHEMA_CHECK == "off":
+        return None, "unchecked"
+
+    current = current_revision(engine)
+    # Alembic is only needed here, not on the request path
+    from alembic.util import CommandError
+    try:
+        head = head_revision()
+    except CommandError as exc:
+        message = f"Could not read the migrations head from {ALEMBIC_INI}: {exc}"
+        if DB_SCHEMA_CHECK == "strict":
+            raise SchemaOutOfDate(message) from exc
+        logger.warning(message)
+        return current, "unknown"
+    if current != head:
+        message = f"Database schema is at {current or 'no revision'}, expected {head}. Run `alembic upgrade head`."
+        if DB_SCHEMA_CHECK == "strict":
+            raise SchemaOutOfDate(message)
+        logger.warning(message)
+    return current, head
@@ -20,12 +20,9 @@ const Dashboard = () => {
   const fetchDashboardData = async () => {
     try {
       const today = format(new Date(), 'yyyy-MM-dd');
-      const [summaryRes, streakRes] = await Promise.all([
-        dashboardAPI.getDailySummary(today),
-        dashboardAPI.getStreak(),
-      ]);
-      setSummary(summaryRes.data);
-      setStreak(streakRes.data);
+      const bundleRes = await dashboardAPI.getBundle(today);
+      setSummary(bundleRes.data.summary);
+      setStreak(bundleRes.data.streak);
     } catch (error) {
       console.error('Failed to fetch dashboard data:', error);
     } finally {
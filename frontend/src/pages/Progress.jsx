@@ -78,6 +78,7 @@ const Progress = () => {
             { value: '14', label: 'Last 14 Days' },
             { value: '30', label: 'Last 30 Days' },
             { value: '90', label: 'Last 90 Days' },
+            { value: '365', label: 'Last Year' },
           ]}
           className="w-auto"
         />
@@ -76,6 +76,8 @@ export const dashboardAPI = {
   getStreak: () => api.get('/dashboard/streak'),
   logWeight: (data) => api.post('/dashboard/weight', data),
   getWeightLogs: (days = 30) => api.get('/dashboard/weight', { params: { days } }),
+  getBundle: (date) => api.get('/dashboard/bundle', { params: { summary_date: date } }),
+  getAnalytics: (days = 90) => api.get('/dashboard/analytics', { params: { days } }),
 };
 
 export default api;